@@ -4,7 +4,6 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
-import shutil
 import os
 import json
 from datetime import datetime
@@ -12,15 +11,23 @@ import models
 import schemas
 import auth
 from database import SessionLocal, engine
+from services.artifact_store import find_artifact, read_json, write_csv, write_json
 from services.data_quality import run_pipeline
 from routes.projects import router as projects_router
 from routes.files import router as files_router
 from routes.verification import router as verification_router
-import pandas as pd
+from routes.dashboard import router as dashboard_router
 from utils import sanitize_for_json
+from services.run_artifacts import read_run_frame, write_artifact
+from services.run_metrics import record_run_metrics
+from services.dashboard_rollups import run_contribution, update_run
+from services.issue_index import IssueIndex, issue_index_for, refresh_missing
+from services.upload_stream import stream_upload
 
-# Create Tables
+# Create Tables, then bring existing databases up to date
 models.Base.metadata.create_all(bind=engine)
+from migrate import run_migrations
+run_migrations(engine)
 
 
 # DataGuardian AI API
@@ -30,6 +37,7 @@ app = FastAPI(title="DataGuardian AI")
 app.include_router(projects_router, prefix="/api")
 app.include_router(files_router)
 app.include_router(verification_router)
+app.include_router(dashboard_router, prefix="/api")
 from routes.upload import router as upload_csv_router
 app.include_router(upload_csv_router, prefix="/api")
 from routes.yogi_logic_router import router as yogi_router
@@ -179,20 +187,18 @@ async def upload_and_clean(file: UploadFile = File(...), token: str = Depends(oa
             raise HTTPException(status_code=400, detail="Only CSV files are allowed")
         
         # Save uploaded file
-        file_path = f"{UPLOAD_DIR}/{file.filename}"
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        stored = await stream_upload(file, f"{UPLOAD_DIR}/{file.filename}")
+        file_path = stored.path
 
         # Process the file (auto-apply mode)
-        cleaned_df, report = run_pipeline(file_path, auto_apply=True)
+        cleaned_df, report = run_pipeline(file_path, auto_apply=True, csv_options=stored.read_options)
         
         if cleaned_df is None:
             error_msg = report.get("error", "Could not process file")
             raise HTTPException(status_code=400, detail=error_msg)
 
         # Save cleaned file
-        cleaned_path = f"{CLEAN_DIR}/cleaned_{file.filename}"
-        cleaned_df.to_csv(cleaned_path, index=False)
+        cleaned_path = write_csv(cleaned_df, f"{CLEAN_DIR}/cleaned_{file.filename}")
         
         # Generate session ID for review workflow
         import uuid
@@ -228,12 +234,11 @@ async def upload_for_review(file: UploadFile = File(...), token: str = Depends(o
         if not file.filename.endswith('.csv'):
             raise HTTPException(status_code=400, detail="Only CSV files are allowed")
         
-        file_path = f"{UPLOAD_DIR}/{file.filename}"
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        stored = await stream_upload(file, f"{UPLOAD_DIR}/{file.filename}")
+        file_path = stored.path
 
         # Process without auto-applying changes
-        cleaned_df, report = run_pipeline(file_path, auto_apply=False)
+        cleaned_df, report = run_pipeline(file_path, auto_apply=False, csv_options=stored.read_options)
         
         if cleaned_df is None:
             error_msg = report.get("error", "Could not process file")
@@ -246,6 +251,7 @@ async def upload_for_review(file: UploadFile = File(...), token: str = Depends(o
         pending_reviews[session_id] = {
             "original_file": file_path,
             "changes": report.get("changes", []),
+            "issue_index": IssueIndex.from_changes(report.get("changes", [])),
             "original_data": report.get("original_data", []),
             "cleaned_data": report.get("cleaned_data", []),
             "columns": report.get("columns", []),
@@ -287,6 +293,7 @@ async def get_review_data(
                 report = run.report_data
                 review = {
                     "changes": report.get("changes", []),
+                    "cleaned_file_path": run.cleaned_file_path,
                     "original_data": report.get("original_data", []),
                     "cleaned_data": report.get("cleaned_data", []),
                     "columns": report.get("columns", []),
@@ -304,25 +311,12 @@ async def get_review_data(
             filter_dict = json.loads(filters)
             if any(filter_dict.values()):
                 changes = review["changes"]
-                original_data = review["original_data"]
                 
-                filtered_changes = []
-                relevant_indices = set()
-                
-                for c in changes:
-                    ft = c.get("fix_type")
-                    is_relevant = False
-                    
-                    if filter_dict.get("duplicate") and ft == "duplicate": is_relevant = True
-                    elif filter_dict.get("email") and ft == "email": is_relevant = True
-                    elif filter_dict.get("phone") and ft == "phone": is_relevant = True
-                    elif filter_dict.get("unify") and ft == "company": is_relevant = True
-                    elif filter_dict.get("job_normalization") and ft == "job_title": is_relevant = True
-                    elif filter_dict.get("fake_domain") and ft == "domain": is_relevant = True
-                    
-                    if is_relevant:
-                        filtered_changes.append(c)
-                        relevant_indices.add(c["row_index"])
+                # Union/intersection of the indexed change positions, then a direct fetch
+                index = review.get("issue_index") or issue_index_for(review.get("cleaned_file_path"), lambda: changes)
+                if len(index.get("change_rows")) != len(changes):
+                    index = IssueIndex.from_changes(changes)
+                filtered_changes = [changes[i] for i in index.change_positions(filter_dict)]
                 
                 # Update review object
                 review["changes"] = filtered_changes
@@ -397,7 +391,7 @@ async def apply_review_changes(
         if not os.path.exists(original_file):
              raise HTTPException(status_code=404, detail="Original file invalid or missing")
              
-        df = pd.read_csv(original_file)
+        df = read_run_frame(original_file)
         
         # Build a map of changes by ID
         changes_map = {c["id"]: c for c in stored_changes}
@@ -441,18 +435,24 @@ async def apply_review_changes(
             
             change_log.append(log_entry)
         
-        # Save cleaned file
-        df.to_csv(cleaned_path, index=False)
+        # Save cleaned file (a legacy uncompressed file is replaced by its compressed version)
+        previous_path = cleaned_path
+        cleaned_path = write_csv(df, cleaned_path)
+        if cleaned_path != previous_path and os.path.exists(previous_path):
+            os.remove(previous_path)
+        write_artifact(df, cleaned_path)
+        if review_source == 'db':
+            run_obj.cleaned_file_path = cleaned_path
+            refresh_missing(cleaned_path, "cleaned", df)
         
         # Save change log
-        log_path = f"{CHANGELOG_DIR}/changelog_{session_id}.json"
-        with open(log_path, "w") as f:
-            json.dump(change_log, f, indent=2)
+        log_path = write_json(change_log, f"{CHANGELOG_DIR}/changelog_{session_id}.json")
         
         # Finalization based on source
         if review_source == 'memory':
             del pending_reviews[session_id]
         elif review_source == 'db' and run_obj:
+            rollup_before = run_contribution(run_obj)
             run_obj.status = "completed"
             run_obj.completed_at = datetime.utcnow()
             run_obj.changelog_path = log_path
@@ -462,6 +462,8 @@ async def apply_review_changes(
             
             run_obj.total_fixes = accepted_count + manual_count
             run_obj.manual_overrides = manual_count
+            record_run_metrics(db, run_obj)
+            update_run(db, run_obj, rollup_before)
             
             db.commit()
         
@@ -482,13 +484,12 @@ async def apply_review_changes(
 @app.get("/changelog/{session_id}")
 async def get_changelog(session_id: str, token: str = Depends(oauth2_scheme)):
     """Get change log for a completed review"""
-    log_path = f"{CHANGELOG_DIR}/changelog_{session_id}.json"
+    log_path = find_artifact(f"{CHANGELOG_DIR}/changelog_{session_id}.json")
     
-    if not os.path.exists(log_path):
+    if log_path is None:
         raise HTTPException(status_code=404, detail="Change log not found")
     
-    with open(log_path, "r") as f:
-        change_log = json.load(f)
+    change_log = read_json(log_path)
     
     return sanitize_for_json({"session_id": session_id, "changelog": change_log})
 
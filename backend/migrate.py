@@ -0,0 +1,115 @@
+"""
+Versioned schema migrations.
+
+Each file in migrations/ named NNNN_description.py defines `upgrade(conn)`
+and is applied once, in version order; applied versions are recorded in the
+schema_migrations table. Migrations that cannot run inside a transaction
+(e.g. CREATE INDEX CONCURRENTLY) set `TRANSACTIONAL = False`.
+
+Usage:
+    python migrate.py            # apply pending migrations
+    python migrate.py --status   # list applied / pending versions
+"""
+import importlib.util
+import os
+import re
+import sys
+from datetime import datetime
+
+from sqlalchemy import text
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+# Arbitrary constant: serializes migrations when several workers start at once
+ADVISORY_LOCK_ID = 7240133
+
+
+def discover():
+    """Return [(version, name, module)] for every migration file, in order."""
+    found = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version, name = int(match.group(1)), match.group(2)
+        spec = importlib.util.spec_from_file_location(
+            f"migrations.m{match.group(1)}", os.path.join(MIGRATIONS_DIR, filename)
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        found.append((version, name, module))
+    return found
+
+
+def _ensure_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP NOT NULL
+        )
+    """))
+
+
+def applied_versions(conn):
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def run_migrations(engine):
+    """Apply every pending migration. Returns the list of versions applied."""
+    applied_now = []
+    # The lock connection stays in autocommit; each migration gets its own
+    # connection so transactional ones are atomic together with their record.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+        try:
+            _ensure_table(lock_conn)
+            done = applied_versions(lock_conn)
+
+            for version, name, module in discover():
+                if version in done:
+                    continue
+                print(f"Applying migration {version:04d}_{name}...")
+                record = text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)")
+                params = {"v": version, "n": name, "t": datetime.utcnow()}
+
+                if getattr(module, "TRANSACTIONAL", True):
+                    with engine.begin() as conn:
+                        module.upgrade(conn)
+                        conn.execute(record, params)
+                else:
+                    # Statements must be idempotent: a crash can leave it half applied
+                    module.upgrade(lock_conn)
+                    lock_conn.execute(record, params)
+                applied_now.append(version)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+
+    if applied_now:
+        print(f"Applied {len(applied_now)} migration(s).")
+    return applied_now
+
+
+def print_status(engine):
+    with engine.begin() as conn:
+        _ensure_table(conn)
+        done = applied_versions(conn)
+    for version, name, _ in discover():
+        state = "applied" if version in done else "pending"
+        print(f"{version:04d}_{name}: {state}")
+
+
+if __name__ == "__main__":
+    sys.path.append(os.getcwd())
+    from database import engine
+
+    try:
+        if "--status" in sys.argv:
+            print_status(engine)
+        else:
+            run_migrations(engine)
+            print("Success!")
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,10 @@
+"""
+Run columns added after the first release (formerly fix_db_schema_runs.py).
+"""
+from sqlalchemy import text
+
+
+def upgrade(conn):
+    conn.execute(text("ALTER TABLE runs ADD COLUMN IF NOT EXISTS run_by VARCHAR(255)"))
+    conn.execute(text("ALTER TABLE runs ADD COLUMN IF NOT EXISTS verification_stats JSON DEFAULT '{}'"))
+    conn.execute(text("ALTER TABLE runs ADD COLUMN IF NOT EXISTS issue_breakdown JSON DEFAULT '{}'"))
@@ -0,0 +1,35 @@
+"""
+Composite indexes for the filters and sort orders the routes use on every
+request. Names match the Index() declarations in models.py, so databases
+created by create_all and migrated ones end up identical.
+
+Built CONCURRENTLY so existing tables stay writable while indexing.
+"""
+from sqlalchemy import text
+
+TRANSACTIONAL = False
+
+INDEXES = [
+    # list_projects: owner's active projects, newest first
+    ("ix_projects_owner_active_updated", "projects", "owner_id, is_active, updated_at"),
+    # list_runs, timeline, next run_number, latest completed run
+    ("ix_runs_project_created", "runs", "project_id, created_at"),
+    ("ix_runs_project_run_number", "runs", "project_id, run_number"),
+    ("ix_runs_project_status_created", "runs", "project_id, status, created_at"),
+    # paginated record views and review lookups per file
+    ("ix_raw_records_file_row", "raw_records", "file_id, row_index"),
+    ("ix_cleaned_records_file_row", "cleaned_records", "file_id, row_index"),
+    ("ix_review_suggestions_file_row_issue", "review_suggestions", "file_id, row_index, issue_type"),
+]
+
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        # A failed concurrent build leaves an INVALID index behind; drop it first
+        invalid = conn.execute(text("""
+            SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+            WHERE c.relname = :name AND NOT i.indisvalid
+        """), {"name": name}).first()
+        if invalid:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"))
@@ -0,0 +1,10 @@
+"""
+Ingestion progress and throughput on uploaded_files (bulk COPY ingestion).
+"""
+from sqlalchemy import text
+
+
+def upgrade(conn):
+    conn.execute(text("ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS ingested_rows INTEGER"))
+    conn.execute(text("ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS ingest_rows_per_sec FLOAT"))
+    conn.execute(text("ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS ingest_error TEXT"))
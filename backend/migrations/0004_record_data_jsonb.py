@@ -0,0 +1,18 @@
+"""
+Store raw and cleaned record payloads as JSONB with GIN indexes, so the
+review filters (missing fields, duplicates, value search) run in Postgres.
+"""
+from sqlalchemy import text
+
+TABLES = ("raw_records", "cleaned_records")
+
+
+def upgrade(conn):
+    for table in TABLES:
+        data_type = conn.execute(text("""
+            SELECT data_type FROM information_schema.columns
+            WHERE table_name = :table AND column_name = 'data'
+        """), {"table": table}).scalar()
+        if data_type == "json":
+            conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN data TYPE JSONB USING data::jsonb"))
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_data_gin ON {table} USING gin (data)"))
@@ -0,0 +1,15 @@
+"""
+Content-addressed result reuse on runs: upload hash, effective pipeline
+config hash and engine version, plus the lookup index over them.
+"""
+from sqlalchemy import text
+
+
+def upgrade(conn):
+    conn.execute(text("ALTER TABLE runs ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"))
+    conn.execute(text("ALTER TABLE runs ADD COLUMN IF NOT EXISTS config_hash VARCHAR(64)"))
+    conn.execute(text("ALTER TABLE runs ADD COLUMN IF NOT EXISTS engine_version VARCHAR(32)"))
+    conn.execute(text("ALTER TABLE runs ADD COLUMN IF NOT EXISTS reused_from_run_id INTEGER"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_runs_content_reuse ON runs (content_hash, config_hash, engine_version)"
+    ))
@@ -0,0 +1,11 @@
+"""
+Content hash and sniffed CSV format (delimiter, encoding) on uploaded_files,
+recorded by the streaming upload layer.
+"""
+from sqlalchemy import text
+
+
+def upgrade(conn):
+    conn.execute(text("ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"))
+    conn.execute(text("ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS csv_delimiter VARCHAR(1)"))
+    conn.execute(text("ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS csv_encoding VARCHAR(20)"))
@@ -0,0 +1,16 @@
+"""
+Backfill run_metrics (created by create_all) from the completed runs that
+predate it; new runs write their row when they complete.
+"""
+from sqlalchemy import text
+
+
+def upgrade(conn):
+    conn.execute(text("""
+        INSERT INTO run_metrics (run_id, project_id, run_number, created_at, quality_score, issues_found, fixes_applied)
+        SELECT id, project_id, run_number, COALESCE(created_at, NOW()),
+               COALESCE(quality_score_after, 0), COALESCE(total_issues, 0), COALESCE(total_fixes, 0)
+        FROM runs
+        WHERE status = 'completed'
+        ON CONFLICT (run_id) DO NOTHING
+    """))
@@ -0,0 +1,41 @@
+"""
+Backfill user_daily_rollups (created by create_all) from existing runs;
+new runs update their day's row when they are created, completed or
+deleted.
+"""
+from sqlalchemy import text
+
+
+def _issue(key):
+    return f"COALESCE((r.issue_breakdown->>'{key}')::int, 0)"
+
+
+ISSUE_TYPES = (
+    "invalid_emails", "invalid_phones", "missing_fields", "duplicates",
+    "company_fixes", "domain_fixes", "job_title_fixes"
+)
+
+
+def upgrade(conn):
+    conn.execute(text(f"""
+        INSERT INTO user_daily_rollups (
+            user_id, project_id, day, runs, completed_runs, quality_score_sum,
+            issues_found, fixes_applied, {", ".join(ISSUE_TYPES)},
+            pending_reviews, pending_review_items, updated_at
+        )
+        SELECT
+            p.owner_id, r.project_id, CAST(COALESCE(r.created_at, NOW()) AS DATE),
+            COUNT(*),
+            COUNT(*) FILTER (WHERE r.status = 'completed'),
+            COALESCE(SUM(r.quality_score_after) FILTER (WHERE r.status = 'completed'), 0),
+            COALESCE(SUM(r.total_issues), 0),
+            COALESCE(SUM(r.total_fixes) FILTER (WHERE r.status = 'completed'), 0),
+            {", ".join(f"SUM({_issue(key)})" for key in ISSUE_TYPES)},
+            COUNT(*) FILTER (WHERE r.status = 'pending_review'),
+            COALESCE(SUM(r.needs_review_count) FILTER (WHERE r.status = 'pending_review'), 0),
+            NOW()
+        FROM runs r
+        JOIN projects p ON p.id = r.project_id
+        GROUP BY p.owner_id, r.project_id, CAST(COALESCE(r.created_at, NOW()) AS DATE)
+        ON CONFLICT (user_id, project_id, day) DO NOTHING
+    """))
@@ -0,0 +1,47 @@
+"""
+Value search over record payloads. record_values_text(data) joins a row's
+values (never its keys) into one string for the `search` review filter;
+with pg_trgm installed, a trigram GIN index on it serves the ILIKE.
+
+Built CONCURRENTLY so existing tables stay writable while indexing.
+"""
+from sqlalchemy import text
+
+TRANSACTIONAL = False
+
+TABLES = ("raw_records", "cleaned_records")
+
+# Values are separated by a unit separator so a match cannot span two cells
+VALUES_FUNCTION = text("""
+    CREATE OR REPLACE FUNCTION record_values_text(data jsonb) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$ SELECT string_agg(value, E'\\x1f') FROM jsonb_each_text(data) $$
+""")
+
+
+def upgrade(conn):
+    conn.execute(VALUES_FUNCTION)
+
+    available = conn.execute(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first()
+    if not available:
+        print("pg_trgm is not available: record search will scan the file's rows")
+        return
+    try:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except Exception as e:
+        print(f"Could not create pg_trgm ({e}): record search will scan the file's rows")
+        return
+
+    for table in TABLES:
+        name = f"ix_{table}_values_trgm"
+        # A failed concurrent build leaves an INVALID index behind; drop it first
+        invalid = conn.execute(text("""
+            SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+            WHERE c.relname = :name AND NOT i.indisvalid
+        """), {"name": name}).first()
+        if invalid:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        conn.execute(text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+            f"ON {table} USING gin (record_values_text(data) gin_trgm_ops)"
+        ))
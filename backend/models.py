@@ -1,11 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, JSON, Boolean, Enum
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, ForeignKey, JSON, Boolean, Enum, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
 import enum
 
+# Row payloads: JSONB on Postgres (indexable, filterable in SQL), JSON elsewhere
+RecordData = JSON().with_variant(JSONB(), "postgresql")
+
 class ProcessingStatus(str, enum.Enum):
     PENDING = "pending"
+    INGESTING = "ingesting"
     PROCESSING = "processing"
     ANALYZED = "analyzed"
     REVIEWING = "reviewing"
@@ -34,6 +39,9 @@ class Project(Base):
     Each project can have multiple files, runs, and its own configuration.
     """
     __tablename__ = "projects"
+    __table_args__ = (
+        Index("ix_projects_owner_active_updated", "owner_id", "is_active", "updated_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -81,9 +89,19 @@ class UploadedFile(Base):
     file_size = Column(Integer)
     row_count = Column(Integer)
     
+    # Collected while the upload streamed to disk
+    content_hash = Column(String(64), nullable=True)  # sha256
+    csv_delimiter = Column(String(1), nullable=True)
+    csv_encoding = Column(String(20), nullable=True)
+    
     upload_timestamp = Column(DateTime, default=datetime.utcnow)
     status = Column(String, default=ProcessingStatus.PENDING) # persisted as string
     
+    # Raw-record ingestion (runs in the background after upload)
+    ingested_rows = Column(Integer, nullable=True)
+    ingest_rows_per_sec = Column(Float, nullable=True)
+    ingest_error = Column(Text, nullable=True)
+    
     # Relationships
     project = relationship("Project", back_populates="files")
     user = relationship("User", back_populates="uploaded_files")
@@ -96,11 +114,15 @@ class RawRecord(Base):
     Stores raw data from the uploaded CSV for visibility and comparison.
     """
     __tablename__ = "raw_records"
+    __table_args__ = (
+        Index("ix_raw_records_file_row", "file_id", "row_index"),
+        Index("ix_raw_records_data_gin", "data", postgresql_using="gin"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     file_id = Column(Integer, ForeignKey("uploaded_files.id"), nullable=False)
     row_index = Column(Integer, nullable=False)
-    data = Column(JSON, nullable=False) # Store the entire row as JSON
+    data = Column(RecordData, nullable=False) # Store the entire row as JSON(B)
 
     file = relationship("UploadedFile", back_populates="raw_records")
 
@@ -109,6 +131,9 @@ class ReviewSuggestion(Base):
     Stores AI-suggested fixes for Review Mode.
     """
     __tablename__ = "review_suggestions"
+    __table_args__ = (
+        Index("ix_review_suggestions_file_row_issue", "file_id", "row_index", "issue_type"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     file_id = Column(Integer, ForeignKey("uploaded_files.id"), nullable=False)
@@ -129,11 +154,15 @@ class CleanedRecord(Base):
     Stores the final cleaned data after review/approval.
     """
     __tablename__ = "cleaned_records"
+    __table_args__ = (
+        Index("ix_cleaned_records_file_row", "file_id", "row_index"),
+        Index("ix_cleaned_records_data_gin", "data", postgresql_using="gin"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     file_id = Column(Integer, ForeignKey("uploaded_files.id"), nullable=False)
     row_index = Column(Integer, nullable=False)
-    data = Column(JSON, nullable=False) # Final cleaned row data
+    data = Column(RecordData, nullable=False) # Final cleaned row data
 
     file = relationship("UploadedFile", back_populates="cleaned_records")
 
@@ -143,6 +172,12 @@ class Run(Base):
     Stores complete history of what was cleaned, when, and how.
     """
     __tablename__ = "runs"
+    __table_args__ = (
+        Index("ix_runs_project_created", "project_id", "created_at"),
+        Index("ix_runs_project_run_number", "project_id", "run_number"),
+        Index("ix_runs_project_status_created", "project_id", "status", "created_at"),
+        Index("ix_runs_content_reuse", "content_hash", "config_hash", "engine_version"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     run_number = Column(Integer, nullable=False)  # Sequential run number within project
@@ -158,6 +193,13 @@ class Run(Base):
     column_count = Column(Integer)
     columns = Column(JSON)  # List of column names
     
+    # Result reuse: identical content + effective config + engine version
+    # produce identical results
+    content_hash = Column(String(64), nullable=True)  # sha256 of the uploaded bytes
+    config_hash = Column(String(64), nullable=True)
+    engine_version = Column(String(32), nullable=True)
+    reused_from_run_id = Column(Integer, nullable=True)
+    
     # Quality metrics
     quality_score_before = Column(Float, default=0.0)
     quality_score_after = Column(Float, default=0.0)
@@ -239,3 +281,96 @@ class OTPLog(Base):
     
     user = relationship("User", back_populates="otp_logs")
 
+
+class ChatSession(Base):
+    """
+    Chatbot conversation state, used when the session store is backed by a
+    database so that every uvicorn worker sees the same sessions.
+    """
+    __tablename__ = "chat_sessions"
+
+    session_id = Column(String(64), primary_key=True)
+    data = Column(JSON, nullable=False)  # history and page_context
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_active = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class DuplicateScan(Base):
+    """
+    Marks that duplicate groups of a file were materialized for one column
+    set, so the (possibly empty) result in duplicate_rows can be reused.
+    Dropped together with the rows whenever the file's records change.
+    """
+    __tablename__ = "duplicate_scans"
+
+    file_id = Column(Integer, ForeignKey("uploaded_files.id"), primary_key=True)
+    columns_key = Column(String(64), primary_key=True)  # hash of source + sorted columns
+    source = Column(String(20), nullable=False)  # "raw" or "cleaned"
+    columns = Column(JSON, nullable=False)
+    group_count = Column(Integer, default=0)
+    row_count = Column(Integer, default=0)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DuplicateRow(Base):
+    """Rows belonging to a duplicate group of a DuplicateScan."""
+    __tablename__ = "duplicate_rows"
+
+    file_id = Column(Integer, primary_key=True)
+    columns_key = Column(String(64), primary_key=True)
+    row_index = Column(Integer, primary_key=True)
+
+
+class RunMetric(Base):
+    """
+    Compact time-series row per completed run, written when the run
+    completes; project timelines are served from here instead of runs.
+    """
+    __tablename__ = "run_metrics"
+    __table_args__ = (
+        Index("ix_run_metrics_project_run_number", "project_id", "run_number"),
+    )
+
+    run_id = Column(Integer, ForeignKey("runs.id", ondelete="CASCADE"), primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    run_number = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    quality_score = Column(Float, default=0.0)
+    issues_found = Column(Integer, default=0)
+    fixes_applied = Column(Integer, default=0)
+
+
+class UserDailyRollup(Base):
+    """
+    Per-user, per-project, per-day aggregates of runs for the dashboard,
+    maintained incrementally: each run adds its contribution to the row of
+    its creation day when it is created, adjusts it when it completes and
+    subtracts it when it is deleted. Review backlog columns hold net
+    changes, so the current backlog is their sum over all days.
+    """
+    __tablename__ = "user_daily_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    runs = Column(Integer, default=0, nullable=False)
+    completed_runs = Column(Integer, default=0, nullable=False)
+    quality_score_sum = Column(Float, default=0.0, nullable=False)  # over completed runs
+    issues_found = Column(Integer, default=0, nullable=False)
+    fixes_applied = Column(Integer, default=0, nullable=False)
+
+    # Issues by type (the keys of Run.issue_breakdown)
+    invalid_emails = Column(Integer, default=0, nullable=False)
+    invalid_phones = Column(Integer, default=0, nullable=False)
+    missing_fields = Column(Integer, default=0, nullable=False)
+    duplicates = Column(Integer, default=0, nullable=False)
+    company_fixes = Column(Integer, default=0, nullable=False)
+    domain_fixes = Column(Integer, default=0, nullable=False)
+    job_title_fixes = Column(Integer, default=0, nullable=False)
+
+    # Review backlog: runs awaiting review and their changes needing review
+    pending_reviews = Column(Integer, default=0, nullable=False)
+    pending_review_items = Column(Integer, default=0, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow)
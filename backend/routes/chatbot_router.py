@@ -1,22 +1,35 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional, Dict, Any
-import requests
 import json
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime
 import re
+import time
+
+from services.chat_cache import response_cache
+from services.chat_providers import PROVIDER_ERRORS, close_http_client, provider_router
+from services.chat_sessions import create_session_store, new_session
+from dependencies import get_current_active_user
+import models
 
 router = APIRouter()
 
-LOCAL_URL = "http://localhost:9000/chat/completions"
-LOCAL_MODEL = "phi-3-mini"
 
-OLLAMA_URL = "http://localhost:11434/api/chat"
-OLLAMA_MODEL = "mistral:latest"
+@router.on_event("startup")
+async def start_provider_probing():
+    provider_router.start_probing()
+
+
+@router.on_event("shutdown")
+async def stop_provider_probing():
+    await provider_router.stop_probing()
+    await close_http_client()
 
-# Enhanced session storage with expiration
-conversation_sessions = {}
+# Bounded, expiring session store (in-process LRU+TTL, or shared database)
+session_store = create_session_store()
 
 class ChatMessage(BaseModel):
     role: str
@@ -40,20 +53,6 @@ class SessionInfo(BaseModel):
     last_active: datetime
     message_count: int
 
-# Clean up old sessions (older than 24 hours)
-def cleanup_old_sessions():
-    current_time = datetime.now()
-    expired_sessions = []
-    
-    for session_id, session_data in list(conversation_sessions.items()):
-        if isinstance(session_data, dict) and 'timestamp' in session_data:
-            session_time = datetime.fromisoformat(session_data['timestamp'])
-            if current_time - session_time > timedelta(hours=24):
-                expired_sessions.append(session_id)
-    
-    for session_id in expired_sessions:
-        del conversation_sessions[session_id]
-
 # Comprehensive system prompt covering all features
 SYSTEM_PROMPT = """You are DataGuardian AI Assistant, the intelligent chatbot for the VETRI-DQX Data Quality Platform. 
 You are an expert in data quality management, data cleaning, validation, and analysis.
@@ -138,200 +137,7 @@ You are integrated into ALL pages of the application:
 
 Remember: You are the user's guide to the entire DataGuardian AI platform. Help them navigate features, understand results, and make data-driven decisions."""
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat_with_bot(request: ChatRequest, background_tasks: BackgroundTasks):
-    """
-    Enhanced chat endpoint that provides comprehensive assistance for all platform features.
-    """
-    try:
-        # Generate session ID if not provided
-        session_id = request.session_id or str(uuid.uuid4())
-        
-        # Clean up old sessions periodically
-        background_tasks.add_task(cleanup_old_sessions)
-        
-        # Initialize or get conversation history
-        if session_id not in conversation_sessions:
-            conversation_sessions[session_id] = {
-                'history': [],
-                'timestamp': datetime.now().isoformat(),
-                'page_context': request.page_context
-            }
-        
-        session_data = conversation_sessions[session_id]
-        conversation_history = session_data['history']
-        
-        # Update page context if provided
-        if request.page_context:
-            session_data['page_context'] = request.page_context
-        session_data['timestamp'] = datetime.now().isoformat()
-        
-        # Build enhanced system prompt with page-specific context
-        enhanced_system_prompt = SYSTEM_PROMPT
-        
-        # Add page-specific context if available
-        if session_data.get('page_context'):
-            page_context = session_data['page_context']
-            enhanced_system_prompt += f"\n\n## CURRENT PAGE CONTEXT\nUser is currently on: **{page_context}**\n- Tailor your response to be most relevant to this page if appropriate"
-        
-        # Add data context to system prompt if available
-        if request.context:
-            context_info = "\n\n## DATA ANALYSIS CONTEXT (From Current Session)\n"
-            
-            # General stats
-            if "total_rows" in request.context:
-                context_info += f"- **Total Rows Analyzed**: {request.context['total_rows']}\n"
-            
-            # Summary statistics
-            if "summary_stats" in request.context:
-                stats = request.context["summary_stats"]
-                context_info += "\n### Validation Results:\n"
-                
-                if "email_validation" in stats:
-                    email_stats = stats['email_validation']
-                    context_info += f"- **Email Validation**: {email_stats.get('valid', 0)} valid, {email_stats.get('invalid', 0)} invalid, {email_stats.get('missing', 0)} missing\n"
-                
-                if "phone_validation" in stats:
-                    phone_stats = stats['phone_validation']
-                    context_info += f"- **Phone Validation**: {phone_stats.get('valid', 0)} valid, {phone_stats.get('invalid', 0)} invalid, {phone_stats.get('missing', 0)} missing\n"
-                
-                if "duplicates" in stats:
-                    dup_stats = stats['duplicates']
-                    context_info += f"- **Duplicates Found**: {dup_stats.get('count', 0)} duplicate sets affecting {dup_stats.get('affected_rows', 0)} rows\n"
-                
-                if "consistency_check" in stats:
-                    consistency = stats['consistency_check']
-                    context_info += f"- **Job Title Inconsistencies**: {consistency.get('inconsistent', 0)} inconsistent titles found\n"
-            
-            # Job analysis
-            if "job_analysis" in request.context:
-                job_data = request.context["job_analysis"]
-                context_info += f"\n### Job Analysis:\n- **Categories Identified**: {len(job_data)}\n"
-                
-                if job_data:
-                    top_functions = sorted(job_data, key=lambda x: x.get('count', 0), reverse=True)[:5]
-                    context_info += "- **Top Categories**:\n"
-                    for func in top_functions:
-                        context_info += f"  • {func.get('job_function', 'Unknown')}: {func.get('count', 0)} titles\n"
-            
-            # Data quality scores
-            if "quality_scores" in request.context:
-                scores = request.context["quality_scores"]
-                context_info += "\n### Data Quality Scores:\n"
-                for metric, score in scores.items():
-                    if isinstance(score, (int, float)):
-                        context_info += f"- **{metric.replace('_', ' ').title()}**: {score:.1%}\n"
-            
-            # Specific Deviations/Invalid Data Samples
-            if "deviations" in request.context:
-                deviations = request.context["deviations"]
-                context_info += f"\n### SAMPLE DEVIATIONS (First {len(deviations)} items):\n"
-                for i, dev in enumerate(deviations, 1):
-                    row = dev.get('row_index', i)
-                    col = dev.get('column', 'Unknown')
-                    orig = dev.get('original_value', 'NULL')
-                    clean = dev.get('cleaned_value', 'NULL')
-                    reason = dev.get('fix_type', 'Validation Error')
-                    context_info += f"{i}. **Row {row} - Column {col}**: '{orig}' → '{clean}' (Logic: {reason})\n"
-
-            enhanced_system_prompt += context_info
-        
-        # Build messages for API
-        messages = [
-            {"role": "system", "content": enhanced_system_prompt}
-        ]
-        
-        # Add conversation history (keep last 15 messages for context)
-        messages.extend(conversation_history[-15:])
-        
-        # Add current user message
-        messages.append({"role": "user", "content": request.message})
-        
-        # Try local AirLLM first, then Ollama, finally Groq
-        try:
-            local_headers = {
-                "Content-Type": "application/json"
-            }
-            
-            local_payload = {
-                "model": LOCAL_MODEL,
-                "messages": messages,
-                "temperature": 0.7,
-                "max_tokens": 1500,
-                "stream": False
-            }
-            
-            response = requests.post(LOCAL_URL, headers=local_headers, json=local_payload, timeout=300)
-            response.raise_for_status()
-            
-            result = response.json()
-            assistant_message = result['choices'][0]['message']['content']
-            
-        except (requests.exceptions.RequestException, requests.exceptions.Timeout):
-            # Try Ollama
-            try:
-                ollama_payload = {
-                    "model": OLLAMA_MODEL,
-                    "messages": messages,
-                    "stream": False
-                }
-                
-                response = requests.post(OLLAMA_URL, json=ollama_payload, timeout=30)
-                response.raise_for_status()
-                
-                result = response.json()
-                assistant_message = result['message']['content']
-                
-            except (requests.exceptions.RequestException, requests.exceptions.Timeout):
-                # Fallback to Groq API
-                headers = {
-                    "Authorization": f"Bearer {GROQ_API_KEY}",
-                    "Content-Type": "application/json"
-                }
-                
-                payload = {
-                    "model": GROQ_MODEL,
-                    "messages": messages,
-                    "temperature": 0.7,
-                    "max_tokens": 1500,
-                    "stream": False
-                }
-                
-                response = requests.post(GROQ_URL, headers=headers, json=payload, timeout=30)
-                response.raise_for_status()
-                
-                result = response.json()
-                assistant_message = result['choices'][0]['message']['content']
-        
-        # Extract follow-up questions and suggestions
-        follow_up_questions = extract_follow_up_questions(assistant_message)
-        suggestions = extract_suggestions(assistant_message)
-        
-        # Clean the response for display
-        clean_response = clean_response_text(assistant_message)
-        
-        # Update conversation history
-        conversation_history.append({"role": "user", "content": request.message})
-        conversation_history.append({"role": "assistant", "content": clean_response})
-        
-        # Keep only last 25 messages to prevent memory issues
-        if len(conversation_history) > 25:
-            conversation_history = conversation_history[-25:]
-        
-        session_data['history'] = conversation_history
-        conversation_sessions[session_id] = session_data
-        
-        return ChatResponse(
-            response=clean_response,
-            session_id=session_id,
-            suggestions=suggestions[:3] if suggestions else None,
-            follow_up_questions=follow_up_questions[:3] if follow_up_questions else None
-        )
-        
-    except requests.exceptions.RequestException as e:
-        print(f"Groq API Error: {e}")
-        # Enhanced fallback response
-        fallback_response = """I'm currently experiencing connection issues with my AI service. 
+FALLBACK_RESPONSE = """I'm currently experiencing connection issues with my AI service. 
 
 Here are some immediate steps you can take:
 1. **Check your internet connection**
@@ -348,9 +154,174 @@ For immediate assistance, please:
 - Try the platform's automated workflows
 
 I'll be back online shortly!"""
+
+
+def _prepare_chat(request: ChatRequest):
+    """
+    Resolve the session and build the message list for a chat request.
+    Returns (session_id, session_data, messages).
+    """
+    # Generate session ID if not provided
+    session_id = request.session_id or str(uuid.uuid4())
+
+    # Initialize or get conversation history
+    session_data = session_store.get(session_id) or new_session(session_id, request.page_context)
+    conversation_history = session_data['history']
+
+    # Update page context if provided
+    if request.page_context:
+        session_data['page_context'] = request.page_context
+
+    # Build enhanced system prompt with page-specific context
+    enhanced_system_prompt = SYSTEM_PROMPT
+    
+    # Add page-specific context if available
+    if session_data.get('page_context'):
+        page_context = session_data['page_context']
+        enhanced_system_prompt += f"\n\n## CURRENT PAGE CONTEXT\nUser is currently on: **{page_context}**\n- Tailor your response to be most relevant to this page if appropriate"
+    
+    # Add data context to system prompt if available
+    if request.context:
+        context_info = "\n\n## DATA ANALYSIS CONTEXT (From Current Session)\n"
+        
+        # General stats
+        if "total_rows" in request.context:
+            context_info += f"- **Total Rows Analyzed**: {request.context['total_rows']}\n"
+        
+        # Summary statistics
+        if "summary_stats" in request.context:
+            stats = request.context["summary_stats"]
+            context_info += "\n### Validation Results:\n"
+            
+            if "email_validation" in stats:
+                email_stats = stats['email_validation']
+                context_info += f"- **Email Validation**: {email_stats.get('valid', 0)} valid, {email_stats.get('invalid', 0)} invalid, {email_stats.get('missing', 0)} missing\n"
+            
+            if "phone_validation" in stats:
+                phone_stats = stats['phone_validation']
+                context_info += f"- **Phone Validation**: {phone_stats.get('valid', 0)} valid, {phone_stats.get('invalid', 0)} invalid, {phone_stats.get('missing', 0)} missing\n"
+            
+            if "duplicates" in stats:
+                dup_stats = stats['duplicates']
+                context_info += f"- **Duplicates Found**: {dup_stats.get('count', 0)} duplicate sets affecting {dup_stats.get('affected_rows', 0)} rows\n"
+            
+            if "consistency_check" in stats:
+                consistency = stats['consistency_check']
+                context_info += f"- **Job Title Inconsistencies**: {consistency.get('inconsistent', 0)} inconsistent titles found\n"
+        
+        # Job analysis
+        if "job_analysis" in request.context:
+            job_data = request.context["job_analysis"]
+            context_info += f"\n### Job Analysis:\n- **Categories Identified**: {len(job_data)}\n"
+            
+            if job_data:
+                top_functions = sorted(job_data, key=lambda x: x.get('count', 0), reverse=True)[:5]
+                context_info += "- **Top Categories**:\n"
+                for func in top_functions:
+                    context_info += f"  • {func.get('job_function', 'Unknown')}: {func.get('count', 0)} titles\n"
+        
+        # Data quality scores
+        if "quality_scores" in request.context:
+            scores = request.context["quality_scores"]
+            context_info += "\n### Data Quality Scores:\n"
+            for metric, score in scores.items():
+                if isinstance(score, (int, float)):
+                    context_info += f"- **{metric.replace('_', ' ').title()}**: {score:.1%}\n"
+        
+        # Specific Deviations/Invalid Data Samples
+        if "deviations" in request.context:
+            deviations = request.context["deviations"]
+            context_info += f"\n### SAMPLE DEVIATIONS (First {len(deviations)} items):\n"
+            for i, dev in enumerate(deviations, 1):
+                row = dev.get('row_index', i)
+                col = dev.get('column', 'Unknown')
+                orig = dev.get('original_value', 'NULL')
+                clean = dev.get('cleaned_value', 'NULL')
+                reason = dev.get('fix_type', 'Validation Error')
+                context_info += f"{i}. **Row {row} - Column {col}**: '{orig}' → '{clean}' (Logic: {reason})\n"
+
+        enhanced_system_prompt += context_info
+    
+    # Build messages for API
+    messages = [
+        {"role": "system", "content": enhanced_system_prompt}
+    ]
+    
+    # Add conversation history (keep last 15 messages for context)
+    messages.extend(conversation_history[-15:])
+    
+    # Add current user message
+    messages.append({"role": "user", "content": request.message})
+    
+    return session_id, session_data, messages
+
+
+def _cacheable(session_data: dict) -> bool:
+    # The cache key has no conversation history, so only opening questions
+    # are cached; a follow-up ("and for phones?") depends on earlier turns
+    return not session_data['history']
+
+
+def _finish_chat(session_id: str, session_data: dict, user_message: str, assistant_message: str) -> ChatResponse:
+    """Store the exchange in the session and build the response payload."""
+    # Extract follow-up questions and suggestions
+    follow_up_questions = extract_follow_up_questions(assistant_message)
+    suggestions = extract_suggestions(assistant_message)
+
+    # Clean the response for display
+    clean_response = clean_response_text(assistant_message)
+
+    # Update conversation history
+    conversation_history = session_data['history']
+    conversation_history.append({"role": "user", "content": user_message})
+    conversation_history.append({"role": "assistant", "content": clean_response})
+
+    # Keep only last 25 messages to prevent memory issues
+    if len(conversation_history) > 25:
+        conversation_history = conversation_history[-25:]
+
+    session_data['history'] = conversation_history
+    session_store.save(session_data)
+
+    return ChatResponse(
+        response=clean_response,
+        session_id=session_id,
+        suggestions=suggestions[:3] if suggestions else None,
+        follow_up_questions=follow_up_questions[:3] if follow_up_questions else None
+    )
+
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat_with_bot(request: ChatRequest):
+    """
+    Enhanced chat endpoint that provides comprehensive assistance for all platform features.
+    """
+    session_id = request.session_id
+    try:
+        # The session store may be a database; keep its calls off the event loop
+        session_id, session_data, messages = await run_in_threadpool(_prepare_chat, request)
+        page_context = session_data.get('page_context')
+        cacheable = _cacheable(session_data)
+
+        # Repeated questions on the same page and data are answered from cache
+        cached = response_cache.get(request.message, page_context, request.context) if cacheable else None
+        if cached is not None:
+            assistant_message = cached["assistant_message"]
+        else:
+            # Healthiest provider first (local AirLLM, Ollama or Groq)
+            started = time.perf_counter()
+            assistant_message = await provider_router.complete(messages)
+            if cacheable:
+                response_cache.set(request.message, page_context, request.context,
+                                   {"assistant_message": assistant_message}, time.perf_counter() - started)
+
+        return await run_in_threadpool(_finish_chat, session_id, session_data, request.message, assistant_message)
         
+    except PROVIDER_ERRORS as e:
+        print(f"Chat API Error: {e}")
+        # Enhanced fallback response
         return ChatResponse(
-            response=fallback_response,
+            response=FALLBACK_RESPONSE,
             session_id=session_id or "fallback_session"
         )
     except Exception as e:
@@ -359,48 +330,109 @@ I'll be back online shortly!"""
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_with_bot_stream(request: ChatRequest):
+    """
+    Streaming variant of /chat using server-sent events.
+
+    Emits `token` events ({"content": "..."}) as the model produces text, then
+    a single `done` event carrying the same fields as the /chat response.
+    If no provider is reachable, or the stream breaks off part-way, an `error`
+    event with the fallback text is sent instead of `done` and the exchange is
+    not added to the session history. A cached answer is sent as a single
+    `token` event.
+    """
+    session_id, session_data, messages = await run_in_threadpool(_prepare_chat, request)
+    page_context = session_data.get('page_context')
+    cacheable = _cacheable(session_data)
+
+    async def event_stream():
+        cached = response_cache.get(request.message, page_context, request.context) if cacheable else None
+        if cached is not None:
+            yield _sse("token", {"content": cached["assistant_message"]})
+            final = await run_in_threadpool(
+                _finish_chat, session_id, session_data, request.message, cached["assistant_message"]
+            )
+            yield _sse("done", final.model_dump())
+            return
+
+        parts = []
+        started = time.perf_counter()
+        try:
+            async for delta in provider_router.stream(messages):
+                parts.append(delta)
+                yield _sse("token", {"content": delta})
+        except PROVIDER_ERRORS as e:
+            print(f"Chat stream error: {e}")
+            # A cut-off answer is dropped rather than stored as a finished turn
+            yield _sse("error", {"session_id": session_id, "response": FALLBACK_RESPONSE})
+            return
+
+        if cacheable:
+            response_cache.set(request.message, page_context, request.context,
+                               {"assistant_message": "".join(parts)}, time.perf_counter() - started)
+
+        final = await run_in_threadpool(_finish_chat, session_id, session_data, request.message, "".join(parts))
+        yield _sse("done", final.model_dump())
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/chat/providers")
+async def get_provider_health():
+    """Health, breaker state and latency percentiles of each chat provider."""
+    return provider_router.snapshot()
+
+@router.get("/chat/cache/stats")
+async def get_response_cache_stats():
+    """Hit rate, size and latency saved by the chat response cache."""
+    return response_cache.stats()
+
+@router.delete("/chat/cache")
+async def clear_response_cache(current_user: models.User = Depends(get_current_active_user)):
+    """Drop all cached chat answers (e.g. after changing the system prompt)."""
+    response_cache.clear()
+    return {"message": "Response cache cleared"}
+
 @router.delete("/chat/session/{session_id}")
-async def clear_chat_session(session_id: str):
+def clear_chat_session(session_id: str):
     """Clear conversation history for a session."""
-    if session_id in conversation_sessions:
-        del conversation_sessions[session_id]
+    session_store.delete(session_id)
     return {"message": "Session cleared", "session_id": session_id}
 
 @router.get("/chat/sessions", response_model=List[SessionInfo])
-async def list_active_sessions():
-    """List all active chat sessions."""
-    sessions = []
-    current_time = datetime.now()
-    
-    for session_id, session_data in conversation_sessions.items():
-        if isinstance(session_data, dict) and 'timestamp' in session_data:
-            try:
-                session_time = datetime.fromisoformat(session_data['timestamp'])
-                # Only include sessions active in last 24 hours
-                if current_time - session_time <= timedelta(hours=24):
-                    sessions.append(SessionInfo(
-                        session_id=session_id,
-                        created_at=session_time,
-                        last_active=session_time,
-                        message_count=len(session_data.get('history', []))
-                    ))
-            except:
-                continue
-    
-    return sessions
+def list_active_sessions(limit: int = 100):
+    """List the most recently active chat sessions (expired ones are excluded)."""
+    return [
+        SessionInfo(
+            session_id=session["session_id"],
+            created_at=session["created_at"],
+            last_active=session["last_active"],
+            message_count=len(session.get("history", []))
+        )
+        for session in session_store.list_active(limit)
+    ]
 
 @router.get("/chat/context/{session_id}")
-async def get_session_context(session_id: str):
+def get_session_context(session_id: str):
     """Get the current context of a session."""
-    if session_id not in conversation_sessions:
+    session_data = session_store.get(session_id)
+    if session_data is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session_data = conversation_sessions[session_id]
     return {
         "session_id": session_id,
         "page_context": session_data.get('page_context'),
         "message_count": len(session_data.get('history', [])),
-        "last_active": session_data.get('timestamp')
+        "last_active": session_data["last_active"].isoformat()
     }
 
 def extract_follow_up_questions(response: str) -> List[str]:
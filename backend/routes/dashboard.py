@@ -0,0 +1,26 @@
+# routes/dashboard.py
+# Cross-project dashboard overview from incrementally maintained rollups
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+import schemas
+from dependencies import get_db
+from services.dashboard_rollups import user_dashboard
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+
+@router.get("/", response_model=schemas.DashboardResponse)
+def get_dashboard(
+    user_id: int = Query(..., description="User ID"),
+    days: int = Query(30, ge=1, le=366),
+    db: Session = Depends(get_db)
+):
+    """
+    Overview of all of a user's projects: runs per day, average quality,
+    issues by type and review backlog. Read from user_daily_rollups, which
+    runs update as they are created, completed and deleted, so the cost does
+    not grow with the number of projects or runs.
+    """
+    return user_dashboard(db, user_id, days)
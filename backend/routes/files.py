@@ -1,18 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import shutil
 import os
-import json
-import pandas as pd
 from datetime import datetime
 import uuid
 
 import models
 import schemas
 import auth
+from database import engine
 from dependencies import get_db, get_current_active_user
+from services.bulk_ingest import ingest_review_suggestions, run_raw_ingest
 from services.data_quality import run_pipeline
+from services.pagination import decode_cursor, encode_cursor, filters_fingerprint, keyset_page
+from services.query_cache import invalidate_file, query_cache
+from services.record_filters import parse_filters, record_filter_condition
+from services.review_actions import DECISION_STATUS, apply_review_decisions, build_cleaned_records
+from services.upload_stream import csv_read_options, stream_upload
 
 router = APIRouter(
     prefix="/files",
@@ -39,6 +43,7 @@ def sanitize_for_json(obj):
 
 @router.post("/upload", response_model=List[schemas.UploadedFileResponse])
 async def upload_files(
+    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
     project_id: Optional[int] = Query(None),
     current_user: models.User = Depends(get_current_active_user),
@@ -46,6 +51,8 @@ async def upload_files(
 ):
     """
     Upload multiple CSV files.
+    Raw records are ingested in the background; poll /files/{id}/ingest
+    until the status leaves "ingesting".
     """
     uploaded_files_records = []
 
@@ -56,49 +63,65 @@ async def upload_files(
         # Generate unique filename
         file_uuid = str(uuid.uuid4())
         safe_filename = f"{file_uuid}_{file.filename}"
-        file_path = os.path.join(UPLOAD_DIR, safe_filename)
+        # Hash, row count and CSV format are collected while streaming;
+        # the stored path carries the artifact compression suffix
+        stored = await stream_upload(file, os.path.join(UPLOAD_DIR, safe_filename))
+        file_path = stored.path
 
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Basic stats
-        df = pd.read_csv(file_path)
-        row_count = len(df)
-        file_size = os.path.getsize(file_path)
-
-        # Create DB record
+        # Create DB record; ingestion confirms row_count when it finishes
         db_file = models.UploadedFile(
             filename=file.filename,
             file_path=file_path,
-            file_size=file_size,
-            row_count=row_count,
+            file_size=stored.size,
+            row_count=stored.row_count,
+            content_hash=stored.sha256,
+            csv_delimiter=stored.delimiter,
+            csv_encoding=stored.encoding,
             user_id=current_user.id,
             project_id=project_id,
-            status=models.ProcessingStatus.PENDING
+            status=models.ProcessingStatus.INGESTING
         )
         db.add(db_file)
-        db.flush() # Get ID
-
-        # Store Raw Records (Batch insert for performance)
-        # Note: For very large files, this should be done in background task
-        raw_records = []
-        for idx, row in df.iterrows():
-            # Convert row to dict and sanitize
-            row_data = sanitize_for_json(row.to_dict())
-            raw_records.append(models.RawRecord(
-                file_id=db_file.id,
-                row_index=idx,
-                data=row_data
-            ))
-        
-        # Determine batch size - SQLALchemy bulk_save_objects is faster
-        db.bulk_save_objects(raw_records)
-        
         uploaded_files_records.append(db_file)
 
     db.commit()
+
+    # Stream rows into raw_records with COPY, without building ORM objects
+    for db_file in uploaded_files_records:
+        db.refresh(db_file)
+        background_tasks.add_task(
+            run_raw_ingest, engine, db_file.id, db_file.file_path,
+            csv_read_options(db_file.csv_delimiter, db_file.csv_encoding)
+        )
+
     return uploaded_files_records
 
+@router.get("/{file_id}/ingest")
+def get_ingest_status(
+    file_id: int,
+    current_user: models.User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Ingestion progress of an uploaded file, with throughput in rows/sec.
+    """
+    db_file = db.query(models.UploadedFile).filter(
+        models.UploadedFile.id == file_id,
+        models.UploadedFile.user_id == current_user.id
+    ).first()
+
+    if not db_file:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    return {
+        "file_id": db_file.id,
+        "status": db_file.status,
+        "row_count": db_file.row_count,
+        "ingested_rows": db_file.ingested_rows,
+        "rows_per_sec": db_file.ingest_rows_per_sec,
+        "error": db_file.ingest_error
+    }
+
 @router.post("/{file_id}/analyze")
 def analyze_file(
     file_id: int,
@@ -117,40 +140,32 @@ def analyze_file(
     if not db_file:
         raise HTTPException(status_code=404, detail="File not found")
 
+    if db_file.status == models.ProcessingStatus.INGESTING:
+        raise HTTPException(status_code=409, detail="File is still being ingested")
+
     # Update status
     db_file.status = models.ProcessingStatus.PROCESSING
     db.commit()
 
     try:
         # Run pipeline WITHOUT auto-apply to get suggestions
-        cleaned_df, report = run_pipeline(db_file.file_path, auto_apply=False)
+        cleaned_df, report = run_pipeline(
+            db_file.file_path, auto_apply=False,
+            csv_options=csv_read_options(db_file.csv_delimiter, db_file.csv_encoding)
+        )
 
-        # Clear existing suggestions
-        db.query(models.ReviewSuggestion).filter(models.ReviewSuggestion.file_id == file_id).delete()
-        
-        suggestions = []
-        for change in report.get("changes", []):
-            suggestion = models.ReviewSuggestion(
-                file_id=file_id,
-                row_index=change["row_index"],
-                column_name=change["column"],
-                original_value=str(change["original_value"]),
-                suggested_value=str(change["cleaned_value"]),
-                confidence_score=change["confidence"],
-                issue_type=change["fix_type"],
-                status="pending"
-            )
-            suggestions.append(suggestion)
-        
-        db.bulk_save_objects(suggestions)
+        # Replace existing suggestions (bulk COPY, one transaction)
+        ingest = ingest_review_suggestions(engine, file_id, report.get("changes", []))
+        print(f"Stored {ingest['rows']} suggestions for file {file_id} ({ingest['rows_per_sec']} rows/sec)")
         
         db_file.status = models.ProcessingStatus.ANALYZED
         db.commit()
+        invalidate_file(file_id)
         
         return {
             "message": "Analysis processing complete",
             "issues_found": report.get("issues_found", 0),
-            "suggestions_count": len(suggestions)
+            "suggestions_count": ingest["rows"]
         }
 
     except Exception as e:
@@ -158,7 +173,7 @@ def analyze_file(
         db.commit()
         raise HTTPException(status_code=500, detail=str(e))
 
-from sqlalchemy import func, desc, or_
+from sqlalchemy import func, desc
 
 # ... (rest of imports)
 
@@ -167,12 +182,15 @@ def get_review_data(
     file_id: int,
     page: int = 1,
     page_size: int = 50,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     filters: Optional[str] = Query(None),
     current_user: models.User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
     Get raw data merged with suggestions for the review UI.
+    Pass the returned next_cursor to get the following page (keyset on
+    row_index, constant cost at any depth); `page` is kept for old clients.
     """
     # Verify ownership
     db_file = db.query(models.UploadedFile).filter(
@@ -186,77 +204,16 @@ def get_review_data(
     # Base Query
     query = db.query(models.RawRecord).filter(models.RawRecord.file_id == file_id)
 
-    # Apply Filters
-    if filters:
-        try:
-            filter_dict = json.loads(filters)
-            if any(filter_dict.values()):
-                conditions = []
-                
-                # Dynamic Duplicate Check Logic
-                # If duplicate_columns are provided, we need to find row_indices that are duplicates based on these columns
-                duplicate_indices = set()
-                if filter_dict.get("duplicate") and filter_dict.get("duplicate_columns"):
-                    dup_cols = filter_dict["duplicate_columns"]
-                    # We need to fetch data to check for duplicates. 
-                    # Optimization: Fetch only necessary columns from JSON if possible, but here we fetch all raw records for this file.
-                    # Warning: Performance impact on large files.
-                    all_records = db.query(models.RawRecord).filter(models.RawRecord.file_id == file_id).all()
-                    if all_records:
-                        data_list = [{"row_index": r.row_index, **r.data} for r in all_records]
-                        df = pd.DataFrame(data_list)
-                        
-                        # Normalize and Check
-                        valid_cols = [c for c in dup_cols if c in df.columns]
-                        if valid_cols:
-                            for col in valid_cols:
-                                df[col] = df[col].astype(str).str.strip().str.lower()
-                            
-                            dupes = df[df.duplicated(subset=valid_cols, keep=False)]
-                            duplicate_indices = set(dupes["row_index"].tolist())
-                
-                # Standard Filters
-                if filter_dict.get("duplicate") and not filter_dict.get("duplicate_columns"): 
-                    conditions.append(models.ReviewSuggestion.issue_type == "duplicate")
-                
-                if filter_dict.get("email"): conditions.append(models.ReviewSuggestion.issue_type == "email")
-                if filter_dict.get("phone"): conditions.append(models.ReviewSuggestion.issue_type == "phone")
-                if filter_dict.get("unify"): conditions.append(models.ReviewSuggestion.issue_type == "company")
-                if filter_dict.get("job_normalization"): conditions.append(models.ReviewSuggestion.issue_type == "job_title")
-                if filter_dict.get("fake_domain"): conditions.append(models.ReviewSuggestion.issue_type == "domain")
-
-                if conditions or duplicate_indices:
-                    # Find relevant row_indices from ReviewSuggestion
-                    subquery = db.query(models.ReviewSuggestion.row_index).filter(
-                        models.ReviewSuggestion.file_id == file_id,
-                        or_(*conditions) if conditions else True
-                    ).distinct()
-                    
-                    # Combine indices
-                    # If we have strict duplicate search, we usually want OR Logic with other filters, or AND?
-                    # Usually Filters are AND or OR? 
-                    # "Review" usually shows logical OR of issues.
-                    
-                    relevant_indices = set([r[0] for r in subquery.all()]) if conditions else set()
-                    relevant_indices.update(duplicate_indices)
-                    
-                    if relevant_indices:
-                        query = query.filter(models.RawRecord.row_index.in_(relevant_indices))
-                    else:
-                        # Filters active but no matches
-                        query = query.filter(models.RawRecord.row_index == -1) # return empty
-
-                elif filter_dict.get("missing_fields"):
-                     pass
-        except Exception as e:
-            print(f"Filter Error: {e}")
-            pass
+    # Apply Filters (evaluated in Postgres against the JSONB row data)
+    condition = record_filter_condition(db, models.RawRecord, file_id, parse_filters(filters))
+    if condition is not None:
+        query = query.filter(condition)
 
     # Pagination
-    total = query.count()
-    skip = (page - 1) * page_size
-    
-    raw_records = query.offset(skip).limit(page_size).all()
+    raw_records, total, next_cursor = _paginate(
+        query, models.RawRecord.row_index, ("file", file_id, "review_count", filters_fingerprint(filters)),
+        page, page_size, cursor, filters
+    )
     
     # Fetch suggestions for these rows
     if raw_records:
@@ -297,22 +254,89 @@ def get_review_data(
         "total": total,
         "data": result_data,
         "page": page,
-        "page_size": page_size
+        "page_size": page_size,
+        "next_cursor": next_cursor
     }
 
-# ... (bulk_review_decisions and finalize_cleaning unchanged) ...
+@router.post("/{file_id}/review/bulk")
+def bulk_review_decisions(
+    file_id: int,
+    request: schemas.BulkReviewRequest,
+    current_user: models.User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Accept or reject many suggestions at once (single set-based UPDATE).
+    """
+    db_file = db.query(models.UploadedFile).filter(
+        models.UploadedFile.id == file_id,
+        models.UploadedFile.user_id == current_user.id
+    ).first()
+
+    if not db_file:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    invalid = sorted({d.action for d in request.decisions if d.action not in DECISION_STATUS})
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid action(s): {', '.join(invalid)}")
+
+    updated = apply_review_decisions(db, file_id, request.decisions)
+
+    if db_file.status == models.ProcessingStatus.ANALYZED:
+        db_file.status = models.ProcessingStatus.REVIEWING
+        db.commit()
+
+    return {"message": "Decisions applied", "updated": updated, "submitted": len(request.decisions)}
+
+@router.post("/{file_id}/clean")
+def finalize_cleaning(
+    file_id: int,
+    current_user: models.User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Build the cleaned records: raw rows with accepted suggestions merged in,
+    done in one INSERT ... SELECT inside the database.
+    """
+    db_file = db.query(models.UploadedFile).filter(
+        models.UploadedFile.id == file_id,
+        models.UploadedFile.user_id == current_user.id
+    ).first()
+
+    if not db_file:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if db_file.status in (models.ProcessingStatus.INGESTING, models.ProcessingStatus.PENDING):
+        raise HTTPException(status_code=409, detail="File must be analyzed before it can be cleaned")
+
+    try:
+        stats = build_cleaned_records(db, file_id)
+        db_file.status = models.ProcessingStatus.CLEANED
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    invalidate_file(file_id)
+    print(f"Finalized file {file_id}: {stats['rows']} rows, {stats['accepted']} accepted fixes in {stats['seconds']}s")
+
+    return {"message": "Cleaning complete", "cleaned_rows": stats["rows"], "accepted_fixes": stats["accepted"]}
+
 
 @router.get("/{file_id}/cleaned", response_model=schemas.PaginatedRecords)
 def get_cleaned_data(
     file_id: int,
     page: int = 1,
     page_size: int = 50,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     filters: Optional[str] = Query(None),
     current_user: models.User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
     Get paginated cleaned data.
+    Pass the returned next_cursor to get the following page (keyset on
+    row_index, constant cost at any depth); `page` is kept for old clients.
     """
     db_file = db.query(models.UploadedFile).filter(
         models.UploadedFile.id == file_id,
@@ -326,35 +350,41 @@ def get_cleaned_data(
     query = db.query(models.CleanedRecord).filter(models.CleanedRecord.file_id == file_id)
 
     # Apply Filters (Same logic as Review to show correlated rows)
-    if filters:
-        try:
-            filter_dict = json.loads(filters)
-            if any(filter_dict.values()):
-                conditions = []
-                if filter_dict.get("duplicate"): conditions.append(models.ReviewSuggestion.issue_type == "duplicate")
-                if filter_dict.get("email"): conditions.append(models.ReviewSuggestion.issue_type == "email")
-                if filter_dict.get("phone"): conditions.append(models.ReviewSuggestion.issue_type == "phone")
-                if filter_dict.get("unify"): conditions.append(models.ReviewSuggestion.issue_type == "company")
-                if filter_dict.get("job_normalization"): conditions.append(models.ReviewSuggestion.issue_type == "job_title")
-                if filter_dict.get("fake_domain"): conditions.append(models.ReviewSuggestion.issue_type == "domain")
-
-                if conditions:
-                    subquery = db.query(models.ReviewSuggestion.row_index).filter(
-                        models.ReviewSuggestion.file_id == file_id,
-                        or_(*conditions)
-                    ).distinct()
-                    query = query.filter(models.CleanedRecord.row_index.in_(subquery))
-        except:
-             pass
-
-    total = query.count()
-    skip = (page - 1) * page_size
-    
-    records = query.offset(skip).limit(page_size).all()
+    condition = record_filter_condition(db, models.CleanedRecord, file_id, parse_filters(filters))
+    if condition is not None:
+        query = query.filter(condition)
+
+    records, total, next_cursor = _paginate(
+        query, models.CleanedRecord.row_index, ("file", file_id, "cleaned_count", filters_fingerprint(filters)),
+        page, page_size, cursor, filters
+    )
     
     return {
         "total": total,
         "data": [r.data for r in records],
         "page": page,
-        "page_size": page_size
+        "page_size": page_size,
+        "next_cursor": next_cursor
     }
+
+
+def _paginate(query, key_column, count_key, page, page_size, cursor, filters):
+    """
+    Keyset-paginate a record query on row_index.
+    The total is computed once per file and filter set and then served from
+    the query cache. Returns (rows, total, next_cursor).
+    """
+    fingerprint = filters_fingerprint(filters)
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, fingerprint)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    total = query_cache.get_or_compute(count_key, query.count)
+    rows, has_more = keyset_page(
+        query, key_column, page_size, after=after, offset=max(page - 1, 0) * page_size
+    )
+    next_cursor = encode_cursor(rows[-1].row_index, fingerprint) if has_more else None
+    return rows, total, next_cursor
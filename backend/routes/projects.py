@@ -1,23 +1,38 @@
 # routes/projects.py
 # API routes for Projects and Runs management
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, defer
 from sqlalchemy import func, desc
 from typing import List, Optional
 from datetime import datetime
 import os
-import shutil
 import uuid
-import pandas as pd
 import json
+import numpy as np
 
 import models
 import schemas
 from database import SessionLocal
 from auth import get_password_hash, verify_password, create_access_token
-from services.data_quality import run_pipeline
+from services.artifact_store import base_path, download_response, stored_path, write_csv
+from services.dashboard_rollups import record_run, remove_run
+from services.data_quality import ENGINE_VERSION, run_pipeline
+from services.pagination import decode_cursor, encode_cursor, filters_fingerprint, page_after
+from services.query_cache import query_cache
+from services.record_filters import parse_filters
+from services.result_reuse import config_hash, copy_run_outputs, find_reusable_run, run_flight
+from services.frame_cache import file_key, frame_cache
+from services.issue_index import issue_index_for, issue_index_version, missing_rows, remove_issue_index, write_issue_index
+from services.run_artifacts import (
+    FrameRowReader, count_run_rows, remove_artifact, run_file_columns, run_frame, run_row_reader, write_artifact
+)
+from services.run_diff import diff_run_files
+from services.run_metrics import lttb, quality_trend, record_run_metrics, timeline_points
+from services.run_export import EXPORT_FORMATS, export_available, export_filename, export_row_limit, iter_export, parse_columns
+from services.upload_stream import StoredUpload, stream_upload
 from utils import sanitize_for_json
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
@@ -27,6 +42,17 @@ UPLOAD_DIR = "data/uploads"
 CLEAN_DIR = "data/cleaned"
 CHANGELOG_DIR = "data/changelogs"
 
+# Top-level keys of Run.report_data that can be fetched on their own
+REPORT_SECTIONS = (
+    "issues_found", "fixes_applied", "quality_score", "rows_processed", "columns",
+    "changes", "original_data", "cleaned_data", "total_changes", "auto_accepted_count",
+    "needs_review_count", "duplicates_found", "verification_stats",
+    "job_function_summary", "llm_cascade"
+)
+
+# Stats of a project without runs
+EMPTY_PROJECT_STATS = {"run_count": 0, "latest_quality_score": None}
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -88,8 +114,11 @@ def list_projects(
     total = query.count()
     projects = query.order_by(desc(models.Project.updated_at)).offset(skip).limit(limit).all()
     
+    # Run counts and latest scores for the whole page in one query
+    stats = _project_stats(db, [p.id for p in projects])
+    
     return {
-        "projects": [_project_to_response(p, db) for p in projects],
+        "projects": [_project_to_response(p, db, stats.get(p.id, EMPTY_PROJECT_STATS)) for p in projects],
         "total": total
     }
 
@@ -164,11 +193,14 @@ def list_runs(
         raise HTTPException(status_code=404, detail="Project not found")
     
     query = db.query(models.Run).filter(models.Run.project_id == project_id)
-    total = query.count()
-    runs = query.order_by(desc(models.Run.created_at)).offset(skip).limit(limit).all()
+    total = db.query(func.count(models.Run.id)).filter(models.Run.project_id == project_id).scalar()
+    # report_data holds every row of the run; it is never needed for a listing
+    runs = query.options(defer(models.Run.report_data)).order_by(
+        desc(models.Run.created_at)
+    ).offset(skip).limit(limit).all()
     
     return {
-        "runs": [_run_to_response(r) for r in runs],
+        "runs": [_run_summary_to_response(r) for r in runs],
         "total": total,
         "project_name": project.name
     }
@@ -188,6 +220,33 @@ def get_run(project_id: int, run_id: int, db: Session = Depends(get_db)):
     return _run_to_response(run)
 
 
+@router.get("/{project_id}/runs/{run_id}/report", response_model=schemas.RunReportResponse)
+def get_run_report(
+    project_id: int,
+    run_id: int,
+    sections: Optional[str] = Query(None, description="Comma-separated report sections, e.g. 'changes,job_function_summary'"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the full report of a run, or only selected sections of it.
+    Selected sections are extracted by the database, so e.g. `changes` is
+    fetched without transferring original_data and cleaned_data.
+    """
+    names = [name.strip() for name in sections.split(",") if name.strip()] if sections else list(REPORT_SECTIONS)
+    unknown = [name for name in names if name not in REPORT_SECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown report sections: {', '.join(unknown)}. Available: {', '.join(REPORT_SECTIONS)}"
+        )
+    
+    report = _load_report_sections(db, project_id, run_id, names)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    
+    return {"run_id": run_id, "sections": report}
+
+
 @router.post("/{project_id}/runs/upload")
 async def create_run_with_upload(
     project_id: int,
@@ -199,6 +258,11 @@ async def create_run_with_upload(
     """
     Upload a file and create a new run in the project.
     This is the main entry point for data cleaning within a project.
+    
+    The upload is streamed to disk in chunks while its hash, row count and
+    CSV format are collected. If the owner already has a run of the same
+    content, effective config and engine version, its report and outputs are
+    copied instead of re-running the pipeline.
     """
     # Verify project exists
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
@@ -209,97 +273,150 @@ async def create_run_with_upload(
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Only CSV files are allowed")
     
+    # Save uploaded file; hash, size and CSV format are collected while streaming
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    unique_filename = f"project_{project_id}_{timestamp}_{uuid.uuid4().hex[:8]}_{file.filename}"
+    stored = await stream_upload(file, os.path.join(UPLOAD_DIR, unique_filename))
+    
+    # The pipeline blocks: run it in the threadpool, where identical uploads
+    # can wait on each other
+    return await run_in_threadpool(_process_run_upload, db, project, file.filename, stored, mode, run_by)
+
+
+def _process_run_upload(db: Session, project: models.Project, file_name: str, stored: StoredUpload,
+                        mode: str, run_by: Optional[str]) -> dict:
+    """Run the pipeline on a stored upload, or reuse an identical run's results, and record the run."""
+    project_id = project.id
+    file_path = stored.path
+    content_hash = stored.sha256
+    
     try:
-        # Get next run number for this project
-        last_run = db.query(models.Run).filter(
-            models.Run.project_id == project_id
-        ).order_by(desc(models.Run.run_number)).first()
-        
-        next_run_number = (last_run.run_number + 1) if last_run else 1
-        
-        # Save uploaded file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_filename = f"project_{project_id}_run_{next_run_number}_{timestamp}_{file.filename}"
-        file_path = os.path.join(UPLOAD_DIR, unique_filename)
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        file_size = os.path.getsize(file_path)
-        
         # Get project config
         config = project.config or {}
         auto_apply = mode == "auto" and config.get("auto_apply_high_confidence", True)
         verify_emails_api = config.get("email_verification_api", False)
+        llm_cascade = None
+        if config.get("llm_cascade_enabled"):
+            llm_cascade = {
+                "min_confidence": config.get("llm_cascade_min_confidence", 0.0),
+                "max_confidence": config.get("llm_cascade_max_confidence", 0.7),
+                "max_calls": config.get("llm_cascade_max_calls", 20),
+                "max_tokens": config.get("llm_cascade_max_tokens", 50000)
+            }
+        cfg_hash = config_hash({
+            "mode": mode,
+            "auto_apply": auto_apply,
+            "verify_emails_api": verify_emails_api,
+            "llm_cascade": llm_cascade
+        })
         
-        # Run the pipeline
-        cleaned_df, report = run_pipeline(
-            file_path, 
-            auto_apply=auto_apply,
-            verify_emails_api=verify_emails_api
-        )
-        
-        if cleaned_df is None:
-            raise HTTPException(status_code=400, detail=report.get("error", "Processing failed"))
-        
-        # Save cleaned file
-        cleaned_filename = f"cleaned_{unique_filename}"
-        cleaned_path = os.path.join(CLEAN_DIR, cleaned_filename)
-        cleaned_df.to_csv(cleaned_path, index=False)
-        
-        # Calculate issue breakdown
-        issue_breakdown = {
-            "invalid_emails": report.get("verification_stats", {}).get("email_invalid", 0),
-            "invalid_phones": report.get("verification_stats", {}).get("phone_invalid", 0),
-            "missing_fields": 0,
-            "duplicates": report.get("duplicates_found", 0),
-            "company_fixes": len([c for c in report.get("changes", []) if c.get("fix_type") == "company"]),
-            "domain_fixes": len([c for c in report.get("changes", []) if c.get("fix_type") == "domain"]),
-            "job_title_fixes": len([c for c in report.get("changes", []) if c.get("fix_type") == "job_title"])
-        }
-        
-        # Create run record
-        db_run = models.Run(
-            run_number=next_run_number,
-            project_id=project_id,
-            file_name=file.filename,
-            file_size=file_size,
-            row_count=report.get("rows_processed", 0),
-            column_count=len(report.get("columns", [])),
-            columns=report.get("columns", []),
-            quality_score_before=0.0,  # Could calculate from original
-            quality_score_after=report.get("quality_score", 0.0),
-            total_issues=report.get("issues_found", 0),
-            total_fixes=report.get("fixes_applied", 0),
-            issue_breakdown=issue_breakdown,
-            total_changes=report.get("total_changes", 0),
-            auto_accepted_count=report.get("auto_accepted_count", 0),
-            needs_review_count=report.get("needs_review_count", 0),
-            manual_overrides=0,
-            mode=mode,
-            original_file_path=file_path,
-            cleaned_file_path=cleaned_path,
-            status="completed" if mode == "auto" else "pending_review",
-            report_data=report,
-            verification_stats=report.get("verification_stats", {}),
-            completed_at=datetime.utcnow() if mode == "auto" else None,
-            run_by=run_by
-        )
-        
-        db.add(db_run)
-        
-        # Update project timestamp
-        project.updated_at = datetime.utcnow()
+        cleaned_filename = f"cleaned_{os.path.basename(base_path(file_path))}"
+        cleaned_path = stored_path(os.path.join(CLEAN_DIR, cleaned_filename))
         
-        db.commit()
-        db.refresh(db_run)
+        # Identical uploads in flight (in any worker) wait for the first one,
+        # then reuse its results
+        with run_flight.hold((content_hash, cfg_hash, ENGINE_VERSION), db):
+            source_run = find_reusable_run(db, project.owner_id, content_hash, cfg_hash, ENGINE_VERSION)
+            
+            if source_run:
+                report = source_run.report_data or {}
+                copy_run_outputs(source_run, file_path, cleaned_path)
+                print(f"Reusing results of run {source_run.id} for upload {content_hash[:12]}")
+            else:
+                # Run the pipeline
+                cleaned_df, report, original_df = run_pipeline(
+                    file_path, 
+                    auto_apply=auto_apply,
+                    verify_emails_api=verify_emails_api,
+                    llm_cascade=llm_cascade,
+                    csv_options=stored.read_options,
+                    return_original=True
+                )
+                
+                if cleaned_df is None:
+                    raise HTTPException(status_code=400, detail=report.get("error", "Processing failed"))
+                
+                # Save cleaned file
+                write_csv(cleaned_df, cleaned_path)
+                
+                # Columnar copies and the issue index for preview/summary/review reads
+                write_artifact(original_df, file_path)
+                write_artifact(cleaned_df, cleaned_path)
+                write_issue_index(cleaned_path, report.get("changes", []), {"original": original_df, "cleaned": cleaned_df})
+            
+            # Get next run number for this project
+            last_run = db.query(models.Run).filter(
+                models.Run.project_id == project_id
+            ).order_by(desc(models.Run.run_number)).first()
+            
+            next_run_number = (last_run.run_number + 1) if last_run else 1
+            
+            # Calculate issue breakdown
+            issue_breakdown = {
+                "invalid_emails": report.get("verification_stats", {}).get("email_invalid", 0),
+                "invalid_phones": report.get("verification_stats", {}).get("phone_invalid", 0),
+                "missing_fields": 0,
+                "duplicates": report.get("duplicates_found", 0),
+                "company_fixes": len([c for c in report.get("changes", []) if c.get("fix_type") == "company"]),
+                "domain_fixes": len([c for c in report.get("changes", []) if c.get("fix_type") == "domain"]),
+                "job_title_fixes": len([c for c in report.get("changes", []) if c.get("fix_type") == "job_title"])
+            }
+            
+            # Create run record
+            db_run = models.Run(
+                run_number=next_run_number,
+                project_id=project_id,
+                file_name=file_name,
+                file_size=stored.size,
+                row_count=report.get("rows_processed", 0),
+                column_count=len(report.get("columns", [])),
+                columns=report.get("columns", []),
+                content_hash=content_hash,
+                config_hash=cfg_hash,
+                engine_version=ENGINE_VERSION,
+                reused_from_run_id=source_run.id if source_run else None,
+                quality_score_before=0.0,  # Could calculate from original
+                quality_score_after=report.get("quality_score", 0.0),
+                total_issues=report.get("issues_found", 0),
+                total_fixes=report.get("fixes_applied", 0),
+                issue_breakdown=issue_breakdown,
+                total_changes=report.get("total_changes", 0),
+                auto_accepted_count=report.get("auto_accepted_count", 0),
+                needs_review_count=report.get("needs_review_count", 0),
+                manual_overrides=0,
+                mode=mode,
+                original_file_path=file_path,
+                cleaned_file_path=cleaned_path,
+                status="completed" if mode == "auto" else "pending_review",
+                report_data=report,
+                verification_stats=report.get("verification_stats", {}),
+                completed_at=datetime.utcnow() if mode == "auto" else None,
+                run_by=run_by
+            )
+            
+            db.add(db_run)
+            db.flush()
+            if db_run.status == "completed":
+                record_run_metrics(db, db_run)
+            record_run(db, db_run)
+            
+            # Update project timestamp
+            project.updated_at = datetime.utcnow()
+            
+            # Committed before the key is released, so waiting uploads find this run
+            db.commit()
+            db.refresh(db_run)
         
         return {
-            "run": _run_to_response(db_run),
+            # The report is already sent once below
+            "run": _run_summary_to_response(db_run),
             "report": report,
             "session_id": str(db_run.id) if mode == "review" else None
         }
         
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         print(f"ERROR in create_run_with_upload: {str(e)}")
         import traceback
@@ -351,13 +468,21 @@ def delete_run(
             os.remove(run.original_file_path)
         except OSError:
             pass
+    remove_artifact(run.original_file_path)
+    if run.original_file_path:
+        frame_cache.invalidate(run.original_file_path)
             
     if run.cleaned_file_path and os.path.exists(run.cleaned_file_path):
         try:
             os.remove(run.cleaned_file_path)
         except OSError:
             pass
+    remove_artifact(run.cleaned_file_path)
+    remove_issue_index(run.cleaned_file_path)
+    if run.cleaned_file_path:
+        frame_cache.invalidate(run.cleaned_file_path)
     
+    remove_run(db, run)
     db.delete(run)
     db.commit()
     
@@ -368,6 +493,7 @@ def delete_run(
 def download_run_file(
     project_id: int, 
     run_id: int, 
+    request: Request,
     type: str = Query("cleaned", enum=["original", "cleaned"]),
     db: Session = Depends(get_db)
 ):
@@ -385,11 +511,87 @@ def download_run_file(
     if not file_path or not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found on server")
         
-    filename = os.path.basename(file_path)
-    return FileResponse(
-        path=file_path, 
-        filename=filename, 
-        media_type='text/csv'
+    # Compressed files go out as stored when the client accepts the encoding
+    return download_response(
+        file_path,
+        os.path.basename(file_path),
+        request.headers.get("accept-encoding")
+    )
+
+
+@router.get("/{project_id}/runs/{run_id}/export")
+def export_run_file(
+    project_id: int,
+    run_id: int,
+    format: str = Query("csv", enum=list(EXPORT_FORMATS)),
+    type: str = Query("cleaned", enum=["original", "cleaned"]),
+    columns: Optional[str] = Query(None, description="Comma-separated column names (default: all)"),
+    filters: Optional[str] = Query(None, description="Same JSON filters as the data preview"),
+    db: Session = Depends(get_db)
+):
+    """
+    Export a run file as CSV, JSONL, Parquet or XLSX.
+
+    The output is generated while it streams, chunk by chunk from the run's
+    Parquet artifact (or CSV), so memory stays bounded at any file size.
+    Filters select rows like the data preview does, e.g.
+    {"status": "auto_accepted"} for rows with accepted fixes.
+    """
+    if not export_available(format):
+        raise HTTPException(status_code=501, detail=f"{format} export is not available on this server")
+
+    run = db.query(models.Run).options(defer(models.Run.report_data)).filter(
+        models.Run.id == run_id,
+        models.Run.project_id == project_id
+    ).first()
+
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    file_path = run.cleaned_file_path if type == "cleaned" else run.original_file_path
+
+    if not file_path or not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="File not found on server")
+
+    try:
+        selected = parse_columns(columns)
+        filter_dict = json.loads(filters) if filters else {}
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Malformed columns or filters JSON")
+    if not isinstance(filter_dict, dict):
+        raise HTTPException(status_code=400, detail="filters must be a JSON object")
+
+    # Only the header is read up front; the rows are read while streaming
+    available = run_file_columns(file_path)
+    if selected is not None:
+        unknown = [c for c in selected if c not in available]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+    else:
+        selected = available
+
+    rows = None
+    if any(filter_dict.values()):
+        rows = query_cache.get_or_compute(
+            _filtered_rows_key(run, file_path, type, "export_rows", filters_fingerprint(filters)),
+            lambda: _filtered_run_rows(db, run, file_path, type, filter_dict)
+        )
+
+    limit = export_row_limit(format)
+    total_rows = None
+    if limit is not None:
+        total_rows = len(rows) if rows is not None else count_run_rows(file_path)
+    if total_rows is not None and total_rows > limit:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{total_rows} rows exceed the {format} limit of {limit}; add filters or choose another format"
+        )
+
+    media_type, _ = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        iter_export(file_path, format, selected, rows),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(file_path, format)}"'}
     )
 
 
@@ -401,13 +603,21 @@ def get_run_data_preview(
     filters: Optional[str] = Query(None),
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     db: Session = Depends(get_db)
 ):
     """
     Get a JSON preview of the data for a run with optional filtering.
     Filters provided as a JSON string.
+    
+    Files that fit the frame cache are paged from a cached DataFrame; larger
+    ones from the run's Parquet artifact (only the row groups a page spans)
+    or, for runs without one, through a checkpointed row index of the CSV,
+    so a page costs the same at any depth; pass next_cursor to continue.
+    Filtered row sets (and, for cached frames, the filtered frame itself)
+    are computed once per run and filter combination and cached.
     """
-    run = db.query(models.Run).filter(
+    run = db.query(models.Run).options(defer(models.Run.report_data)).filter(
         models.Run.id == run_id,
         models.Run.project_id == project_id
     ).first()
@@ -423,88 +633,119 @@ def get_run_data_preview(
              return {"columns": [], "data": [], "total": 0, "message": "Cleaned file not found"}
         raise HTTPException(status_code=404, detail="File not found on server")
     
+    fingerprint = filters_fingerprint(filters)
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, fingerprint)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    filter_dict = parse_filters(filters)
+    
     try:
-        # Read CSV
-        # We assume headers exist
-        df = pd.read_csv(file_path)
+        row_index = run_row_reader(file_path, kind=type)
         
-        # Apply Filters if present
-        if filters:
-            try:
-                filter_dict = json.loads(filters)
-                # filters: { duplicate, email, phone, unify, job_normalization, fake_domain, missing_fields }
-                
-                # Check if any filter is active (true)
-                if any(filter_dict.values()):
-                    # Use run.report_data to find relevant rows
-                    report = run.report_data or {}
-                    changes = report.get("changes", [])
-                    
-                    relevant_indices = set()
-                    
-                    # 1. Filter by Changes (Metadata)
-                    for c in changes:
-                        ft = c.get("fix_type")
-                        
-                        is_relevant = False
-                        if filter_dict.get("duplicate") and ft == "duplicate": is_relevant = True
-                        elif filter_dict.get("email") and ft == "email": is_relevant = True
-                        elif filter_dict.get("phone") and ft == "phone": is_relevant = True
-                        elif filter_dict.get("unify") and ft == "company": is_relevant = True
-                        elif filter_dict.get("job_normalization") and ft == "job_title": is_relevant = True
-                        elif filter_dict.get("fake_domain") and ft == "domain": is_relevant = True
-                        
-                        if is_relevant:
-                            relevant_indices.add(c["row_index"])
-
-                    # Dynamic Duplicate Check
-                    if filter_dict.get("duplicate") and filter_dict.get("duplicate_columns"):
-                        dup_cols = filter_dict["duplicate_columns"]
-                        # Verify columns exist
-                        valid_cols = [c for c in dup_cols if c in df.columns]
-                        if valid_cols:
-                            # Normalize for comparison
-                            temp_df = df.copy()
-                            for col in valid_cols:
-                                temp_df[col] = temp_df[col].astype(str).str.strip().str.lower()
-                            
-                            duplicates = temp_df[temp_df.duplicated(subset=valid_cols, keep=False)]
-                            relevant_indices.update(duplicates.index.tolist())
-                            
-                    # 2. Filter by Missing Fields (Data Scan)
-                    if filter_dict.get("missing_fields"):
-                        # Find rows with any null/empty values
-                        # Replace empty strings with NaN for consistent check
-                        missing_mask = df.replace(r'^\s*$', float('nan'), regex=True).isnull().any(axis=1)
-                        missing_indices = df.index[missing_mask].tolist()
-                        relevant_indices.update(missing_indices)
-                    
-                    # Apply filter to DataFrame
-                    # We only keep rows that matched AT LEAST ONE selected filter
-                    df = df[df.index.isin(relevant_indices)]
-                    
-            except json.JSONDecodeError:
-                pass # Ignore malformed filter JSON
-        
-        # Pagination
-        total_rows = len(df)
-        df_page = df.iloc[offset : offset + limit]
+        if any(filter_dict.values()):
+            relevant = query_cache.get_or_compute(
+                _filtered_rows_key(run, file_path, type, "filtered_rows", fingerprint),
+                lambda: _filtered_run_rows(db, run, file_path, type, filter_dict, row_index.total_rows)
+            )
+            total_rows = len(relevant)
+            if isinstance(row_index, FrameRowReader):
+                # The filtered frame is cached too, so paging through it is a slice
+                view = frame_cache.get_or_load(
+                    file_key(file_path, type, "filtered", fingerprint, issue_index_version(run.cleaned_file_path)),
+                    lambda: row_index.read_row_set(relevant)
+                )
+                start = int(view.index.searchsorted(after, side="right")) if after is not None else offset
+                df_page = view.iloc[start:start + limit]
+                has_more = start + limit < total_rows
+            else:
+                page_rows, has_more = page_after(relevant, limit, after=after, offset=offset)
+                df_page = row_index.read_row_set(page_rows)
+        else:
+            total_rows = row_index.total_rows
+            start = after + 1 if after is not None else offset
+            df_page = row_index.read_rows(start, limit)
+            has_more = start + limit < total_rows
         
         records = df_page.to_dict(orient='records')
-        columns = list(df.columns)
+        columns = row_index.columns
+        next_cursor = encode_cursor(int(df_page.index[-1]), fingerprint) if has_more and len(df_page) else None
         
         return sanitize_for_json({
             "total": total_rows,
             "columns": columns,
             "data": records,
             "offset": offset,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor
         })
     except Exception as e:
         print(f"Error reading CSV: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to read data: {str(e)}")
 
 
+def _filtered_rows_key(run: models.Run, file_path: str, kind: str, purpose: str, fingerprint: str) -> tuple:
+    """
+    Cache key of a run's filtered row set, tied to the current versions of
+    the file and of the issue index, so rows cached before a review apply
+    or index refresh are never served afterwards.
+    """
+    return ("run", run.id, kind, purpose, fingerprint, *file_key(file_path),
+            issue_index_version(run.cleaned_file_path))
+
+
+def _filtered_run_rows(db: Session, run: models.Run, file_path: str, kind: str, filter_dict: dict,
+                       total_rows: Optional[int] = None) -> List[int]:
+    """
+    Sorted row numbers of a run file matching AT LEAST ONE selected filter,
+    below total_rows when it is given.
+    filters: { duplicate, duplicate_columns, email, phone, unify, job_normalization, fake_domain, missing_fields, status }
+    
+    Fix types, statuses and missing fields come from the run's issue index;
+    only duplicates on user-chosen columns need the data itself.
+    """
+    index = issue_index_for(
+        run.cleaned_file_path,
+        lambda: (_load_report_sections(db, run.project_id, run.id, ["changes"]) or {}).get("changes")
+    )
+    indexed = index.rows(filter_dict, kind)
+    scan_missing = bool(filter_dict.get("missing_fields")) and indexed is None
+    if scan_missing:
+        indexed = index.rows({**filter_dict, "missing_fields": False}, kind)
+    relevant_indices = set(indexed.tolist())
+    
+    if scan_missing or (filter_dict.get("duplicate") and filter_dict.get("duplicate_columns")):
+        # Duplicate checks alone only need their columns
+        columns = None
+        if not scan_missing:
+            available = set(run_file_columns(file_path))
+            columns = [c for c in filter_dict["duplicate_columns"] if c in available]
+        df = run_frame(file_path, kind, columns=columns)
+        
+        # Dynamic Duplicate Check
+        if filter_dict.get("duplicate") and filter_dict.get("duplicate_columns"):
+            dup_cols = filter_dict["duplicate_columns"]
+            # Verify columns exist
+            valid_cols = [c for c in dup_cols if c in df.columns]
+            if valid_cols:
+                # Normalize for comparison
+                temp_df = df[valid_cols].copy()
+                for col in valid_cols:
+                    temp_df[col] = temp_df[col].astype(str).str.strip().str.lower()
+                
+                duplicates = temp_df[temp_df.duplicated(subset=valid_cols, keep=False)]
+                relevant_indices.update(duplicates.index.tolist())
+        
+        # Missing fields not in the index (legacy runs): scan the data
+        if scan_missing:
+            relevant_indices.update(missing_rows(df).tolist())
+    
+    return sorted(i for i in relevant_indices if 0 <= i and (total_rows is None or i < total_rows))
+
+
 @router.get("/{project_id}/runs/{run_id}/job-summary")
 def get_run_job_summary(
     project_id: int,
@@ -512,7 +753,7 @@ def get_run_job_summary(
     db: Session = Depends(get_db)
 ):
     """Get the job function summary for a run."""
-    run = db.query(models.Run).filter(
+    run = db.query(models.Run).options(defer(models.Run.report_data)).filter(
         models.Run.id == run_id,
         models.Run.project_id == project_id
     ).first()
@@ -520,22 +761,28 @@ def get_run_job_summary(
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
     
-    report = run.report_data or {}
-    summary = report.get("job_function_summary", [])
+    report = _load_report_sections(db, project_id, run_id, ["job_function_summary"]) or {}
+    summary = report.get("job_function_summary") or []
     
     # If summary is missing (legacy runs or failed extraction), try to compute it on the fly
     if not summary and run.cleaned_file_path and os.path.exists(run.cleaned_file_path):
         try:
-            df = pd.read_csv(run.cleaned_file_path)
+            available = run_row_reader(run.cleaned_file_path, kind="cleaned").columns
             
             # Identify job column
             job_col = None
-            for col in df.columns:
+            for col in available:
                 if 'job' in col.lower() or 'title' in col.lower():
                     job_col = col
                     break
             
             if job_col:
+                # Only the job and role columns are read
+                df = run_frame(
+                    run.cleaned_file_path, "cleaned",
+                    columns=[c for c in available if c in (job_col, "role_function")]
+                )
+
                 # We need the map_job_title function
                 from src.job_mapper import map_job_title
                 
@@ -569,6 +816,12 @@ def get_run_job_summary(
     return {"job_function_summary": summary}
 
 
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Hit, miss and eviction counts of the run frame cache and the query cache."""
+    return {"frames": frame_cache.stats(), "queries": query_cache.stats()}
+
+
 # ============== COMPARISON & TIMELINE ==============
 
 @router.post("/{project_id}/compare", response_model=schemas.RunComparisonResponse)
@@ -578,12 +831,12 @@ def compare_runs(
     db: Session = Depends(get_db)
 ):
     """Compare two runs within a project."""
-    run1 = db.query(models.Run).filter(
+    run1 = db.query(models.Run).options(defer(models.Run.report_data)).filter(
         models.Run.id == comparison.run_id_1,
         models.Run.project_id == project_id
     ).first()
     
-    run2 = db.query(models.Run).filter(
+    run2 = db.query(models.Run).options(defer(models.Run.report_data)).filter(
         models.Run.id == comparison.run_id_2,
         models.Run.project_id == project_id
     ).first()
@@ -662,77 +915,160 @@ def compare_runs(
         summary = f"Run #{run2.run_number} shows some regression compared to Run #{run1.run_number}"
     
     return {
-        "run_1": _run_to_response(run1),
-        "run_2": _run_to_response(run2),
+        "run_1": _run_summary_to_response(run1),
+        "run_2": _run_summary_to_response(run2),
         "metrics": metrics,
         "summary": summary
     }
 
 
+@router.post("/{project_id}/compare/diff", response_model=schemas.RunDiffResponse)
+def diff_runs(
+    project_id: int,
+    request: schemas.RunDiffRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Cell-level diff of two runs' data: added, removed and modified rows and
+    per-column change counts, with a sample of each. Cached per run pair.
+    """
+    if request.type not in ("original", "cleaned"):
+        raise HTTPException(status_code=400, detail="type must be 'original' or 'cleaned'")
+
+    runs = {}
+    for run_id in (request.run_id_1, request.run_id_2):
+        run = db.query(models.Run).options(defer(models.Run.report_data)).filter(
+            models.Run.id == run_id,
+            models.Run.project_id == project_id
+        ).first()
+        if not run:
+            raise HTTPException(status_code=404, detail="One or both runs not found")
+        path = run.cleaned_file_path if request.type == "cleaned" else run.original_file_path
+        if not path or not os.path.exists(path):
+            raise HTTPException(status_code=404, detail=f"File of run {run_id} not found on server")
+        runs[run_id] = (run, path)
+
+    (run1, path1), (run2, path2) = runs[request.run_id_1], runs[request.run_id_2]
+
+    if request.key_column:
+        for path in (path1, path2):
+            if request.key_column not in run_row_reader(path, kind=request.type).columns:
+                raise HTTPException(status_code=400, detail=f"Key column '{request.key_column}' is not in both runs")
+
+    try:
+        diff = diff_run_files(path1, path2, request.type, request.key_column)
+    except Exception as e:
+        print(f"Error diffing runs {run1.id} and {run2.id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to diff runs: {str(e)}")
+
+    return sanitize_for_json({
+        "run_1": _run_summary_to_response(run1),
+        "run_2": _run_summary_to_response(run2),
+        **diff
+    })
+
+
 @router.get("/{project_id}/timeline", response_model=schemas.ProjectTimelineResponse)
-def get_project_timeline(project_id: int, db: Session = Depends(get_db)):
-    """Get quality score timeline for a project - for charts."""
+def get_project_timeline(
+    project_id: int,
+    points: Optional[int] = Query(None, ge=3, description="Downsample to at most this many points"),
+    window: int = Query(5, ge=1, le=500, description="Runs in the rolling quality average"),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Get quality score timeline for a project - for charts.
+
+    Served from the run_metrics table (one small row per completed run) with
+    rolling averages from a SQL window function. Long ranges are reduced to
+    `points` points with LTTB, which keeps peaks and dips visible; averages
+    and trend always cover every run in range.
+    """
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    runs = db.query(models.Run).filter(
-        models.Run.project_id == project_id,
-        models.Run.status == "completed"
-    ).order_by(models.Run.run_number).all()
-    
-    data_points = []
-    for run in runs:
-        data_points.append({
-            "run_number": run.run_number,
-            "run_id": run.id,
-            "created_at": run.created_at,
-            "quality_score": run.quality_score_after,
-            "issues_found": run.total_issues,
-            "fixes_applied": run.total_fixes
-        })
+    data_points = timeline_points(db, project_id, window=window, start=start, end=end)
+    scores = [dp["quality_score"] for dp in data_points]
+    avg_score = sum(scores) / len(scores) if scores else 0
     
-    # Calculate average and trend
-    if len(data_points) >= 2:
-        scores = [dp["quality_score"] for dp in data_points]
-        avg_score = sum(scores) / len(scores)
-        
-        # Simple trend: compare last 3 to first 3
-        first_half = scores[:len(scores)//2] if len(scores) >= 4 else scores[:1]
-        second_half = scores[len(scores)//2:] if len(scores) >= 4 else scores[-1:]
-        
-        first_avg = sum(first_half) / max(len(first_half), 1)
-        second_avg = sum(second_half) / max(len(second_half), 1)
-        
-        if second_avg > first_avg + 2:
-            trend = "improving"
-        elif second_avg < first_avg - 2:
-            trend = "declining"
-        else:
-            trend = "stable"
-    else:
-        avg_score = data_points[0]["quality_score"] if data_points else 0
-        trend = "stable"
+    if points is not None and len(data_points) > points:
+        keep = lttb(
+            np.array([dp["run_number"] for dp in data_points]),
+            np.array(scores),
+            points
+        )
+        data_points = [data_points[i] for i in keep]
     
     return {
         "project_id": project_id,
         "project_name": project.name,
         "data_points": data_points,
         "average_quality_score": round(avg_score, 2),
-        "quality_trend": trend
+        "quality_trend": quality_trend(scores),
+        "total_runs": len(scores),
+        "downsampled": len(data_points) < len(scores)
     }
 
 
 # ============== HELPER FUNCTIONS ==============
 
-def _project_to_response(project: models.Project, db: Session) -> dict:
-    """Convert Project model to response dict."""
-    run_count = db.query(models.Run).filter(models.Run.project_id == project.id).count()
+def _project_stats(db: Session, project_ids: List[int]) -> dict:
+    """
+    Run count and latest completed quality score for many projects at once.
+    Returns {project_id: {"run_count": n, "latest_quality_score": score}} with
+    an entry for every existing project id, including projects without runs.
+    """
+    if not project_ids:
+        return {}
     
-    latest_run = db.query(models.Run).filter(
-        models.Run.project_id == project.id,
+    run_counts = db.query(
+        models.Run.project_id.label("project_id"),
+        func.count(models.Run.id).label("run_count")
+    ).filter(
+        models.Run.project_id.in_(project_ids)
+    ).group_by(models.Run.project_id).subquery()
+    
+    # Newest completed run per project ranks 1
+    ranked = db.query(
+        models.Run.project_id.label("project_id"),
+        models.Run.quality_score_after.label("quality_score"),
+        func.row_number().over(
+            partition_by=models.Run.project_id,
+            order_by=desc(models.Run.created_at)
+        ).label("rank")
+    ).filter(
+        models.Run.project_id.in_(project_ids),
         models.Run.status == "completed"
-    ).order_by(desc(models.Run.created_at)).first()
+    ).subquery()
+    
+    rows = db.query(
+        models.Project.id.label("project_id"),
+        func.coalesce(run_counts.c.run_count, 0).label("run_count"),
+        ranked.c.quality_score
+    ).outerjoin(
+        run_counts, run_counts.c.project_id == models.Project.id
+    ).outerjoin(
+        ranked, (ranked.c.project_id == models.Project.id) & (ranked.c.rank == 1)
+    ).filter(
+        models.Project.id.in_(project_ids)
+    ).all()
+    
+    return {
+        row.project_id: {"run_count": row.run_count, "latest_quality_score": row.quality_score}
+        for row in rows
+    }
+
+
+def _project_to_response(project: models.Project, db: Session, stats: Optional[dict] = None) -> dict:
+    """
+    Convert Project model to response dict.
+    Listings pass precomputed `stats` from _project_stats; otherwise they are
+    looked up for this project alone.
+    """
+    if stats is None:
+        stats = _project_stats(db, [project.id]).get(project.id, EMPTY_PROJECT_STATS)
     
     return {
         "id": project.id,
@@ -745,11 +1081,28 @@ def _project_to_response(project: models.Project, db: Session) -> dict:
         "created_at": project.created_at,
         "updated_at": project.updated_at,
         "is_active": project.is_active,
-        "run_count": run_count,
-        "latest_quality_score": latest_run.quality_score_after if latest_run else None
+        "run_count": stats["run_count"],
+        "latest_quality_score": stats["latest_quality_score"]
     }
 
 
+def _load_report_sections(db: Session, project_id: int, run_id: int, names: List[str]) -> Optional[dict]:
+    """
+    Fetch selected top-level keys of a run's report_data without loading the
+    whole document (JSON `->` extraction in the database).
+    Returns None if the run does not exist; missing keys map to None.
+    """
+    columns = [models.Run.report_data[name].label(name) for name in names]
+    row = db.query(models.Run.id, *columns).filter(
+        models.Run.id == run_id,
+        models.Run.project_id == project_id
+    ).first()
+    
+    if row is None:
+        return None
+    return {name: getattr(row, name) for name in names}
+
+
 def _run_summary_to_response(run: models.Run) -> dict:
     """Convert Run model to summary response dict (excludes heavy report_data)."""
     return {
@@ -761,6 +1114,8 @@ def _run_summary_to_response(run: models.Run) -> dict:
         "row_count": run.row_count,
         "column_count": run.column_count,
         "columns": run.columns or [],
+        "engine_version": run.engine_version,
+        "reused_from_run_id": run.reused_from_run_id,
         "quality_score_before": run.quality_score_before or 0,
         "quality_score_after": run.quality_score_after or 0,
         "total_issues": run.total_issues or 0,
@@ -792,6 +1147,8 @@ def _run_to_response(run: models.Run) -> dict:
         "row_count": run.row_count,
         "column_count": run.column_count,
         "columns": run.columns or [],
+        "engine_version": run.engine_version,
+        "reused_from_run_id": run.reused_from_run_id,
         "quality_score_before": run.quality_score_before or 0,
         "quality_score_after": run.quality_score_after or 0,
         "total_issues": run.total_issues or 0,
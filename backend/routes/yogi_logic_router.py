@@ -5,7 +5,7 @@ from yoge_logics.mailcheck import process_emails
 from yoge_logics.pverify import process_phone_validation
 from yoge_logics.missing_cols import check_missing_cols
 from yoge_logics.semantic_llm import check_semantic_inconsistency
-from yoge_logics.job_classifier import classify_job_titles
+from yoge_logics.job_classifier import classify_job_titles_async
 from pydantic import BaseModel
 import io
 import json
@@ -183,7 +183,7 @@ class JobAnalysisRequest(BaseModel):
 @router.post("/job-analysis")
 async def perform_job_analysis(request: JobAnalysisRequest):
     try:
-        summary = classify_job_titles(request.titles)
+        summary = await classify_job_titles_async(request.titles)
         return {"job_function_summary": summary}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 
 class UserCreate(BaseModel):
     name: str
@@ -28,6 +28,12 @@ class ProjectConfig(BaseModel):
     auto_apply_high_confidence: bool = True
     email_verification_api: bool = False
     default_country_code: str = "IN"
+    # LLM cascade: only rows whose confidence is inside the band go to the LLM
+    llm_cascade_enabled: bool = False
+    llm_cascade_min_confidence: float = 0.0
+    llm_cascade_max_confidence: float = 0.7
+    llm_cascade_max_calls: int = 20
+    llm_cascade_max_tokens: int = 50000
 
 
 class ProjectCreate(BaseModel):
@@ -93,7 +99,8 @@ class RunCreate(BaseModel):
     mode: str = "auto"  # "auto" or "review"
 
 
-class RunResponse(BaseModel):
+# Listings use the summary; report_data is only sent by the detail endpoints
+class RunSummaryResponse(BaseModel):
     id: int
     run_number: int
     project_id: int
@@ -102,6 +109,8 @@ class RunResponse(BaseModel):
     row_count: Optional[int]
     column_count: Optional[int]
     columns: Optional[List[str]]
+    engine_version: Optional[str] = None
+    reused_from_run_id: Optional[int] = None
     quality_score_before: float
     quality_score_after: float
     total_issues: int
@@ -118,18 +127,26 @@ class RunResponse(BaseModel):
     completed_at: Optional[datetime]
     run_by: Optional[str]
     notes: Optional[str]
-    report_data: Optional[Dict[str, Any]] = None
     
     class Config:
         from_attributes = True
 
 
+class RunResponse(RunSummaryResponse):
+    report_data: Optional[Dict[str, Any]] = None
+
+
 class RunListResponse(BaseModel):
-    runs: List[RunResponse]
+    runs: List[RunSummaryResponse]
     total: int
     project_name: Optional[str] = None
 
 
+class RunReportResponse(BaseModel):
+    run_id: int
+    sections: Dict[str, Any]  # requested report_data keys -> values
+
+
 class RunUpdateNotes(BaseModel):
     notes: str
 
@@ -150,12 +167,37 @@ class RunComparisonMetric(BaseModel):
 
 
 class RunComparisonResponse(BaseModel):
-    run_1: RunResponse
-    run_2: RunResponse
+    run_1: RunSummaryResponse
+    run_2: RunSummaryResponse
     metrics: List[RunComparisonMetric]
     summary: str
 
 
+class RunDiffRequest(BaseModel):
+    run_id_1: int
+    run_id_2: int
+    key_column: Optional[str] = None  # default: a column unique in both runs, else a row hash
+    type: str = "cleaned"
+
+
+class RunDiffResponse(BaseModel):
+    run_1: RunSummaryResponse
+    run_2: RunSummaryResponse
+    aligned_on: str
+    rows_1: int
+    rows_2: int
+    added: int
+    removed: int
+    modified: int
+    unchanged: int
+    column_changes: Dict[str, int]
+    columns_added: List[str]
+    columns_removed: List[str]
+    added_rows: List[Dict[str, Any]]
+    removed_rows: List[Dict[str, Any]]
+    modified_rows: List[Dict[str, Any]]
+
+
 # ============== TIMELINE SCHEMAS ==============
 
 class TimelineDataPoint(BaseModel):
@@ -165,6 +207,7 @@ class TimelineDataPoint(BaseModel):
     quality_score: float
     issues_found: int
     fixes_applied: int
+    rolling_quality_score: Optional[float] = None
 
 
 class ProjectTimelineResponse(BaseModel):
@@ -173,6 +216,53 @@ class ProjectTimelineResponse(BaseModel):
     data_points: List[TimelineDataPoint]
     average_quality_score: float
     quality_trend: str  # "improving", "declining", "stable"
+    total_runs: int = 0
+    downsampled: bool = False
+
+
+# ============== DASHBOARD SCHEMAS ==============
+
+class ReviewBacklog(BaseModel):
+    runs: int
+    items: int  # changes needing review
+
+
+class DashboardTotals(BaseModel):
+    projects: int
+    runs: int
+    completed_runs: int
+    average_quality_score: Optional[float] = None
+    issues_found: int
+    fixes_applied: int
+    issues_by_type: Dict[str, int]
+    review_backlog: ReviewBacklog
+
+
+class DashboardDay(BaseModel):
+    day: date
+    runs: int
+    completed_runs: int
+    average_quality_score: Optional[float] = None
+    issues_found: int
+    fixes_applied: int
+
+
+class DashboardProject(BaseModel):
+    project_id: int
+    project_name: str
+    runs: int
+    average_quality_score: Optional[float] = None
+    issues_found: int
+    review_backlog: ReviewBacklog
+
+
+class DashboardResponse(BaseModel):
+    user_id: int
+    days: int
+    since: date
+    totals: DashboardTotals
+    daily: List[DashboardDay]
+    projects: List[DashboardProject]
 
 
 # ============== VERIFICATION SCHEMAS ==============
@@ -200,6 +290,11 @@ class UploadedFileResponse(BaseModel):
     row_count: Optional[int] = 0
     file_size: Optional[int] = 0
     project_id: Optional[int]
+    ingested_rows: Optional[int] = None
+    ingest_rows_per_sec: Optional[float] = None
+    content_hash: Optional[str] = None
+    csv_delimiter: Optional[str] = None
+    csv_encoding: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -219,7 +314,7 @@ class ReviewSuggestionResponse(BaseModel):
 
 class ReviewDecision(BaseModel):
     suggestion_id: int
-    action: str  # "accept", "reject"
+    action: str  # "accept", "reject" or "reset" (back to pending)
 
 class BulkReviewRequest(BaseModel):
     decisions: List[ReviewDecision]
@@ -237,5 +332,6 @@ class PaginatedRecords(BaseModel):
     data: List[Dict[str, Any]]
     page: int
     page_size: int
+    next_cursor: Optional[str] = None  # opaque; None on the last page
 
 
@@ -0,0 +1,163 @@
+import gzip
+import io
+import json
+import os
+import shutil
+from typing import Iterator, Optional
+
+import pandas as pd
+from fastapi.responses import StreamingResponse
+
+try:
+    import zstandard
+except ImportError:  # zstd storage falls back to gzip
+    zstandard = None
+
+# "gzip" (default), "zstd" (needs the zstandard package) or "none"
+ARTIFACT_COMPRESSION = os.getenv("ARTIFACT_COMPRESSION", "gzip").lower()
+ARTIFACT_GZIP_LEVEL = int(os.getenv("ARTIFACT_GZIP_LEVEL", "5"))
+ARTIFACT_ZSTD_LEVEL = int(os.getenv("ARTIFACT_ZSTD_LEVEL", "3"))
+STREAM_CHUNK_BYTES = 256 * 1024
+
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+if ARTIFACT_COMPRESSION == "zstd" and zstandard is None:
+    print("ARTIFACT_COMPRESSION=zstd but zstandard is not installed; using gzip")
+    ARTIFACT_COMPRESSION = "gzip"
+
+
+def compression_of(path: str) -> Optional[str]:
+    """Compression of a stored file, from its suffix (None for plain files)."""
+    for method, suffix in SUFFIXES.items():
+        if path.endswith(suffix):
+            return method
+    return None
+
+
+def base_path(path: str) -> str:
+    """Path without its compression suffix (data.csv.gz -> data.csv)."""
+    method = compression_of(path)
+    return path[:-len(SUFFIXES[method])] if method else path
+
+
+def stored_path(path: str) -> str:
+    """Where a new artifact for `path` is written under the current compression."""
+    if compression_of(path) or ARTIFACT_COMPRESSION not in SUFFIXES:
+        return path
+    return path + SUFFIXES[ARTIFACT_COMPRESSION]
+
+
+def find_artifact(path: str) -> Optional[str]:
+    """The stored file for an uncompressed name, compressed or not, if any."""
+    for candidate in [path] + [path + suffix for suffix in SUFFIXES.values()]:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def open_artifact(path: str, mode: str = "rb"):
+    """
+    Open a stored file, compressing/decompressing according to its suffix.
+    Binary modes return a byte stream; without "b" a UTF-8 text stream.
+    """
+    binary_mode = mode.replace("t", "")
+    if "b" not in binary_mode:
+        binary_mode += "b"
+    writing = "w" in binary_mode or "a" in binary_mode
+
+    method = compression_of(path)
+    if method == "gzip":
+        stream = gzip.open(path, binary_mode, compresslevel=ARTIFACT_GZIP_LEVEL)
+    elif method == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to open {path}")
+        raw = open(path, "wb" if writing else "rb")
+        if writing:
+            stream = zstandard.ZstdCompressor(level=ARTIFACT_ZSTD_LEVEL).stream_writer(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    else:
+        stream = open(path, binary_mode)
+
+    if "b" in mode:
+        return stream
+    return io.TextIOWrapper(stream, encoding="utf-8", newline="" if writing else None)
+
+
+def write_csv(df: pd.DataFrame, path: str) -> str:
+    """Write a DataFrame as (compressed) CSV; returns the stored path."""
+    path = stored_path(path)
+    with open_artifact(path, "wt") as f:
+        df.to_csv(f, index=False)
+    return path
+
+
+def read_csv(path: str, **kwargs) -> pd.DataFrame:
+    """pd.read_csv over a stored file, compressed or not."""
+    with open_artifact(path, "rb") as f:
+        return pd.read_csv(f, **kwargs)
+
+
+def write_json(obj, path: str) -> str:
+    """Write compact (compressed) JSON; returns the stored path."""
+    path = stored_path(path)
+    with open_artifact(path, "wt") as f:
+        json.dump(obj, f, separators=(",", ":"), default=str)
+    return path
+
+
+def read_json(path: str):
+    with open_artifact(path, "rt") as f:
+        return json.load(f)
+
+
+def copy_artifact(src: str, dst: str):
+    """Copy a stored file, re-encoding only if the two suffixes differ."""
+    if compression_of(src) == compression_of(dst):
+        shutil.copyfile(src, dst)
+        return
+    with open_artifact(src, "rb") as reader, open_artifact(dst, "wb") as writer:
+        shutil.copyfileobj(reader, writer, STREAM_CHUNK_BYTES)
+
+
+def iter_artifact(path: str, raw: bool = False) -> Iterator[bytes]:
+    """Chunks of a stored file: decompressed, or the bytes on disk with raw=True."""
+    with (open(path, "rb") if raw else open_artifact(path, "rb")) as f:
+        while True:
+            chunk = f.read(STREAM_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> set:
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        token, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if token:
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+def download_response(path: str, filename: str, accept_encoding: Optional[str] = None,
+                      media_type: str = "text/csv") -> StreamingResponse:
+    """
+    Stream a stored file as a download. Compressed content is passed through
+    untouched (Content-Encoding) when the client accepts that encoding and
+    decompressed on the fly otherwise.
+    """
+    method = compression_of(path)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{os.path.basename(base_path(filename))}"',
+        "Vary": "Accept-Encoding"
+    }
+    if method is None or method in _accepted_encodings(accept_encoding):
+        if method:
+            headers["Content-Encoding"] = method
+        headers["Content-Length"] = str(os.path.getsize(path))
+        body = iter_artifact(path, raw=True)
+    else:
+        body = iter_artifact(path)
+    return StreamingResponse(body, media_type=media_type, headers=headers)
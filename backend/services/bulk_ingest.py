@@ -0,0 +1,141 @@
+import io
+import json
+import os
+import time
+
+import pandas as pd
+from sqlalchemy import JSON, delete, update
+
+import models
+from services.artifact_store import open_artifact
+from services.duplicate_groups import clear_duplicate_groups
+from services.query_cache import invalidate_file
+
+# Rows read from the CSV and sent to the database per round-trip
+INGEST_CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "50000"))
+
+
+def _csv_field(value):
+    # COPY's csv format reads an unquoted empty field as NULL and a quoted one
+    # as an empty string, so every non-NULL string is quoted
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    return str(value)
+
+
+def _copy_rows(conn, table, columns, rows):
+    """
+    Write rows (tuples of column values, JSON already serialized) to `table`.
+
+    On PostgreSQL this is a single COPY ... FROM STDIN per chunk; other
+    backends fall back to one executemany INSERT per chunk. No ORM objects
+    are built either way.
+    """
+    if not rows:
+        return
+    if conn.dialect.name == "postgresql":
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write(",".join(_csv_field(v) for v in row))
+            buffer.write("\n")
+        buffer.seek(0)
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
+    else:
+        json_columns = {c.name for c in table.columns if isinstance(c.type, JSON)}
+        conn.execute(table.insert(), [
+            {col: (json.loads(v) if col in json_columns and v is not None else v) for col, v in zip(columns, row)}
+            for row in rows
+        ])
+
+
+def _stats(rows, started):
+    seconds = max(time.perf_counter() - started, 1e-9)
+    return {"rows": rows, "seconds": round(seconds, 3), "rows_per_sec": round(rows / seconds, 1)}
+
+
+def ingest_raw_records(engine, file_id, file_path, chunk_rows=None, csv_options=None):
+    """
+    Stream a CSV into raw_records.
+
+    The file is read chunk_rows at a time; each chunk is serialized to JSON
+    by pandas (NaN/inf become null) and copied straight into the table, so
+    memory stays bounded by one chunk. Everything runs in one transaction,
+    replacing any rows a previous attempt left for this file.
+
+    Returns {"rows", "seconds", "rows_per_sec"}.
+    """
+    chunk_rows = chunk_rows or INGEST_CHUNK_ROWS
+    table = models.RawRecord.__table__
+    started = time.perf_counter()
+    total = 0
+
+    with engine.begin() as conn, open_artifact(file_path, "rb") as source:
+        conn.execute(delete(table).where(table.c.file_id == file_id))
+        clear_duplicate_groups(conn, file_id, source="raw")
+        for chunk in pd.read_csv(source, chunksize=chunk_rows, **(csv_options or {})):
+            lines = chunk.to_json(orient="records", lines=True).splitlines()
+            _copy_rows(conn, table, ("file_id", "row_index", "data"), [
+                (file_id, total + i, line) for i, line in enumerate(lines)
+            ])
+            total += len(lines)
+
+    return _stats(total, started)
+
+
+def ingest_review_suggestions(engine, file_id, changes, chunk_rows=None):
+    """
+    Replace the review suggestions of a file with the pipeline's `changes`,
+    copied in chunks within one transaction.
+
+    Returns {"rows", "seconds", "rows_per_sec"}.
+    """
+    chunk_rows = chunk_rows or INGEST_CHUNK_ROWS
+    table = models.ReviewSuggestion.__table__
+    columns = ("file_id", "row_index", "column_name", "original_value", "suggested_value",
+               "confidence_score", "issue_type", "status")
+    started = time.perf_counter()
+
+    with engine.begin() as conn:
+        conn.execute(delete(table).where(table.c.file_id == file_id))
+        for start in range(0, len(changes), chunk_rows):
+            _copy_rows(conn, table, columns, [
+                (file_id, c["row_index"], c["column"], str(c["original_value"]), str(c["cleaned_value"]),
+                 c["confidence"], c["fix_type"], "pending")
+                for c in changes[start:start + chunk_rows]
+            ])
+
+    return _stats(len(changes), started)
+
+
+def run_raw_ingest(engine, file_id, file_path, csv_options=None):
+    """
+    Background task: ingest an uploaded file and record the outcome on its
+    UploadedFile row (row_count, ingested_rows, ingest_rows_per_sec, status).
+    """
+    files = models.UploadedFile.__table__
+    try:
+        stats = ingest_raw_records(engine, file_id, file_path, csv_options=csv_options)
+        print(f"Ingested file {file_id}: {stats['rows']} rows in {stats['seconds']}s "
+              f"({stats['rows_per_sec']} rows/sec)")
+        values = {
+            "status": models.ProcessingStatus.PENDING.value,
+            "row_count": stats["rows"],
+            "ingested_rows": stats["rows"],
+            "ingest_rows_per_sec": stats["rows_per_sec"],
+            "ingest_error": None
+        }
+    except Exception as e:
+        print(f"Ingestion failed for file {file_id}: {e}")
+        values = {"status": models.ProcessingStatus.FAILED.value, "ingest_error": str(e)[:1000]}
+
+    with engine.begin() as conn:
+        conn.execute(update(files).where(files.c.id == file_id).values(**values))
+    invalidate_file(file_id)
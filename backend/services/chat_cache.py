@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from rapidfuzz import fuzz, process
+
+CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "2000"))
+# 0-100 rapidfuzz score; near-identical phrasings at or above it count as hits
+CHAT_CACHE_SIMILARITY = float(os.getenv("CHAT_CACHE_SIMILARITY", "92"))
+
+
+def normalize_message(message: str) -> str:
+    message = message.lower()
+    message = re.sub(r"[^\w\s]", " ", message)
+    return re.sub(r"\s+", " ", message).strip()
+
+
+def context_hash(context: Optional[dict]) -> str:
+    if not context:
+        return ""
+    payload = json.dumps(context, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ChatResponseCache:
+    """
+    LRU + TTL cache of chatbot answers.
+
+    Entries are keyed by (normalized message, page_context, data-context hash).
+    Exact keys are a dict lookup; on a miss, messages cached under the same
+    page and data context are fuzzy-matched, so "How do I upload a file?" and
+    "how do i upload a file" share one answer.
+    """
+
+    def __init__(self, ttl=CHAT_CACHE_TTL_SECONDS, max_entries=CHAT_CACHE_MAX_ENTRIES,
+                 similarity=CHAT_CACHE_SIMILARITY):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self._entries = OrderedDict()   # key -> entry
+        self._scopes = {}               # (page_context, ctx_hash) -> {normalized message: key}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.lookup_seconds = 0.0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            scope = self._scopes.get(key[1:])
+            if scope is not None:
+                scope.pop(key[0], None)
+                if not scope:
+                    del self._scopes[key[1:]]
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry["stored_at"] > self.ttl:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, message: str, page_context: Optional[str], context: Optional[dict]) -> Optional[dict]:
+        """Return the cached payload for a question, or None."""
+        started = time.perf_counter()
+        normalized = normalize_message(message)
+        scope_key = (page_context or "", context_hash(context))
+        now = time.time()
+
+        with self._lock:
+            entry = self._live((normalized, *scope_key), now)
+            if entry is not None:
+                self.exact_hits += 1
+            elif self.similarity < 100 and scope_key in self._scopes:
+                match = process.extractOne(
+                    normalized, list(self._scopes[scope_key].keys()),
+                    scorer=fuzz.token_sort_ratio, score_cutoff=self.similarity
+                )
+                if match is not None:
+                    entry = self._live((match[0], *scope_key), now)
+                    if entry is not None:
+                        self.similar_hits += 1
+
+            if entry is None:
+                self.misses += 1
+            else:
+                self.saved_seconds += entry["generation_seconds"]
+            self.lookup_seconds += time.perf_counter() - started
+            return dict(entry["payload"]) if entry is not None else None
+
+    def set(self, message: str, page_context: Optional[str], context: Optional[dict],
+            payload: dict, generation_seconds: float):
+        normalized = normalize_message(message)
+        scope_key = (page_context or "", context_hash(context))
+        key = (normalized, *scope_key)
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = {
+                "payload": payload,
+                "stored_at": time.time(),
+                "generation_seconds": generation_seconds
+            }
+            self._scopes.setdefault(scope_key, {})[normalized] = key
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.similar_hits
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "similarity_threshold": self.similarity,
+            "hits": hits,
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "latency_saved_ms": round(self.saved_seconds * 1000, 1),
+            "avg_lookup_ms": round(self.lookup_seconds / lookups * 1000, 3) if lookups else 0.0
+        }
+
+
+response_cache = ChatResponseCache()
@@ -0,0 +1,361 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import List, Optional
+
+import httpx
+
+LOCAL_URL = os.getenv("LOCAL_LLM_URL", "http://localhost:9000/chat/completions")
+LOCAL_MODEL = os.getenv("LOCAL_LLM_MODEL", "phi-3-mini")
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/chat")
+OLLAMA_MODEL = os.getenv("OLLAMA_CHAT_MODEL", "mistral:latest")
+
+GROQ_URL = os.getenv("GROQ_URL", "https://api.groq.com/openai/v1/chat/completions")
+GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+
+# Circuit breaker tuning
+FAILURE_THRESHOLD = int(os.getenv("CHAT_BREAKER_FAILURES", "3"))     # consecutive failures before opening
+OPEN_SECONDS = float(os.getenv("CHAT_BREAKER_OPEN_SECONDS", "30"))   # minimum time a breaker stays open
+PROBE_INTERVAL = float(os.getenv("CHAT_PROBE_INTERVAL", "15"))       # background probe period
+HEALTH_WINDOW = 200                                                  # outcomes kept per provider
+
+# Providers in configured priority order. Local and Groq speak the OpenAI
+# chat format, Ollama its own; each entry knows how to build a request.
+PROVIDERS = [
+    {"name": "local", "kind": "openai", "url": LOCAL_URL, "model": LOCAL_MODEL, "timeout": 300},
+    {"name": "ollama", "kind": "ollama", "url": OLLAMA_URL, "model": OLLAMA_MODEL, "timeout": 30},
+    {"name": "groq", "kind": "openai", "url": GROQ_URL, "model": GROQ_MODEL, "timeout": 30, "api_key": GROQ_API_KEY},
+]
+
+# Errors that mean "this provider failed, try the next one"
+PROVIDER_ERRORS = (httpx.HTTPError, KeyError, IndexError, ValueError)
+
+# Shared async client: one keep-alive pool for all chat traffic, so model
+# calls never block the event loop and don't pay a new TCP/TLS handshake.
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    if _http_client is not None:
+        await _http_client.aclose()
+
+
+def _provider_request(provider: dict, messages: List[dict], stream: bool, max_tokens: int = 1500) -> dict:
+    """Build httpx request kwargs for a provider."""
+    headers = {"Content-Type": "application/json"}
+    if provider.get("api_key"):
+        headers["Authorization"] = f"Bearer {provider['api_key']}"
+
+    if provider["kind"] == "ollama":
+        payload = {
+            "model": provider["model"],
+            "messages": messages,
+            "stream": stream,
+            "options": {"num_predict": max_tokens}
+        }
+    else:
+        payload = {
+            "model": provider["model"],
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": max_tokens,
+            "stream": stream
+        }
+
+    return {
+        "url": provider["url"],
+        "headers": headers,
+        "json": payload,
+        "timeout": httpx.Timeout(provider["timeout"], connect=5.0),
+    }
+
+
+def _parse_completion(provider: dict, result: dict) -> str:
+    if provider["kind"] == "ollama":
+        return result['message']['content']
+    return result['choices'][0]['message']['content']
+
+
+def _parse_stream_line(provider: dict, line: str) -> Optional[str]:
+    """Return the text delta carried by one streamed line, if any."""
+    line = line.strip()
+    if not line:
+        return None
+    if provider["kind"] == "ollama":
+        # Ollama streams newline-delimited JSON objects
+        chunk = json.loads(line)
+        return (chunk.get("message") or {}).get("content")
+    # OpenAI-compatible servers stream SSE "data:" lines
+    if not line.startswith("data:"):
+        return None
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return None
+    chunk = json.loads(data)
+    choices = chunk.get("choices") or [{}]
+    return (choices[0].get("delta") or {}).get("content")
+
+
+def _configured(provider: dict) -> bool:
+    """A provider that needs an API key is only usable once one is set."""
+    return "api_key" not in provider or bool(provider["api_key"])
+
+
+def _percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ProviderHealth:
+    """
+    Rolling success/latency record and circuit breaker for one provider.
+
+    closed    -> requests flow normally
+    open      -> provider is skipped; the background prober re-tests it
+    half_open -> open period elapsed; one request or probe at a time is let
+                 through to decide, concurrent ones skip the provider
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.outcomes = deque(maxlen=HEALTH_WINDOW)   # (ok, latency_seconds)
+        self.consecutive_failures = 0
+        self.state = "closed"
+        self.opened_at = None
+        self.last_error = None
+        self.total_requests = 0
+        self.total_failures = 0
+        self.probing = False   # a half-open trial request is in flight
+
+    def record_success(self, latency: float):
+        self.outcomes.append((True, latency))
+        self.total_requests += 1
+        self.consecutive_failures = 0
+        self.state = "closed"
+        self.opened_at = None
+
+    def record_failure(self, latency: float, error: Exception):
+        self.outcomes.append((False, latency))
+        self.total_requests += 1
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        self.last_error = str(error)[:200]
+        if self.state == "half_open" or self.consecutive_failures >= FAILURE_THRESHOLD:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def is_available(self) -> bool:
+        if self.state == "open" and time.monotonic() - self.opened_at >= OPEN_SECONDS:
+            self.state = "half_open"
+        return self.state == "closed" or (self.state == "half_open" and not self.probing)
+
+    def start_probe(self) -> bool:
+        """Claim the half-open trial slot if this provider is half-open; release with end_probe()."""
+        if self.state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def end_probe(self):
+        self.probing = False
+
+    def success_rate(self) -> float:
+        if not self.outcomes:
+            return 1.0
+        return sum(1 for ok, _ in self.outcomes if ok) / len(self.outcomes)
+
+    def latencies(self) -> List[float]:
+        return sorted(latency for ok, latency in self.outcomes if ok)
+
+    def snapshot(self) -> dict:
+        latencies = self.latencies()
+        return {
+            "name": self.name,
+            "state": self.state,
+            "success_rate": round(self.success_rate(), 3),
+            "consecutive_failures": self.consecutive_failures,
+            "requests": self.total_requests,
+            "failures": self.total_failures,
+            "latency_ms": {
+                "p50": _ms(_percentile(latencies, 50)),
+                "p95": _ms(_percentile(latencies, 95)),
+                "p99": _ms(_percentile(latencies, 99))
+            },
+            "last_error": self.last_error
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class ProviderRouter:
+    """
+    Routes chat requests to the healthiest provider.
+
+    Available providers are ordered by success rate, then median latency,
+    then configured priority. Providers with an open breaker are skipped;
+    if every breaker is open they are all tried as a last resort. Providers
+    missing their API key are left out entirely, so they are never tried,
+    probed or counted as failing.
+    """
+
+    def __init__(self, providers: List[dict]):
+        for provider in providers:
+            if not _configured(provider):
+                print(f"Chat provider '{provider['name']}' has no API key configured; skipping it")
+        self.providers = [p for p in providers if _configured(p)]
+        self.health = {p["name"]: ProviderHealth(p["name"]) for p in self.providers}
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def ordered(self) -> List[dict]:
+        def score(item):
+            priority, provider = item
+            health = self.health[provider["name"]]
+            median = _percentile(health.latencies(), 50)
+            # Untried providers rank after measured ones with the same success rate
+            return (-round(health.success_rate(), 1), median if median is not None else float("inf"), priority)
+
+        ranked = [p for _, p in sorted(enumerate(self.providers), key=score)]
+        available = [p for p in ranked if self.health[p["name"]].is_available()]
+        return available or ranked
+
+    def _attempts(self):
+        """
+        (provider, health, probe) in the order to try them. Availability is
+        rechecked as each is reached, so a half-open provider is only sent
+        the one request that holds its trial slot (probe=True; the caller
+        must end_probe() when it is done) and concurrent requests move on.
+        """
+        ordered = self.ordered()
+        last_resort = not any(self.health[p["name"]].is_available() for p in ordered)
+        for provider in ordered:
+            health = self.health[provider["name"]]
+            if health.is_available():
+                yield provider, health, health.start_probe()
+            elif last_resort:
+                yield provider, health, False
+
+    async def complete(self, messages: List[dict]) -> str:
+        """Return the first complete reply, trying providers in health order."""
+        client = get_http_client()
+        last_error: Optional[Exception] = None
+
+        for provider, health, probe in self._attempts():
+            started = time.monotonic()
+            try:
+                response = await client.post(**_provider_request(provider, messages, stream=False))
+                response.raise_for_status()
+                content = _parse_completion(provider, response.json())
+                health.record_success(time.monotonic() - started)
+                return content
+            except PROVIDER_ERRORS as e:
+                print(f"Chat provider '{provider['name']}' failed: {e}")
+                health.record_failure(time.monotonic() - started, e)
+                last_error = e
+            finally:
+                if probe:
+                    health.end_probe()
+
+        raise last_error or httpx.HTTPError("No chat providers configured")
+
+    async def stream(self, messages: List[dict]):
+        """
+        Yield text deltas as they arrive from the healthiest provider.
+        A provider is only abandoned for the next one if it fails before its
+        first token; after that the stream is committed to it. Latency is
+        recorded as time to first token.
+        """
+        client = get_http_client()
+        last_error: Optional[Exception] = None
+
+        for provider, health, probe in self._attempts():
+            started_at = time.monotonic()
+            started = False
+            try:
+                request = _provider_request(provider, messages, stream=True)
+                async with client.stream("POST", **request) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        delta = _parse_stream_line(provider, line)
+                        if delta:
+                            if not started:
+                                started = True
+                                health.record_success(time.monotonic() - started_at)
+                            yield delta
+                return
+            except PROVIDER_ERRORS as e:
+                print(f"Chat provider '{provider['name']}' stream failed: {e}")
+                if started:
+                    raise
+                health.record_failure(time.monotonic() - started_at, e)
+                last_error = e
+            finally:
+                if probe:
+                    health.end_probe()
+
+        raise last_error or httpx.HTTPError("No chat providers configured")
+
+    async def probe(self, provider: dict):
+        """Send a one-token request to check whether a provider is back."""
+        health = self.health[provider["name"]]
+        started = time.monotonic()
+        try:
+            request = _provider_request(provider, [{"role": "user", "content": "ping"}], stream=False, max_tokens=1)
+            request["timeout"] = httpx.Timeout(10.0, connect=3.0)
+            response = await get_http_client().post(**request)
+            response.raise_for_status()
+            health.record_success(time.monotonic() - started)
+        except PROVIDER_ERRORS as e:
+            health.record_failure(time.monotonic() - started, e)
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.sleep(PROBE_INTERVAL)
+            for provider in self.providers:
+                health = self.health[provider["name"]]
+                # Only re-test tripped breakers whose open period has elapsed,
+                # and not while a request is already trying one
+                if health.state != "closed" and health.is_available() and health.start_probe():
+                    try:
+                        await self.probe(provider)
+                    finally:
+                        health.end_probe()
+
+    def start_probing(self):
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def stop_probing(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "routing_order": [p["name"] for p in self.ordered()],
+            "providers": [self.health[p["name"]].snapshot() for p in self.providers]
+        }
+
+
+provider_router = ProviderRouter(PROVIDERS)
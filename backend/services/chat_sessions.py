@@ -0,0 +1,197 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+
+import models
+
+# Store selection and limits
+CHAT_SESSION_BACKEND = os.getenv("CHAT_SESSION_BACKEND", "memory")   # "memory" or "database"
+CHAT_SESSION_DB_URL = os.getenv("CHAT_SESSION_DB_URL")               # defaults to the app database
+CHAT_SESSION_TTL_HOURS = float(os.getenv("CHAT_SESSION_TTL_HOURS", "24"))
+CHAT_SESSION_MAX = int(os.getenv("CHAT_SESSION_MAX", "10000"))
+CHAT_SESSION_MAX_BYTES = int(os.getenv("CHAT_SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def new_session(session_id: str, page_context: Optional[str] = None) -> dict:
+    now = datetime.now()
+    return {
+        "session_id": session_id,
+        "history": [],
+        "page_context": page_context,
+        "created_at": now,
+        "last_active": now
+    }
+
+
+def _session_size(session: dict) -> int:
+    """Approximate memory footprint of a session, in bytes of message text."""
+    return 200 + sum(len(m.get("content", "")) for m in session.get("history", []))
+
+
+class InMemorySessionStore:
+    """
+    Process-local LRU + TTL store.
+
+    Sessions are kept in an OrderedDict in last-active order, so the least
+    recently used (and therefore the first to expire) is always at the front:
+    eviction for TTL, count and memory caps is O(1) per evicted session.
+    """
+
+    def __init__(self, ttl=timedelta(hours=CHAT_SESSION_TTL_HOURS), max_sessions=CHAT_SESSION_MAX,
+                 max_bytes=CHAT_SESSION_MAX_BYTES):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self._sessions = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, session_id):
+        self._sessions.pop(session_id, None)
+        self._bytes -= self._sizes.pop(session_id, 0)
+
+    def _evict(self, now):
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            expired = now - oldest["last_active"] > self.ttl
+            over_cap = len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes
+            if not (expired or over_cap):
+                break
+            self._remove(oldest_id)
+
+    def get(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if datetime.now() - session["last_active"] > self.ttl:
+                self._remove(session_id)
+                return None
+            # Not reordered: a read does not refresh last_active, and eviction
+            # and listing rely on the order following it (save() moves it)
+            return session
+
+    def save(self, session: dict):
+        with self._lock:
+            session_id = session["session_id"]
+            now = datetime.now()
+            session["last_active"] = now
+            self._remove(session_id)
+            self._sessions[session_id] = session
+            self._sizes[session_id] = _session_size(session)
+            self._bytes += self._sizes[session_id]
+            self._evict(now)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._remove(session_id)
+
+    def list_active(self, limit: int = 100) -> List[dict]:
+        """Most recently active sessions first; stops at the first expired one."""
+        with self._lock:
+            cutoff = datetime.now() - self.ttl
+            active = []
+            for session in reversed(self._sessions.values()):
+                if session["last_active"] < cutoff or len(active) >= limit:
+                    break
+                active.append(session)
+            return active
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "sessions": len(self._sessions), "bytes": self._bytes}
+
+
+class DatabaseSessionStore:
+    """
+    Store shared by all workers, on the app database or any SQLAlchemy URL
+    (e.g. sqlite:///data/chat_sessions.db). Lookups go by primary key and
+    listings by the last_active index; expired rows are purged periodically
+    instead of on every request.
+    """
+
+    PURGE_EVERY = 500  # saves between expired-row purges
+
+    def __init__(self, engine=None, ttl=timedelta(hours=CHAT_SESSION_TTL_HOURS)):
+        if engine is None:
+            from database import engine as app_engine
+            engine = app_engine
+        self.engine = engine
+        self.ttl = ttl
+        self.Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+        models.ChatSession.__table__.create(bind=engine, checkfirst=True)
+        self._saves = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _to_dict(row: models.ChatSession) -> dict:
+        data = row.data or {}
+        return {
+            "session_id": row.session_id,
+            "history": data.get("history", []),
+            "page_context": data.get("page_context"),
+            "created_at": row.created_at,
+            "last_active": row.last_active
+        }
+
+    def get(self, session_id: str) -> Optional[dict]:
+        with self.Session() as db:
+            row = db.get(models.ChatSession, session_id)
+            if row is None or datetime.now() - row.last_active > self.ttl:
+                return None
+            return self._to_dict(row)
+
+    def save(self, session: dict):
+        now = datetime.now()
+        session["last_active"] = now
+        with self.Session() as db:
+            db.merge(models.ChatSession(
+                session_id=session["session_id"],
+                data={"history": session["history"], "page_context": session.get("page_context")},
+                created_at=session.get("created_at") or now,
+                last_active=now
+            ))
+            db.commit()
+
+        with self._lock:
+            self._saves += 1
+            purge = self._saves % self.PURGE_EVERY == 0
+        if purge:
+            self.purge_expired()
+
+    def delete(self, session_id: str):
+        with self.Session() as db:
+            db.execute(delete(models.ChatSession).where(models.ChatSession.session_id == session_id))
+            db.commit()
+
+    def purge_expired(self):
+        cutoff = datetime.now() - self.ttl
+        with self.Session() as db:
+            db.execute(delete(models.ChatSession).where(models.ChatSession.last_active < cutoff))
+            db.commit()
+
+    def list_active(self, limit: int = 100) -> List[dict]:
+        cutoff = datetime.now() - self.ttl
+        with self.Session() as db:
+            rows = db.query(models.ChatSession).filter(
+                models.ChatSession.last_active >= cutoff
+            ).order_by(models.ChatSession.last_active.desc()).limit(limit).all()
+            return [self._to_dict(r) for r in rows]
+
+    def stats(self) -> dict:
+        return {"backend": "database", "url": self.engine.url.render_as_string(hide_password=True)}
+
+
+def create_session_store():
+    """Build the store selected by CHAT_SESSION_BACKEND."""
+    if CHAT_SESSION_BACKEND == "database":
+        engine = None
+        if CHAT_SESSION_DB_URL:
+            engine = create_engine(CHAT_SESSION_DB_URL, pool_pre_ping=True)
+        return DatabaseSessionStore(engine)
+    return InMemorySessionStore()
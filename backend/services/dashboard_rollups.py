@@ -0,0 +1,173 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import models
+
+# Keys of Run.issue_breakdown, mirrored as columns of user_daily_rollups
+ISSUE_TYPES = (
+    "invalid_emails", "invalid_phones", "missing_fields", "duplicates",
+    "company_fixes", "domain_fixes", "job_title_fixes"
+)
+COUNTERS = (
+    "runs", "completed_runs", "quality_score_sum", "issues_found", "fixes_applied",
+    *ISSUE_TYPES, "pending_reviews", "pending_review_items"
+)
+
+
+def run_contribution(run: models.Run) -> Dict[str, float]:
+    """What a run in its current state adds to its day's rollup row."""
+    breakdown = run.issue_breakdown or {}
+    contribution = {
+        "runs": 1,
+        "issues_found": run.total_issues or 0,
+        **{issue: breakdown.get(issue, 0) or 0 for issue in ISSUE_TYPES}
+    }
+    if run.status == "completed":
+        contribution["completed_runs"] = 1
+        contribution["quality_score_sum"] = run.quality_score_after or 0.0
+        contribution["fixes_applied"] = run.total_fixes or 0
+    elif run.status == "pending_review":
+        contribution["pending_reviews"] = 1
+        contribution["pending_review_items"] = run.needs_review_count or 0
+    return contribution
+
+
+def _bump(db: Session, run: models.Run, deltas: Dict[str, float]):
+    deltas = {key: value for key, value in deltas.items() if value}
+    if not deltas:
+        return
+    owner_id = db.query(models.Project.owner_id).filter(models.Project.id == run.project_id).scalar()
+    if owner_id is None:
+        return
+    table = models.UserDailyRollup.__table__
+    values = {counter: deltas.get(counter, 0) for counter in COUNTERS}
+    stmt = insert(table).values(
+        user_id=owner_id,
+        project_id=run.project_id,
+        day=(run.created_at or datetime.utcnow()).date(),
+        updated_at=datetime.utcnow(),
+        **values
+    )
+    # Concurrent completions on the same day add up instead of overwriting
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.project_id, table.c.day],
+        set_={
+            **{key: table.c[key] + stmt.excluded[key] for key in deltas},
+            "updated_at": stmt.excluded.updated_at
+        }
+    ))
+
+
+def record_run(db: Session, run: models.Run):
+    """Add a new run to its owner's rollups. The caller commits."""
+    _bump(db, run, run_contribution(run))
+
+
+def update_run(db: Session, run: models.Run, before: Dict[str, float]):
+    """
+    Apply a run's change of state, given run_contribution(run) from before
+    the change (e.g. review apply completing it). The caller commits.
+    """
+    after = run_contribution(run)
+    _bump(db, run, {key: after.get(key, 0) - before.get(key, 0) for key in COUNTERS})
+
+
+def remove_run(db: Session, run: models.Run):
+    """Subtract a run that is being deleted. The caller commits."""
+    _bump(db, run, {key: -value for key, value in run_contribution(run).items()})
+
+
+def _average(total: float, count: int) -> Optional[float]:
+    return round(total / count, 2) if count else None
+
+
+def user_dashboard(db: Session, user_id: int, days: int = 30) -> dict:
+    """
+    Dashboard overview of a user's active projects from one query over the
+    rollup rows: the last `days` days (runs per day, quality, issues by
+    type) plus the rows that still carry review backlog.
+    """
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    rollup = models.UserDailyRollup
+    rows = db.execute(
+        select(rollup, models.Project.name).join(
+            models.Project, models.Project.id == rollup.project_id
+        ).where(
+            rollup.user_id == user_id,
+            models.Project.is_active == True,
+            or_(rollup.day >= since, rollup.pending_reviews != 0, rollup.pending_review_items != 0)
+        )
+    ).all()
+
+    daily = defaultdict(lambda: defaultdict(float))
+    projects = {}
+    totals = defaultdict(float)
+    for row, project_name in rows:
+        project = projects.setdefault(row.project_id, {
+            "project_id": row.project_id,
+            "project_name": project_name,
+            **{key: 0 for key in COUNTERS}
+        })
+        # Backlog counts over all days; activity only within the window
+        project["pending_reviews"] += row.pending_reviews
+        project["pending_review_items"] += row.pending_review_items
+        if row.day < since:
+            continue
+        for key in COUNTERS:
+            if key not in ("pending_reviews", "pending_review_items"):
+                project[key] += getattr(row, key)
+        for key in ("runs", "completed_runs", "quality_score_sum", "issues_found", "fixes_applied"):
+            daily[row.day][key] += getattr(row, key)
+
+    for project in projects.values():
+        for key in COUNTERS:
+            totals[key] += project[key]
+
+    return {
+        "user_id": user_id,
+        "days": days,
+        "since": since,
+        "totals": {
+            "projects": len(projects),
+            "runs": int(totals["runs"]),
+            "completed_runs": int(totals["completed_runs"]),
+            "average_quality_score": _average(totals["quality_score_sum"], int(totals["completed_runs"])),
+            "issues_found": int(totals["issues_found"]),
+            "fixes_applied": int(totals["fixes_applied"]),
+            "issues_by_type": {issue: int(totals[issue]) for issue in ISSUE_TYPES},
+            "review_backlog": {
+                "runs": int(totals["pending_reviews"]),
+                "items": int(totals["pending_review_items"])
+            }
+        },
+        "daily": [
+            {
+                "day": day,
+                "runs": int(values["runs"]),
+                "completed_runs": int(values["completed_runs"]),
+                "average_quality_score": _average(values["quality_score_sum"], int(values["completed_runs"])),
+                "issues_found": int(values["issues_found"]),
+                "fixes_applied": int(values["fixes_applied"])
+            }
+            for day, values in sorted(daily.items())
+        ],
+        "projects": [
+            {
+                "project_id": project["project_id"],
+                "project_name": project["project_name"],
+                "runs": project["runs"],
+                "average_quality_score": _average(project["quality_score_sum"], project["completed_runs"]),
+                "issues_found": project["issues_found"],
+                "review_backlog": {
+                    "runs": project["pending_reviews"],
+                    "items": project["pending_review_items"]
+                }
+            }
+            for project in sorted(projects.values(), key=lambda p: p["project_name"])
+        ]
+    }
@@ -10,8 +10,23 @@ from src.job_mapper import map_job_title
 from src.scorer import calculate_quality_score
 from src.phone_verification import validate_phone, fix_phone_number
 from src.email_verification import validate_email, fix_email
+from src.llm_corrector import LLMBudget, is_llm_configured, llm_suggest_fixes_batch
+from services.artifact_store import read_csv
 
-def run_pipeline(source, auto_apply=True, verify_emails_api=False):
+# Bump whenever a change to the pipeline alters its output for the same
+# input; runs are only reused across identical engine versions
+ENGINE_VERSION = os.getenv("ENGINE_VERSION", "2026.10.1")
+
+# Defaults for the LLM cascade stage; projects override them through their config
+LLM_CASCADE_DEFAULTS = {
+    "min_confidence": 0.0,
+    "max_confidence": 0.7,
+    "max_calls": 20,
+    "max_tokens": 50000
+}
+
+def run_pipeline(source, auto_apply=True, verify_emails_api=False, llm_cascade=None, csv_options=None,
+                 return_original=False):
     """
     Run the data quality pipeline.
     
@@ -19,9 +34,15 @@ def run_pipeline(source, auto_apply=True, verify_emails_api=False):
         source: Path to the CSV file (str) or file-like object (bytes/buffer)
         auto_apply: If True, auto-apply high confidence fixes. If False, only collect changes for review.
         verify_emails_api: If True, use external API to verify email existence (slower but more accurate)
+        llm_cascade: Optional dict enabling the LLM cascade stage (see LLM_CASCADE_DEFAULTS).
+            Only rows whose confidence falls in the band are sent to the LLM corrector.
+        csv_options: Optional pd.read_csv arguments (sep, encoding) sniffed at upload.
+        return_original: If True, also return the DataFrame as read, before any fix,
+            so callers need not parse the file again.
     
     Returns:
-        tuple: (cleaned_df, report_dict)
+        tuple: (cleaned_df, report_dict), or (cleaned_df, report_dict, original_df)
+        with return_original. The frames are None when the file could not be read.
     """
     try:
         # Handle bytes/buffer vs file path
@@ -29,13 +50,18 @@ def run_pipeline(source, auto_apply=True, verify_emails_api=False):
             source = io.BytesIO(source)
             
         # Handle malformed CSVs with inconsistent columns
-        df = pd.read_csv(source, on_bad_lines='warn')
+        if isinstance(source, str):
+            df = read_csv(source, on_bad_lines='warn', **(csv_options or {}))
+        else:
+            df = pd.read_csv(source, on_bad_lines='warn', **(csv_options or {}))
     except Exception as e:
         print(f"Error reading CSV: {e}")
-        return None, {"error": f"Invalid CSV: {str(e)}"}
+        error = {"error": f"Invalid CSV: {str(e)}"}
+        return (None, error, None) if return_original else (None, error)
 
     if df.empty:
-        return None, {"error": "CSV file is empty"}
+        error = {"error": "CSV file is empty"}
+        return (None, error, None) if return_original else (None, error)
 
     # Store original dataframe for comparison
     original_df = df.copy()
@@ -55,6 +81,9 @@ def run_pipeline(source, auto_apply=True, verify_emails_api=False):
     # Get column names for dynamic detection
     columns_lower = {col.lower(): col for col in df.columns}
 
+    # Confidence of the rule-based role mapping per row, for the LLM cascade
+    role_confidence = {}
+
     for idx, row in df.iterrows():
         # ========== 1. COMPANY NAME FIX ==========
         company_col = None
@@ -333,8 +362,9 @@ def run_pipeline(source, auto_apply=True, verify_emails_api=False):
         # ========== 6. ROLE FUNCTION MAPPING ==========
         if job_col:
             current_title = str(df.at[idx, job_col]) if job_col else ""
-            role, _ = map_job_title(current_title)
+            role, role_conf = map_job_title(current_title)
             df.at[idx, "role_function"] = role
+            role_confidence[int(idx)] = role_conf
 
         # ========== 7. CHECK FOR MISSING VALUES ==========
         for col in df.columns:
@@ -395,6 +425,19 @@ def run_pipeline(source, auto_apply=True, verify_emails_api=False):
                 }
                 changes.append(change)
 
+    # ========== 8b. LLM CASCADE (low-confidence rows only) ==========
+    llm_cascade_stats = None
+    if llm_cascade:
+        cascade_columns = {
+            "domain": domain_col,
+            "role_function": "role_function" if job_col else None
+        }
+        llm_fixes, llm_cascade_stats = _run_llm_cascade(
+            df, changes, role_confidence, cascade_columns,
+            {**LLM_CASCADE_DEFAULTS, **llm_cascade}, auto_apply
+        )
+        fixes += llm_fixes
+
     # ========== 9. JOB FUNCTION SUMMARY ==========
     job_function_summary = []
     if job_col:
@@ -437,7 +480,7 @@ def run_pipeline(source, auto_apply=True, verify_emails_api=False):
     original_data = json.loads(original_df.to_json(orient='records'))
     cleaned_data = json.loads(df.to_json(orient='records'))
     
-    return df, {
+    report = {
         "issues_found": issues,
         "fixes_applied": fixes,
         "quality_score": quality_score,
@@ -458,8 +501,122 @@ def run_pipeline(source, auto_apply=True, verify_emails_api=False):
             "email_invalid": email_invalid,
             "duplicates": duplicates_count
         },
-        "job_function_summary": job_function_summary
+        "job_function_summary": job_function_summary,
+        "llm_cascade": llm_cascade_stats
     }
+    return (df, report, original_df) if return_original else (df, report)
+
+
+def _run_llm_cascade(df, changes, role_confidence, columns, options, auto_apply):
+    """
+    Send only the hard cases to the LLM corrector.
+
+    A row is a candidate when one of its deterministic changes, or its role
+    mapping, has a confidence inside [min_confidence, max_confidence). The LLM
+    answers are merged back into `changes`: an in-band change is replaced when
+    the LLM is more confident, and a new role_function change is added for
+    rows whose role mapping was in band. The whole stage is capped by an
+    LLMBudget of max_calls requests and max_tokens tokens.
+
+    Returns:
+        tuple: (fixes_applied, stats_dict)
+    """
+    low = float(options["min_confidence"])
+    high = float(options["max_confidence"])
+
+    def in_band(conf):
+        return low <= float(conf) < high
+
+    candidate_rows = {c["row_index"] for c in changes if c["fix_type"] != "duplicate" and in_band(c["confidence"])}
+    candidate_rows.update(r for r, conf in role_confidence.items() if in_band(conf))
+    candidate_rows = sorted(candidate_rows)
+
+    stats = {
+        "candidate_rows": len(candidate_rows),
+        "changes_updated": 0,
+        "changes_added": 0,
+        "confidence_band": [low, high]
+    }
+    if not candidate_rows:
+        return 0, stats
+    if not is_llm_configured():
+        stats["skipped"] = "LLM not configured"
+        return 0, stats
+
+    budget = LLMBudget(options.get("max_calls"), options.get("max_tokens"))
+    records = json.loads(df.loc[candidate_rows].to_json(orient='records'))
+    suggestions = llm_suggest_fixes_batch(records, budget=budget)
+    stats.update(budget.to_dict())
+
+    changes_by_cell = {(c["row_index"], c["column"]): c for c in changes}
+    fixes = 0
+
+    for row_index, suggestion in zip(candidate_rows, suggestions):
+        for key, column in columns.items():
+            if not column:
+                continue
+            answer = suggestion.get(key) or {}
+            value = answer.get("suggested")
+            try:
+                conf = float(answer.get("confidence") or 0)
+            except (TypeError, ValueError):
+                continue
+            if not value or conf <= 0:
+                continue
+            value = str(value)
+            apply = conf >= 0.7 and auto_apply
+
+            existing = changes_by_cell.get((row_index, column))
+            if existing:
+                if not in_band(existing["confidence"]) or conf <= existing["confidence"]:
+                    continue
+                previously_applied = existing.get("applied")
+                existing["extra_info"] = {
+                    **(existing.get("extra_info") or {}),
+                    "source": "llm",
+                    "rule_suggestion": existing["cleaned_value"],
+                    "rule_confidence": existing["confidence"]
+                }
+                existing["cleaned_value"] = value
+                existing["confidence"] = conf
+                existing["status"] = "auto_accepted" if apply else "needs_review"
+                existing["applied"] = apply
+                if apply:
+                    df.at[row_index, column] = value
+                    if not previously_applied:
+                        fixes += 1
+                stats["changes_updated"] += 1
+            elif key == "role_function" and in_band(role_confidence.get(row_index, 1.0)):
+                current = str(df.at[row_index, column])
+                if value == current or conf <= role_confidence[row_index]:
+                    continue
+                change = {
+                    "id": str(uuid.uuid4()),
+                    "row_index": int(row_index),
+                    "column": column,
+                    "original_value": current,
+                    "cleaned_value": value,
+                    "confidence": conf,
+                    "fix_type": "role_function",
+                    "status": "auto_accepted" if apply else "needs_review",
+                    "applied": apply,
+                    "timestamp": datetime.now().isoformat(),
+                    "manual_override": None,
+                    "override_reason": None,
+                    "modified_by": None,
+                    "extra_info": {
+                        "source": "llm",
+                        "rule_confidence": role_confidence[row_index]
+                    }
+                }
+                changes.append(change)
+                changes_by_cell[(row_index, column)] = change
+                if apply:
+                    df.at[row_index, column] = value
+                    fixes += 1
+                stats["changes_added"] += 1
+
+    return fixes, stats
 
 def process_csv(file_bytes):
     """
@@ -0,0 +1,93 @@
+import hashlib
+import json
+
+from sqlalchemy import and_, delete, func, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+
+import models
+
+SOURCES = {"raw": models.RawRecord, "cleaned": models.CleanedRecord}
+
+
+def columns_key(source, columns):
+    payload = json.dumps([source, sorted(columns)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _normalized(model, column):
+    # Same normalization the pandas version used: trimmed and lower-cased
+    return func.lower(func.btrim(func.coalesce(model.data[column].as_string(), "")))
+
+
+def _materialize(db, model, source, file_id, columns, key):
+    """
+    Group the file's rows by the normalized values of `columns` in SQL
+    (GROUP BY ... HAVING count(*) > 1) and store the members of every group
+    in duplicate_rows. Nothing is loaded into the API process.
+    """
+    keyed = select(
+        model.row_index,
+        *[_normalized(model, c).label(f"k{i}") for i, c in enumerate(columns)]
+    ).where(model.file_id == file_id).cte("keyed")
+    key_columns = [keyed.c[f"k{i}"] for i in range(len(columns))]
+
+    groups = select(*key_columns).group_by(*key_columns).having(func.count() > 1).subquery("groups")
+    members = select(
+        literal(file_id), literal(key), keyed.c.row_index
+    ).select_from(
+        keyed.join(groups, and_(*[keyed.c[f"k{i}"] == groups.c[f"k{i}"] for i in range(len(columns))]))
+    )
+
+    db.add(models.DuplicateScan(file_id=file_id, columns_key=key, source=source, columns=list(columns)))
+    db.flush()  # claims the key; a concurrent request computing the same scan fails here
+    db.execute(insert(models.DuplicateRow).from_select(["file_id", "columns_key", "row_index"], members))
+
+    row_count = db.query(func.count()).select_from(models.DuplicateRow).filter(
+        models.DuplicateRow.file_id == file_id, models.DuplicateRow.columns_key == key
+    ).scalar()
+    group_count = db.query(func.count()).select_from(groups).scalar()
+    db.query(models.DuplicateScan).filter(
+        models.DuplicateScan.file_id == file_id, models.DuplicateScan.columns_key == key
+    ).update({"row_count": row_count, "group_count": group_count})
+    db.commit()
+
+
+def duplicate_rows(db, model, file_id, columns):
+    """
+    Select of row_index for rows of `model` (RawRecord or CleanedRecord)
+    that share their normalized `columns` values with another row of the
+    file. Computed once per (file, column set) and then read from the
+    duplicate_rows table until the file's records change.
+    """
+    source = "cleaned" if model is models.CleanedRecord else "raw"
+    key = columns_key(source, columns)
+
+    scanned = db.query(models.DuplicateScan.file_id).filter(
+        models.DuplicateScan.file_id == file_id, models.DuplicateScan.columns_key == key
+    ).first()
+    if not scanned:
+        try:
+            _materialize(db, model, source, file_id, columns, key)
+        except IntegrityError:
+            db.rollback()  # another request materialized the same scan
+
+    return select(models.DuplicateRow.row_index).where(
+        models.DuplicateRow.file_id == file_id, models.DuplicateRow.columns_key == key
+    )
+
+
+def clear_duplicate_groups(conn, file_id, source=None):
+    """
+    Drop materialized duplicate groups of a file (all, or one source) after
+    its records changed. `conn` may be a Connection or a Session.
+    """
+    scans = delete(models.DuplicateScan).where(models.DuplicateScan.file_id == file_id)
+    rows = delete(models.DuplicateRow).where(models.DuplicateRow.file_id == file_id)
+    if source is not None:
+        keys = select(models.DuplicateScan.columns_key).where(
+            models.DuplicateScan.file_id == file_id, models.DuplicateScan.source == source
+        )
+        rows = rows.where(models.DuplicateRow.columns_key.in_(keys))
+        scans = scans.where(models.DuplicateScan.source == source)
+    conn.execute(rows)
+    conn.execute(scans)
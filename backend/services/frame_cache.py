@@ -0,0 +1,102 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import pandas as pd
+
+# Total bytes (pandas deep memory usage) the cached frames may occupy
+FRAME_CACHE_MAX_BYTES = int(os.getenv("FRAME_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+
+def frame_size(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class FrameCache:
+    """
+    Process-level LRU cache of loaded run DataFrames with a memory budget.
+
+    Entries are keyed by tuples starting with (path, mtime_ns, ...), so a
+    rewritten file is never served stale: its new mtime gives new keys and
+    the old entries age out. When the cached frames exceed the budget the
+    least recently used ones are evicted; a single frame larger than the
+    whole budget is returned but not kept.
+    """
+
+    def __init__(self, max_bytes=FRAME_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (size, frame)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def get(self, key) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, df: pd.DataFrame):
+        size = frame_size(df)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[0]
+            if size > self.max_bytes:
+                self.rejected += 1
+                return
+            self._entries[key] = (size, df)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (evicted_size, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_load(self, key, load: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Return the cached frame for `key`, loading and storing it on a miss."""
+        df = self.get(key)
+        if df is None:
+            df = load()
+            self.set(key, df)
+        return df
+
+    def invalidate(self, path: str):
+        """Drop every frame derived from `path`."""
+        path = os.path.abspath(path)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == path]:
+                self.bytes -= self._entries.pop(key)[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "rejected": self.rejected,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+frame_cache = FrameCache()
+
+
+def file_key(path: str, *parts) -> tuple:
+    """Cache key for something derived from the current version of `path`."""
+    return (os.path.abspath(path), os.stat(path).st_mtime_ns, *parts)
@@ -0,0 +1,185 @@
+import os
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.artifact_store import base_path
+from services.query_cache import query_cache
+
+# Review UI filter flags -> change fix_type (run reports use the pipeline's
+# fix types, which include duplicates)
+FILTER_FIX_TYPES = {
+    "duplicate": "duplicate",
+    "email": "email",
+    "phone": "phone",
+    "unify": "company",
+    "job_normalization": "job_title",
+    "fake_domain": "domain",
+}
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def issue_index_path(csv_path: str) -> str:
+    """Index file stored next to a run's cleaned CSV (data.csv[.gz] -> data.issues.npz)."""
+    root, _ = os.path.splitext(base_path(csv_path))
+    return root + ".issues.npz"
+
+
+def missing_rows(df: pd.DataFrame) -> np.ndarray:
+    """Sorted row numbers with any null or blank field."""
+    mask = df.replace(r'^\s*$', float('nan'), regex=True).isnull().any(axis=1)
+    return np.flatnonzero(mask.to_numpy()).astype(np.int64)
+
+
+def _union(arrays: Iterable[np.ndarray]) -> np.ndarray:
+    arrays = [a for a in arrays if len(a)]
+    if not arrays:
+        return _EMPTY
+    return arrays[0] if len(arrays) == 1 else np.unique(np.concatenate(arrays))
+
+
+class IssueIndex:
+    """
+    Sorted int64 arrays describing where a run's issues are.
+
+    - change_rows: row_index of every change, by position in report["changes"]
+    - fix:<fix_type> / status:<status>: sorted positions of the changes with
+      that fix type / status
+    - missing:<kind>: sorted rows of the original or cleaned data with a
+      missing field
+
+    Filters become unions (issue flags) and intersections (statuses) of these
+    arrays followed by a direct fetch, instead of a scan over every change.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+
+    @classmethod
+    def from_changes(cls, changes: List[dict], frames: Optional[Dict[str, pd.DataFrame]] = None) -> "IssueIndex":
+        """Build from a report's changes and optionally {"original": df, "cleaned": df}."""
+        change_rows = np.fromiter((c["row_index"] for c in changes), dtype=np.int64, count=len(changes))
+        groups = {}
+        for position, change in enumerate(changes):
+            groups.setdefault(f"fix:{change.get('fix_type')}", []).append(position)
+            groups.setdefault(f"status:{change.get('status')}", []).append(position)
+        arrays = {"change_rows": change_rows}
+        arrays.update({key: np.asarray(positions, dtype=np.int64) for key, positions in groups.items()})
+        for kind, df in (frames or {}).items():
+            if df is not None:
+                arrays[f"missing:{kind}"] = missing_rows(df)
+        return cls(arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "IssueIndex":
+        with np.load(path) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            np.savez_compressed(f, **self.arrays)
+
+    def get(self, key: str) -> np.ndarray:
+        return self.arrays.get(key, _EMPTY)
+
+    def change_positions(self, filter_dict: dict) -> np.ndarray:
+        """
+        Positions of the changes matching the issue flags (OR-ed), narrowed to
+        filter_dict["status"] (a status or list of statuses) when given.
+        """
+        fix_types = [fix for flag, fix in FILTER_FIX_TYPES.items() if filter_dict.get(flag)]
+        statuses = filter_dict.get("status") or []
+        if isinstance(statuses, str):
+            statuses = [statuses]
+
+        positions = _union(self.get(f"fix:{fix}") for fix in fix_types) if fix_types else None
+        if statuses:
+            by_status = _union(self.get(f"status:{status}") for status in statuses)
+            positions = by_status if positions is None else np.intersect1d(positions, by_status, assume_unique=True)
+        return _EMPTY if positions is None else positions
+
+    def rows(self, filter_dict: dict, kind: str) -> Optional[np.ndarray]:
+        """
+        Sorted rows with any selected issue: rows of the matching changes,
+        plus rows with a missing field when "missing_fields" is set.
+        Returns None if missing fields were asked for but are not indexed
+        for `kind`.
+        """
+        positions = self.change_positions(filter_dict)
+        rows = [np.unique(self.get("change_rows")[positions])] if len(positions) else []
+        if filter_dict.get("missing_fields"):
+            key = f"missing:{kind}"
+            if key not in self.arrays:
+                return None
+            rows.append(self.arrays[key])
+        return _union(rows)
+
+
+def write_issue_index(csv_path: str, changes: List[dict], frames: Optional[Dict[str, pd.DataFrame]] = None) -> Optional[IssueIndex]:
+    """Build and save the issue index of a run next to its cleaned CSV."""
+    try:
+        index = IssueIndex.from_changes(changes, frames)
+        index.save(issue_index_path(csv_path))
+        return index
+    except Exception as e:
+        print(f"Could not write issue index for {csv_path}: {e}")
+        return None
+
+
+def issue_index_version(csv_path: Optional[str]) -> Optional[int]:
+    """mtime of a run's saved issue index, for cache keys; None if there is none."""
+    if not csv_path:
+        return None
+    try:
+        return os.stat(issue_index_path(csv_path)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def load_issue_index(csv_path: str) -> Optional[IssueIndex]:
+    """Saved issue index of a run (cached until it is rewritten), or None."""
+    path = issue_index_path(csv_path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = ("issue_index", os.path.abspath(path), stat.st_mtime_ns)
+    return query_cache.get_or_compute(key, lambda: IssueIndex.load(path))
+
+
+def issue_index_for(csv_path: Optional[str], load_changes: Callable[[], List[dict]]) -> IssueIndex:
+    """
+    Issue index of a run: the saved one, or (legacy runs) one built from
+    load_changes() and saved next to the cleaned CSV for the next request.
+    """
+    index = load_issue_index(csv_path) if csv_path else None
+    if index is not None:
+        return index
+    changes = load_changes() or []
+    if csv_path and os.path.exists(csv_path):
+        index = write_issue_index(csv_path, changes)
+    return index or IssueIndex.from_changes(changes)
+
+
+def refresh_missing(csv_path: str, kind: str, df: pd.DataFrame):
+    """Re-index the missing-field rows of `kind` after its data was rewritten."""
+    index = load_issue_index(csv_path)
+    if index is None:
+        return
+    arrays = dict(index.arrays)
+    arrays[f"missing:{kind}"] = missing_rows(df)
+    try:
+        IssueIndex(arrays).save(issue_index_path(csv_path))
+    except Exception as e:
+        print(f"Could not update issue index for {csv_path}: {e}")
+
+
+def remove_issue_index(csv_path: str):
+    if not csv_path:
+        return
+    try:
+        os.remove(issue_index_path(csv_path))
+    except OSError:
+        pass
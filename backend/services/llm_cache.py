@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Persistent cache for LLM results so the same input is never sent twice.
+# SQLite keeps it on local disk, safe across threads and uvicorn workers.
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/cache/llm_cache.sqlite3")
+
+
+def content_hash(value):
+    """Stable SHA-256 of any JSON-serialisable value."""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Small key/value store for LLM responses, partitioned by namespace.
+    Values are stored as JSON. Lookups and writes are batched so a whole
+    classification batch costs one round-trip to the file.
+    """
+
+    def __init__(self, namespace, path=None):
+        self.namespace = namespace
+        self.path = path or LLM_CACHE_PATH
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " namespace TEXT NOT NULL,"
+                " cache_key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, cache_key))"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get_many(self, keys):
+        """Return {key: value} for the keys that are cached."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        if not keys:
+            return found
+        with self._lock, self._connect() as conn:
+            # SQLite caps bound parameters, so look up in slices
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" for _ in chunk)
+                rows = conn.execute(
+                    f"SELECT cache_key, value FROM llm_cache WHERE namespace = ? AND cache_key IN ({placeholders})",
+                    [self.namespace, *chunk],
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+        return found
+
+    def set_many(self, items):
+        """Store a {key: value} mapping, replacing existing entries."""
+        if not items:
+            return
+        now = time.time()
+        rows = [(self.namespace, k, json.dumps(v, ensure_ascii=False), now) for k, v in items.items()]
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO llm_cache (namespace, cache_key, value, created_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache WHERE namespace = ?", (self.namespace,))
@@ -0,0 +1,158 @@
+import base64
+import bisect
+import hashlib
+import io
+import json
+import os
+from typing import List, Optional
+
+import pandas as pd
+
+from services.query_cache import query_cache
+
+# Byte offset of every Nth data row is remembered when a CSV is indexed, so
+# any page can be read by seeking to a checkpoint and parsing < N extra rows
+CSV_CHECKPOINT_ROWS = int(os.getenv("CSV_CHECKPOINT_ROWS", "1000"))
+
+
+def filters_fingerprint(filters: Optional[str]) -> str:
+    """Short stable hash of a filters JSON string (key order does not matter)."""
+    if not filters:
+        return ""
+    try:
+        canonical = json.dumps(json.loads(filters), sort_keys=True)
+    except json.JSONDecodeError:
+        canonical = filters
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(last_key: int, fingerprint: str = "") -> str:
+    """Opaque cursor pointing just after `last_key` for the given filters."""
+    payload = json.dumps({"k": last_key, "f": fingerprint}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, fingerprint: str = "") -> int:
+    """
+    Return the last key of the previous page.
+    Raises ValueError for malformed cursors and for cursors issued under
+    different filters.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_key = int(payload["k"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if payload.get("f", "") != fingerprint:
+        raise ValueError("Cursor does not match the current filters")
+    return last_key
+
+
+def keyset_page(query, key_column, page_size: int, after: Optional[int] = None, offset: int = 0):
+    """
+    One page of `query` ordered by `key_column`.
+
+    With `after` (from a cursor) the page starts at key > after, which an
+    index on (file_id, key) serves directly at any depth; `offset` is only
+    for callers still paging by number. Returns (rows, has_more).
+    """
+    if after is not None:
+        query = query.filter(key_column > after)
+    query = query.order_by(key_column)
+    if after is None and offset:
+        query = query.offset(offset)
+    rows = query.limit(page_size + 1).all()
+    return rows[:page_size], len(rows) > page_size
+
+
+def _in_quotes_after(line: bytes, in_quotes: bool) -> bool:
+    """Quote state after `line`: an odd number of quotes toggles it ("" escapes count twice)."""
+    return in_quotes != (line.count(b'"') % 2 == 1)
+
+
+class CsvRowIndex:
+    """
+    Checkpointed byte offsets of a CSV's data rows.
+
+    Built in a single streaming pass that is aware of quoted fields spanning
+    lines; afterwards reading rows [start, start + count) only parses the
+    bytes between the surrounding checkpoints.
+    """
+
+    def __init__(self, path: str, checkpoint_rows: int = CSV_CHECKPOINT_ROWS):
+        self.path = path
+        self.checkpoint_rows = checkpoint_rows
+        self.offsets = []
+        self.total_rows = 0
+
+        with open(path, "rb") as f:
+            header = b""
+            in_quotes = False
+            while True:
+                line = f.readline()
+                if not line:
+                    break
+                header += line
+                in_quotes = _in_quotes_after(line, in_quotes)
+                if not in_quotes:
+                    break
+            self.header = header
+            self.columns = list(pd.read_csv(io.BytesIO(header), nrows=0).columns) if header.strip() else []
+
+            in_quotes = False
+            row_start = f.tell()
+            while True:
+                line = f.readline()
+                if not line:
+                    break
+                if not in_quotes and line.strip():
+                    if self.total_rows % checkpoint_rows == 0:
+                        self.offsets.append(row_start)
+                    self.total_rows += 1
+                in_quotes = _in_quotes_after(line, in_quotes)
+                row_start = f.tell()
+            self.size = row_start
+
+    def _read_block_range(self, first_block: int, last_block: int) -> pd.DataFrame:
+        """Parse checkpoint blocks first_block..last_block into a frame indexed by row number."""
+        start = self.offsets[first_block]
+        end = self.offsets[last_block + 1] if last_block + 1 < len(self.offsets) else self.size
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            body = f.read(end - start)
+        df = pd.read_csv(io.BytesIO(self.header + body))
+        df.index = range(first_block * self.checkpoint_rows, first_block * self.checkpoint_rows + len(df))
+        return df
+
+    def read_rows(self, start: int, count: int) -> pd.DataFrame:
+        """Rows [start, start + count), indexed by their row number in the file."""
+        if start >= self.total_rows or count <= 0:
+            return pd.DataFrame(columns=self.columns)
+        stop = min(start + count, self.total_rows)
+        df = self._read_block_range(start // self.checkpoint_rows, (stop - 1) // self.checkpoint_rows)
+        return df.loc[start:stop - 1]
+
+    def read_row_set(self, row_numbers: List[int]) -> pd.DataFrame:
+        """Specific rows (sorted row numbers), reading only the blocks that hold them."""
+        if not row_numbers:
+            return self.read_rows(self.total_rows, 0)
+        frames = []
+        blocks = sorted({n // self.checkpoint_rows for n in row_numbers})
+        for block in blocks:
+            frames.append(self._read_block_range(block, block))
+        df = pd.concat(frames)
+        return df.loc[[n for n in row_numbers if n in df.index]]
+
+
+def csv_row_index(path: str) -> CsvRowIndex:
+    """Cached CsvRowIndex for a file; rebuilt when the file changes on disk."""
+    stat = os.stat(path)
+    key = ("csv_index", os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    return query_cache.get_or_compute(key, lambda: CsvRowIndex(path))
+
+
+def page_after(sorted_keys: List[int], page_size: int, after: Optional[int] = None, offset: int = 0):
+    """Keyset page over an in-memory sorted key list. Returns (keys, has_more)."""
+    start = bisect.bisect_right(sorted_keys, after) if after is not None else offset
+    return sorted_keys[start:start + page_size], start + page_size < len(sorted_keys)
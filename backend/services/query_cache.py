@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "300"))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "5000"))
+
+
+class QueryCache:
+    """
+    Small in-process LRU + TTL cache for values that are expensive to compute
+    but cheap to keep: filtered row counts, CSV row indexes, filtered row ids.
+
+    Keys are tuples whose leading elements name the object they describe,
+    e.g. ("file", file_id, "review_count", filters_hash), so everything
+    derived from one file or run can be dropped with a prefix invalidation
+    when it changes.
+    """
+
+    def __init__(self, ttl=QUERY_CACHE_TTL_SECONDS, max_entries=QUERY_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic(), value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for `key`, computing and storing it on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, prefix):
+        """Drop every key starting with the tuple `prefix`."""
+        size = len(prefix)
+        with self._lock:
+            for key in [k for k in self._entries if k[:size] == prefix]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+query_cache = QueryCache()
+
+
+def invalidate_file(file_id):
+    """Forget cached counts and row sets of an uploaded file after it changed."""
+    query_cache.invalidate(("file", file_id))
@@ -0,0 +1,110 @@
+import json
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import String, and_, false, func, or_, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+
+import models
+from services.duplicate_groups import duplicate_rows
+
+# Review UI filter flags -> ReviewSuggestion.issue_type
+ISSUE_FILTERS = {
+    "email": "email",
+    "phone": "phone",
+    "unify": "company",
+    "job_normalization": "job_title",
+    "fake_domain": "domain",
+}
+
+
+def parse_filters(filters: Optional[str]) -> dict:
+    """
+    The `filters` query parameter as a dict. Malformed JSON is ignored (no
+    filtering); JSON that is not an object is rejected with a 400.
+    """
+    if not filters:
+        return {}
+    try:
+        parsed = json.loads(filters)
+    except json.JSONDecodeError as e:
+        print(f"Filter Error: {e}")
+        return {}
+    if not isinstance(parsed, dict):
+        raise HTTPException(status_code=400, detail="filters must be a JSON object")
+    return parsed
+
+
+def _jsonb(model):
+    # The column is declared JSON with a JSONB variant; coerce so the JSONB
+    # operators (@>, ?) are available and can use the GIN index on `data`
+    return type_coerce(model.data, JSONB)
+
+
+def record_columns(db, model, file_id):
+    """Column names of a file's records, taken from its first row."""
+    first = db.query(model.data).filter(model.file_id == file_id).order_by(model.row_index).first()
+    return list(first[0].keys()) if first and first[0] else []
+
+
+def missing_fields_condition(model, columns):
+    """Rows where any column is null or an empty string (GIN containment checks)."""
+    if not columns:
+        return false()
+    data = _jsonb(model)
+    return or_(*[data.contains({column: value}) for column in columns for value in (None, "")])
+
+
+def suggestion_rows(file_id, issue_types):
+    """row_index of rows with a review suggestion of one of `issue_types`."""
+    return select(models.ReviewSuggestion.row_index).where(
+        models.ReviewSuggestion.file_id == file_id,
+        models.ReviewSuggestion.issue_type.in_(issue_types)
+    ).distinct()
+
+
+def record_filter_condition(db, model, file_id, filter_dict) -> Optional[object]:
+    """
+    Translate the review UI filters into one SQL condition on `model`
+    (RawRecord or CleanedRecord), evaluated entirely by Postgres.
+
+    Issue flags (duplicate, email, phone, unify, job_normalization,
+    fake_domain, missing_fields) are OR-ed: a row matches if it has any of
+    the selected issues. `values` ({column: value}, exact match via JSONB
+    containment) and `search` (case-insensitive substring over the row's values)
+    narrow the result further.
+
+    Returns None when no filter is active.
+    """
+    issue_conditions = []
+
+    if filter_dict.get("duplicate"):
+        columns = [c for c in filter_dict.get("duplicate_columns") or [] if c]
+        if columns:
+            issue_conditions.append(model.row_index.in_(duplicate_rows(db, model, file_id, columns)))
+        else:
+            issue_conditions.append(model.row_index.in_(suggestion_rows(file_id, ["duplicate"])))
+
+    issue_types = [issue for flag, issue in ISSUE_FILTERS.items() if filter_dict.get(flag)]
+    if issue_types:
+        issue_conditions.append(model.row_index.in_(suggestion_rows(file_id, issue_types)))
+
+    if filter_dict.get("missing_fields"):
+        issue_conditions.append(missing_fields_condition(model, record_columns(db, model, file_id)))
+
+    conditions = []
+    if issue_conditions:
+        conditions.append(or_(*issue_conditions))
+
+    values = filter_dict.get("values")
+    if isinstance(values, dict) and values:
+        conditions.append(_jsonb(model).contains(values))
+
+    search = filter_dict.get("search")
+    if search:
+        # Values only (column names never match); record_values_text comes
+        # from migration 0009, with a trigram index when pg_trgm is installed
+        values_text = func.record_values_text(_jsonb(model), type_=String)
+        conditions.append(values_text.icontains(str(search), autoescape=True))
+
+    return and_(*conditions) if conditions else None
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import models
+from services.artifact_store import copy_artifact
+from services.issue_index import issue_index_path
+from services.run_artifacts import artifact_path
+
+
+def config_hash(config: dict) -> str:
+    """sha256 of the effective pipeline settings (key order does not matter)."""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Per-key locks: while one request holds a key, others with the same key
+    wait, then find its committed result instead of redoing the work.
+    Locks are dropped as soon as nobody holds or waits for them.
+
+    The in-process lock only covers one worker. Given a PostgreSQL session,
+    hold() also takes a transaction-level advisory lock on the key, so
+    requests in other workers or hosts wait too; it is released when that
+    session commits or rolls back, so commit the result inside the block.
+    """
+
+    def __init__(self):
+        self._locks = {}   # key -> [lock, holders + waiters]
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def hold(self, key, db: Optional[Session] = None):
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+        try:
+            if db is not None and db.get_bind().dialect.name == "postgresql":
+                db.execute(
+                    text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+                    {"key": json.dumps(key, default=str)}
+                )
+            yield
+        finally:
+            entry[0].release()
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+
+run_flight = SingleFlight()
+
+
+def find_reusable_run(db: Session, owner_id: int, content_hash: str, cfg_hash: str,
+                      engine_version: str) -> Optional[models.Run]:
+    """
+    Latest run of the owner's projects with the same content, config and
+    engine version whose pipeline output is still on disk. Runs whose
+    cleaned file was rewritten by a manual review are not reused.
+    """
+    candidates = db.query(models.Run).join(models.Project).filter(
+        models.Project.owner_id == owner_id,
+        models.Run.content_hash == content_hash,
+        models.Run.config_hash == cfg_hash,
+        models.Run.engine_version == engine_version,
+        models.Run.changelog_path.is_(None)
+    ).order_by(models.Run.created_at.desc()).limit(5).all()
+
+    for run in candidates:
+        if run.cleaned_file_path and os.path.exists(run.cleaned_file_path):
+            return run
+    return None
+
+
+def copy_run_outputs(source: models.Run, original_path: str, cleaned_path: str):
+    """
+    Copy a run's cleaned CSV and derived files (Parquet artifacts, issue
+    index) to the paths of a new run, so either run can be deleted on its
+    own. Copies get fresh mtimes, newer than the new upload.
+    """
+    copy_artifact(source.cleaned_file_path, cleaned_path)
+    pairs = [
+        (artifact_path(source.cleaned_file_path), artifact_path(cleaned_path)),
+        (issue_index_path(source.cleaned_file_path), issue_index_path(cleaned_path)),
+    ]
+    if source.original_file_path:
+        pairs.append((artifact_path(source.original_file_path), artifact_path(original_path)))
+    for src, dst in pairs:
+        if os.path.exists(src):
+            copy_artifact(src, dst)
@@ -0,0 +1,91 @@
+import time
+
+from sqlalchemy import Integer, String, column, delete, text, update, values
+
+import models
+from services.duplicate_groups import clear_duplicate_groups
+from services.query_cache import invalidate_file
+
+# Review decision action -> ReviewSuggestion.status
+DECISION_STATUS = {"accept": "accepted", "reject": "rejected", "reset": "pending"}
+
+
+def apply_review_decisions(db, file_id, decisions):
+    """
+    Apply many accept/reject decisions with one UPDATE ... FROM (VALUES ...).
+    Suggestions that do not belong to the file are left untouched.
+    Returns the number of suggestions updated.
+    """
+    if not decisions:
+        return 0
+    table = models.ReviewSuggestion.__table__
+    decided = values(
+        column("id", Integer), column("status", String), name="decided"
+    ).data([(d.suggestion_id, DECISION_STATUS[d.action]) for d in decisions])
+
+    result = db.execute(
+        update(table)
+        .where(table.c.id == decided.c.id, table.c.file_id == file_id)
+        .values(status=decided.c.status)
+    )
+    db.commit()
+    invalidate_file(file_id)
+    return result.rowcount
+
+
+# Raw row JSON with every accepted suggestion of the row merged over it.
+# For several accepted suggestions on one cell the most confident one wins,
+# as jsonb_object_agg keeps the last value per key. Duplicate suggestions
+# (column "ROW") patch nothing: an accepted one removes the row instead.
+# Suggested values are stored as text; they replace numbers and booleans as
+# the same JSON type when they parse as one, and as strings otherwise.
+FINALIZE_SQL = text("""
+    INSERT INTO cleaned_records (file_id, row_index, data)
+    SELECT r.file_id, r.row_index, r.data || COALESCE(a.patch, '{}'::jsonb)
+    FROM raw_records r
+    LEFT JOIN (
+        SELECT s.row_index,
+               jsonb_object_agg(
+                   s.column_name,
+                   CASE
+                       WHEN jsonb_typeof(raw.data -> s.column_name) = 'number'
+                            AND s.suggested_value ~ '^-?(0|[1-9][0-9]*)([.][0-9]+)?([eE][+-]?[0-9]+)?$'
+                           THEN s.suggested_value::jsonb
+                       WHEN jsonb_typeof(raw.data -> s.column_name) = 'boolean'
+                            AND lower(s.suggested_value) IN ('true', 'false')
+                           THEN lower(s.suggested_value)::jsonb
+                       ELSE to_jsonb(s.suggested_value)
+                   END
+                   ORDER BY s.confidence_score NULLS FIRST, s.id
+               ) AS patch
+        FROM review_suggestions s
+        JOIN raw_records raw ON raw.file_id = s.file_id AND raw.row_index = s.row_index
+        WHERE s.file_id = :file_id AND s.status = 'accepted'
+          AND s.issue_type IS DISTINCT FROM 'duplicate' AND s.column_name <> 'ROW'
+        GROUP BY s.row_index
+    ) a ON a.row_index = r.row_index
+    WHERE r.file_id = :file_id
+      AND NOT EXISTS (
+          SELECT 1 FROM review_suggestions d
+          WHERE d.file_id = :file_id AND d.row_index = r.row_index
+            AND d.issue_type = 'duplicate' AND d.status = 'accepted'
+      )
+""")
+
+
+def build_cleaned_records(db, file_id):
+    """
+    Rebuild the cleaned records of a file entirely inside Postgres with one
+    INSERT ... SELECT, merging accepted suggestions into the raw JSON and
+    leaving out rows whose duplicate suggestion was accepted.
+    Returns {"rows", "accepted", "seconds"}.
+    """
+    started = time.perf_counter()
+    db.execute(delete(models.CleanedRecord).where(models.CleanedRecord.file_id == file_id))
+    clear_duplicate_groups(db, file_id, source="cleaned")
+    rows = db.execute(FINALIZE_SQL, {"file_id": file_id}).rowcount
+    accepted = db.query(models.ReviewSuggestion).filter(
+        models.ReviewSuggestion.file_id == file_id,
+        models.ReviewSuggestion.status == "accepted"
+    ).count()
+    return {"rows": rows, "accepted": accepted, "seconds": round(time.perf_counter() - started, 3)}
@@ -0,0 +1,245 @@
+import bisect
+import os
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+from services.artifact_store import base_path, compression_of, open_artifact, read_csv
+from services.frame_cache import file_key, frame_cache
+from services.pagination import csv_row_index
+from services.query_cache import query_cache
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # no artifacts are written; every read falls back to the CSV
+    pa = None
+    pq = None
+
+# Rows per Parquet row group; a page read decodes at most the groups it spans
+ARTIFACT_ROW_GROUP_ROWS = int(os.getenv("ARTIFACT_ROW_GROUP_ROWS", "10000"))
+# Run files up to this size on disk are loaded whole and kept in the frame
+# cache; larger ones are paged from disk
+FRAME_CACHE_MAX_FILE_BYTES = int(os.getenv("FRAME_CACHE_MAX_FILE_MB", "64")) * 1024 * 1024
+# Rough CSV compression ratio, to size compressed files against that limit
+COMPRESSED_SIZE_FACTOR = 5
+
+
+def artifact_path(csv_path: str) -> str:
+    """Parquet copy stored next to a run CSV (data.csv[.gz] -> data.parquet)."""
+    root, _ = os.path.splitext(base_path(csv_path))
+    return root + ".parquet"
+
+
+def current_artifact(csv_path: str) -> Optional[str]:
+    """Path of the run file's Parquet artifact if it is up to date, else None."""
+    # A Parquet copy older than its CSV (e.g. the cleaned file was rewritten
+    # by review apply) is stale and ignored until it is written again
+    if pq is None or not csv_path:
+        return None
+    path = artifact_path(csv_path)
+    try:
+        if os.stat(path).st_mtime_ns >= os.stat(csv_path).st_mtime_ns:
+            return path
+    except OSError:
+        pass
+    return None
+
+
+def _to_arrow(df: pd.DataFrame):
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Object columns mixing numbers and strings: store them as strings,
+        # keeping missing values missing
+        df = df.copy()
+        for col in df.columns:
+            if df[col].dtype == object:
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def write_artifact(df: pd.DataFrame, csv_path: str) -> Optional[str]:
+    """
+    Save a Parquet copy of a run's data next to its CSV. Call after the CSV
+    itself is written. Returns the artifact path, or None if pyarrow is not
+    installed or the frame could not be converted (readers fall back to CSV).
+    """
+    if pq is None:
+        return None
+    path = artifact_path(csv_path)
+    try:
+        pq.write_table(_to_arrow(df), path, row_group_size=ARTIFACT_ROW_GROUP_ROWS)
+        return path
+    except Exception as e:
+        print(f"Could not write Parquet artifact for {csv_path}: {e}")
+        return None
+
+
+def remove_artifact(csv_path: str):
+    if not csv_path:
+        return
+    try:
+        os.remove(artifact_path(csv_path))
+    except OSError:
+        pass
+
+
+class ParquetRowReader:
+    """
+    Row access to a Parquet artifact with the same interface as CsvRowIndex
+    (columns, total_rows, read_rows, read_row_set).
+
+    The file is memory-mapped and only the row groups covering the requested
+    rows are decoded, so a page costs about the same at any file size.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = pq.ParquetFile(path, memory_map=True)
+        metadata = self.file.metadata
+        self.columns = list(self.file.schema_arrow.names)
+        self.total_rows = metadata.num_rows
+        self.group_starts = []
+        start = 0
+        for i in range(metadata.num_row_groups):
+            self.group_starts.append(start)
+            start += metadata.row_group(i).num_rows
+
+    def _group_of(self, row: int) -> int:
+        return bisect.bisect_right(self.group_starts, row) - 1
+
+    def _read_groups(self, groups: List[int]) -> pd.DataFrame:
+        frames = []
+        for group in groups:
+            df = self.file.read_row_group(group).to_pandas()
+            df.index = range(self.group_starts[group], self.group_starts[group] + len(df))
+            frames.append(df)
+        return pd.concat(frames) if len(frames) > 1 else frames[0]
+
+    def read_rows(self, start: int, count: int) -> pd.DataFrame:
+        """Rows [start, start + count), indexed by their row number."""
+        if start >= self.total_rows or count <= 0:
+            return pd.DataFrame(columns=self.columns)
+        stop = min(start + count, self.total_rows)
+        first, last = self._group_of(start), self._group_of(stop - 1)
+        return self._read_groups(list(range(first, last + 1))).loc[start:stop - 1]
+
+    def read_row_set(self, row_numbers: List[int]) -> pd.DataFrame:
+        """Specific rows (sorted row numbers), decoding only the groups that hold them."""
+        if not row_numbers:
+            return self.read_rows(self.total_rows, 0)
+        groups = sorted({self._group_of(n) for n in row_numbers})
+        df = self._read_groups(groups)
+        return df.loc[[n for n in row_numbers if n in df.index]]
+
+
+class FrameRowReader:
+    """CsvRowIndex-compatible reader over a DataFrame already in memory."""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self.columns = list(frame.columns)
+        self.total_rows = len(frame)
+
+    def read_rows(self, start: int, count: int) -> pd.DataFrame:
+        return self.frame.iloc[start:start + max(count, 0)]
+
+    def read_row_set(self, row_numbers: List[int]) -> pd.DataFrame:
+        return self.frame.loc[[n for n in row_numbers if 0 <= n < self.total_rows]]
+
+
+def _cacheable(csv_path: str) -> bool:
+    size = os.path.getsize(csv_path) * (COMPRESSED_SIZE_FACTOR if compression_of(csv_path) else 1)
+    return size <= min(FRAME_CACHE_MAX_FILE_BYTES, frame_cache.max_bytes)
+
+
+def run_frame(csv_path: str, kind: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    A run file as a DataFrame for read-only use (do not modify it in place).
+
+    Files small enough for the frame cache are loaded whole once per version
+    (keyed by path, mtime and kind) and `columns` are selected from the
+    cached frame; larger files are read column-pruned on every call.
+    """
+    if not _cacheable(csv_path):
+        return read_run_frame(csv_path, columns=columns)
+    df = frame_cache.get_or_load(file_key(csv_path, kind), lambda: read_run_frame(csv_path))
+    return df[columns] if columns is not None else df
+
+
+def run_row_reader(csv_path: str, kind: Optional[str] = None):
+    """
+    Paged row reader for a run file. With a `kind` ("original"/"cleaned"),
+    files that fit the frame cache are served from the cached frame;
+    otherwise the Parquet artifact when it is current, else the checkpointed
+    CSV index. Compressed CSVs cannot be indexed by byte offset, so without
+    an artifact they are loaded as a frame. Cached until the file changes.
+    """
+    if kind is not None and _cacheable(csv_path):
+        return FrameRowReader(run_frame(csv_path, kind))
+    path = current_artifact(csv_path)
+    if path is None:
+        if compression_of(csv_path):
+            return FrameRowReader(run_frame(csv_path, kind or "data"))
+        return csv_row_index(csv_path)
+    stat = os.stat(path)
+    key = ("parquet_reader", os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    return query_cache.get_or_compute(key, lambda: ParquetRowReader(path))
+
+
+def iter_run_frames(csv_path: str, columns: Optional[List[str]] = None, chunk_rows: int = ARTIFACT_ROW_GROUP_ROWS,
+                    dtype=None) -> Iterator[pd.DataFrame]:
+    """
+    A run file in chunks of up to `chunk_rows` rows, indexed by row number,
+    so the whole file never has to be in memory. Reads Parquet record
+    batches when the artifact is current and CSV chunks otherwise (`dtype`
+    applies to the CSV only).
+    """
+    start = 0
+    path = current_artifact(csv_path)
+    if path is not None:
+        for batch in pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=chunk_rows, columns=columns):
+            df = batch.to_pandas()
+            df.index = range(start, start + len(df))
+            start += len(df)
+            yield df
+        return
+    with open_artifact(csv_path, "rb") as f:
+        for df in pd.read_csv(f, usecols=columns, chunksize=chunk_rows, dtype=dtype):
+            df.index = range(start, start + len(df))
+            start += len(df)
+            yield df
+
+
+def run_file_columns(csv_path: str) -> List[str]:
+    """Column names of a run file, from the artifact schema or the CSV header."""
+    path = current_artifact(csv_path)
+    if path is not None:
+        return list(pq.read_schema(path, memory_map=True).names)
+    with open_artifact(csv_path, "rb") as f:
+        return list(pd.read_csv(f, nrows=0).columns)
+
+
+def count_run_rows(csv_path: str) -> int:
+    """
+    Data rows in a run file: Parquet metadata when the artifact is current,
+    else a streamed pass over one column of the CSV.
+    """
+    path = current_artifact(csv_path)
+    if path is not None:
+        return pq.ParquetFile(path, memory_map=True).metadata.num_rows
+    first = run_file_columns(csv_path)[:1]
+    return sum(len(chunk) for chunk in iter_run_frames(csv_path, columns=first or None, dtype=str))
+
+
+def read_run_frame(csv_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Whole run file as a DataFrame, optionally only `columns`. Reads the
+    Parquet artifact (column-pruned, memory-mapped) when it is current and
+    parses the CSV otherwise.
+    """
+    path = current_artifact(csv_path)
+    if path is not None:
+        return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+    return read_csv(csv_path, usecols=columns)
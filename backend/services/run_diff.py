@@ -0,0 +1,182 @@
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from services.frame_cache import file_key
+from services.query_cache import query_cache
+from services.run_artifacts import run_frame
+
+# Rows listed per category (added / removed / modified) in a diff result
+DIFF_SAMPLE_ROWS = int(os.getenv("DIFF_SAMPLE_ROWS", "20"))
+# Column names tried first when no key column is given
+KEY_HINTS = ("id", "record_id", "customer_id", "email")
+# Leading rows sampled to judge whether a text column is repetitive
+HASH_SAMPLE_ROWS = 10000
+
+_ROW_HASH_PRIME = np.uint64(1099511628211)
+
+
+def _hash(series: pd.Series) -> np.ndarray:
+    # Factorizing first pays off for repetitive text (companies, titles)
+    # and doubles the cost for mostly unique text (emails, names)
+    categorize = True
+    if series.dtype == object and len(series) > HASH_SAMPLE_ROWS:
+        sample = series.iloc[:HASH_SAMPLE_ROWS]
+        categorize = sample.nunique() < HASH_SAMPLE_ROWS // 2
+    return pd.util.hash_pandas_object(series, index=False, categorize=categorize).to_numpy()
+
+
+def _column_hashes(a: pd.Series, b: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    uint64 value hashes of one column in both runs, comparable across them:
+    numbers are compared as numbers (1 == 1.0), anything else as text when
+    the two runs parsed the column differently.
+    """
+    if a.dtype != b.dtype:
+        if is_numeric_dtype(a) and is_numeric_dtype(b):
+            a, b = a.astype("float64"), b.astype("float64")
+        else:
+            a = a.astype(str).where(a.notna(), None)
+            b = b.astype(str).where(b.notna(), None)
+    return _hash(a), _hash(b)
+
+
+def _align(keys_1: np.ndarray, keys_2: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Match rows by key hash; repeated keys are paired in order of appearance.
+    Returns (matched rows of run 1, matched rows of run 2, rows only in
+    run 1, rows only in run 2), each sorted by row number of its run.
+    """
+    order_1 = np.argsort(keys_1, kind="stable")
+    order_2 = np.argsort(keys_2, kind="stable")
+    sorted_1, sorted_2 = keys_1[order_1], keys_2[order_2]
+    if (sorted_1[1:] != sorted_1[:-1]).all() and (sorted_2[1:] != sorted_2[:-1]).all():
+        # Unique keys (the usual case): a binary search per row
+        positions = np.minimum(np.searchsorted(sorted_2, keys_1), max(len(keys_2) - 1, 0))
+        found = sorted_2[positions] == keys_1 if len(keys_2) else np.zeros(len(keys_1), dtype=bool)
+        rows_1 = np.flatnonzero(found)
+        rows_2 = order_2[positions[found]]
+        matched_2 = np.zeros(len(keys_2), dtype=bool)
+        matched_2[rows_2] = True
+        return rows_1, rows_2, np.flatnonzero(~found), np.flatnonzero(~matched_2)
+
+    left = pd.DataFrame({"k": keys_1, "i": np.arange(len(keys_1))})
+    left["n"] = left.groupby("k", sort=False).cumcount()
+    right = pd.DataFrame({"k": keys_2, "j": np.arange(len(keys_2))})
+    right["n"] = right.groupby("k", sort=False).cumcount()
+    merged = left.merge(right, on=["k", "n"], how="outer", sort=False)
+
+    matched = merged["i"].notna() & merged["j"].notna()
+    pairs = merged.loc[matched, ["i", "j"]].astype(np.int64).sort_values("i")
+    removed = np.sort(merged.loc[merged["j"].isna(), "i"].astype(np.int64).to_numpy())
+    added = np.sort(merged.loc[merged["i"].isna(), "j"].astype(np.int64).to_numpy())
+    return pairs["i"].to_numpy(), pairs["j"].to_numpy(), removed, added
+
+
+def pick_key_column(df_1: pd.DataFrame, df_2: pd.DataFrame, columns: List[str]) -> Optional[str]:
+    """A shared column that is unique and never empty in both runs, or None."""
+    ordered = [c for c in KEY_HINTS if c in columns] + [c for c in columns if c not in KEY_HINTS]
+    for col in ordered:
+        if all(df[col].notna().all() and df[col].is_unique for df in (df_1, df_2)):
+            return col
+    return None
+
+
+def _native(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _records(df: pd.DataFrame, rows: np.ndarray) -> List[dict]:
+    sample = df.iloc[rows[:DIFF_SAMPLE_ROWS]]
+    return [{"row": int(row), "values": values} for row, values in zip(sample.index, sample.to_dict(orient="records"))]
+
+
+def diff_frames(df_1: pd.DataFrame, df_2: pd.DataFrame, key_column: Optional[str] = None) -> dict:
+    """
+    Cell-level diff of two runs' data.
+
+    Rows are aligned on `key_column` (or a column that is unique in both
+    runs), else on a hash of the whole row. Every shared column is hashed
+    once per run and compared as uint64 arrays over the aligned pairs, so
+    the cost is a few vectorized passes at any size. Row-hash alignment
+    can only tell unchanged rows from added/removed ones; modified rows
+    and per-column counts need a key.
+    """
+    columns = [c for c in df_1.columns if c in df_2.columns]
+    hashes = {c: _column_hashes(df_1[c], df_2[c]) for c in columns}
+
+    if key_column is None:
+        key_column = pick_key_column(df_1, df_2, columns)
+    if key_column is not None:
+        aligned_on = key_column
+        keys_1, keys_2 = hashes[key_column]
+    else:
+        aligned_on = "row_hash"
+        keys_1 = np.zeros(len(df_1), dtype=np.uint64)
+        keys_2 = np.zeros(len(df_2), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for col in columns:
+                h_1, h_2 = hashes[col]
+                keys_1 = keys_1 * _ROW_HASH_PRIME ^ h_1
+                keys_2 = keys_2 * _ROW_HASH_PRIME ^ h_2
+
+    rows_1, rows_2, removed, added = _align(keys_1, keys_2)
+
+    modified = np.zeros(len(rows_1), dtype=bool)
+    column_changes = {}
+    changed_by_column = {}
+    if key_column is not None:
+        for col in columns:
+            h_1, h_2 = hashes[col]
+            changed = h_1[rows_1] != h_2[rows_2]
+            count = int(changed.sum())
+            if count:
+                column_changes[col] = count
+                changed_by_column[col] = changed
+                modified |= changed
+
+    modified_samples = []
+    for position in np.flatnonzero(modified)[:DIFF_SAMPLE_ROWS]:
+        i, j = int(rows_1[position]), int(rows_2[position])
+        modified_samples.append({
+            "key": _native(df_1[key_column].iat[i]),
+            "row_1": i,
+            "row_2": j,
+            "changes": {
+                col: {"before": _native(df_1[col].iat[i]), "after": _native(df_2[col].iat[j])}
+                for col, changed in changed_by_column.items() if changed[position]
+            }
+        })
+
+    modified_count = int(modified.sum())
+    return {
+        "aligned_on": aligned_on,
+        "rows_1": len(df_1),
+        "rows_2": len(df_2),
+        "added": len(added),
+        "removed": len(removed),
+        "modified": modified_count,
+        "unchanged": len(rows_1) - modified_count,
+        "column_changes": column_changes,
+        "columns_added": [c for c in df_2.columns if c not in df_1.columns],
+        "columns_removed": [c for c in df_1.columns if c not in df_2.columns],
+        "added_rows": _records(df_2, added),
+        "removed_rows": _records(df_1, removed),
+        "modified_rows": modified_samples
+    }
+
+
+def diff_run_files(path_1: str, path_2: str, kind: str = "cleaned", key_column: Optional[str] = None) -> dict:
+    """
+    Diff two run files. Results are cached per pair of file versions and
+    key column, so repeated comparisons of the same runs are free until
+    either file is rewritten.
+    """
+    key = ("run_diff", file_key(path_1), file_key(path_2), kind, key_column)
+    return query_cache.get_or_compute(
+        key,
+        lambda: diff_frames(run_frame(path_1, kind), run_frame(path_2, kind), key_column)
+    )
@@ -0,0 +1,183 @@
+import io
+import json
+import os
+import tempfile
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.artifact_store import STREAM_CHUNK_BYTES, base_path
+from services.run_artifacts import current_artifact, iter_run_frames
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export unavailable
+    pa = None
+    pq = None
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+except ImportError:  # XLSX export unavailable
+    Workbook = None
+    ILLEGAL_CHARACTERS_RE = None
+
+# Rows decoded and encoded at a time; bounds export memory at any file size
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "50000"))
+# One header row plus Excel's 1,048,576-row sheet limit
+XLSX_MAX_ROWS = 1048575
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "jsonl": ("application/x-ndjson", ".jsonl"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+}
+
+
+def export_available(fmt: str) -> bool:
+    if fmt == "parquet":
+        return pq is not None
+    if fmt == "xlsx":
+        return Workbook is not None
+    return fmt in EXPORT_FORMATS
+
+
+def export_filename(file_path: str, fmt: str) -> str:
+    root, _ = os.path.splitext(os.path.basename(base_path(file_path)))
+    return root + EXPORT_FORMATS[fmt][1]
+
+
+def _select_rows(chunk: pd.DataFrame, rows: Optional[np.ndarray]) -> pd.DataFrame:
+    """Rows of a chunk (indexed by row number) that are in the sorted `rows`."""
+    if rows is None or chunk.empty:
+        return chunk
+    lo, hi = np.searchsorted(rows, [chunk.index[0], chunk.index[-1] + 1])
+    return chunk.loc[rows[lo:hi]]
+
+
+def _chunks(csv_path: str, columns: List[str], rows: Optional[np.ndarray], dtype=None) -> Iterator[pd.DataFrame]:
+    for chunk in iter_run_frames(csv_path, columns=columns, chunk_rows=EXPORT_CHUNK_ROWS, dtype=dtype):
+        chunk = _select_rows(chunk, rows)
+        if len(chunk):
+            yield chunk
+        if rows is not None and len(rows) and chunk.index.size and chunk.index[-1] >= rows[-1]:
+            break   # past the last selected row
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose written bytes are collected and drained per chunk."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def _iter_csv(csv_path, columns, rows) -> Iterator[bytes]:
+    header = True
+    for chunk in _chunks(csv_path, columns, rows):
+        yield chunk.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+    if header:   # nothing selected: still a CSV with the header
+        yield pd.DataFrame(columns=columns).to_csv(index=False).encode("utf-8")
+
+
+def _iter_jsonl(csv_path, columns, rows) -> Iterator[bytes]:
+    for chunk in _chunks(csv_path, columns, rows):
+        # Newer pandas ends the lines output with a newline, older versions do not
+        yield (chunk.to_json(orient="records", lines=True, date_format="iso").rstrip("\n") + "\n").encode("utf-8")
+
+
+def _iter_parquet(csv_path, columns, rows) -> Iterator[bytes]:
+    # The artifact's schema is kept as is; CSV chunks infer their types
+    # independently, so without an artifact every column is exported as text
+    artifact = current_artifact(csv_path)
+    if artifact is not None:
+        full = pq.ParquetFile(artifact).schema_arrow
+        schema, dtype = pa.schema([full.field(c) for c in columns]), None
+    else:
+        schema, dtype = pa.schema([(c, pa.string()) for c in columns]), str
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for chunk in _chunks(csv_path, columns, rows, dtype=dtype):
+        writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def _cell(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub("", value)
+    return value
+
+
+def _iter_xlsx(csv_path, columns, rows) -> Iterator[bytes]:
+    # write_only workbooks stream rows to a temporary file instead of
+    # keeping cells in memory; the zip is assembled on save and streamed out
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("data")
+    sheet.append(columns)
+    for chunk in _chunks(csv_path, columns, rows):
+        for record in chunk.itertuples(index=False, name=None):
+            sheet.append([_cell(v) for v in record])
+    with tempfile.TemporaryFile() as buffer:
+        workbook.save(buffer)
+        buffer.seek(0)
+        while True:
+            data = buffer.read(STREAM_CHUNK_BYTES)
+            if not data:
+                break
+            yield data
+
+
+_WRITERS = {"csv": _iter_csv, "jsonl": _iter_jsonl, "parquet": _iter_parquet, "xlsx": _iter_xlsx}
+
+
+def iter_export(csv_path: str, fmt: str, columns: List[str],
+                rows: Optional[List[int]] = None) -> Iterator[bytes]:
+    """
+    Encoded chunks of the `columns` of a run file in `fmt` (csv, jsonl,
+    parquet, xlsx), optionally only the sorted row numbers `rows`.
+
+    The file is read in EXPORT_CHUNK_ROWS chunks (Parquet record batches
+    when the artifact is current) and each chunk is encoded and yielded
+    before the next is read, so memory stays bounded by the chunk size.
+    """
+    selected = np.asarray(rows, dtype=np.int64) if rows is not None else None
+    return _WRITERS[fmt](csv_path, columns, selected)
+
+
+def export_row_limit(fmt: str) -> Optional[int]:
+    return XLSX_MAX_ROWS if fmt == "xlsx" else None
+
+
+def parse_columns(columns: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated or JSON list column selection; None for all columns."""
+    if not columns:
+        return None
+    if columns.lstrip().startswith("["):
+        return [str(c) for c in json.loads(columns)]
+    return [c.strip() for c in columns.split(",") if c.strip()]
@@ -0,0 +1,116 @@
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import models
+
+
+def record_run_metrics(db: Session, run: models.Run):
+    """
+    Write (or refresh) the time-series row of a completed run. Call in the
+    transaction that completes the run, after it has an id; the caller commits.
+    """
+    db.merge(models.RunMetric(
+        run_id=run.id,
+        project_id=run.project_id,
+        run_number=run.run_number,
+        created_at=run.created_at or datetime.utcnow(),
+        quality_score=run.quality_score_after or 0.0,
+        issues_found=run.total_issues or 0,
+        fixes_applied=run.total_fixes or 0
+    ))
+
+
+def timeline_points(db: Session, project_id: int, window: int = 5,
+                    start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[dict]:
+    """
+    A project's run metrics in run order, each with the average quality
+    score of the `window` runs ending at it (a SQL window function, computed
+    before the date range is applied so the first points in range still
+    average over earlier runs).
+    """
+    metric = models.RunMetric
+    ranked = select(
+        metric.run_id,
+        metric.run_number,
+        metric.created_at,
+        metric.quality_score,
+        metric.issues_found,
+        metric.fixes_applied,
+        func.avg(metric.quality_score).over(
+            order_by=metric.run_number,
+            rows=(-(window - 1), 0)
+        ).label("rolling_quality_score")
+    ).where(metric.project_id == project_id).subquery()
+
+    query = select(ranked)
+    if start is not None:
+        query = query.where(ranked.c.created_at >= start)
+    if end is not None:
+        query = query.where(ranked.c.created_at <= end)
+    rows = db.execute(query.order_by(ranked.c.run_number)).all()
+
+    return [
+        {
+            "run_number": row.run_number,
+            "run_id": row.run_id,
+            "created_at": row.created_at,
+            "quality_score": row.quality_score,
+            "issues_found": row.issues_found,
+            "fixes_applied": row.fixes_applied,
+            "rolling_quality_score": round(float(row.rolling_quality_score), 2)
+        }
+        for row in rows
+    ]
+
+
+def quality_trend(scores: List[float]) -> str:
+    """"improving", "declining" or "stable": later scores against earlier ones."""
+    if len(scores) < 2:
+        return "stable"
+    first_half = scores[:len(scores)//2] if len(scores) >= 4 else scores[:1]
+    second_half = scores[len(scores)//2:] if len(scores) >= 4 else scores[-1:]
+
+    first_avg = sum(first_half) / max(len(first_half), 1)
+    second_avg = sum(second_half) / max(len(second_half), 1)
+
+    if second_avg > first_avg + 2:
+        return "improving"
+    if second_avg < first_avg - 2:
+        return "declining"
+    return "stable"
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling: indices of `threshold`
+    points that keep the visual shape of the series (first and last point
+    always included). Returns every index when there is nothing to drop.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        # Average of the next bucket (the last point for the final bucket)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
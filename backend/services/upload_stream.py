@@ -0,0 +1,189 @@
+import codecs
+import csv
+import hashlib
+import os
+import re
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from services.artifact_store import open_artifact, stored_path
+
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_KB", "1024")) * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "500")) * 1024 * 1024
+# Bytes of the file start used to sniff the delimiter
+SNIFF_BYTES = 64 * 1024
+SNIFF_DELIMITERS = ",;\t|"
+
+# Whitespace-only lines, which pandas skips (skip_blank_lines), and the
+# ones among them holding a tab, which are rows when tab is the delimiter
+_WHITESPACE = b" \t\r"
+_BLANK_LINE = re.compile(rb"\n[ \t\r]*(?=\n)")
+_TAB_BLANK_LINE = re.compile(rb"\n[ \r]*\t[ \t\r]*(?=\n)")
+
+
+def csv_read_options(delimiter, encoding) -> dict:
+    """pd.read_csv keyword arguments for a sniffed file (empty for plain UTF-8 CSV)."""
+    options = {}
+    if delimiter and delimiter != ",":
+        options["sep"] = delimiter
+    if encoding and encoding != "utf-8":
+        options["encoding"] = encoding
+    return options
+
+
+class StoredUpload:
+    """
+    Metadata of an upload collected while it was written to disk: size,
+    sha256, data row count (header excluded, quote-aware, blank lines
+    skipped like pandas does), delimiter and encoding.
+    """
+
+    def __init__(self, path, size, sha256, row_count, delimiter, encoding):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.row_count = row_count
+        self.delimiter = delimiter
+        self.encoding = encoding
+
+    @property
+    def read_options(self) -> dict:
+        return csv_read_options(self.delimiter, self.encoding)
+
+
+class _CsvStreamStats:
+    """Incremental hash, size, row count and encoding check over raw chunks."""
+
+    def __init__(self):
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.head = b""
+        self.in_quotes = False
+        self.newlines = 0
+        self.blank_lines = 0
+        self.tab_blank_lines = 0
+        # Whether the current line (outside quotes) is whitespace so far, and
+        # holds a tab; the file start counts as a line start
+        self.line_blank = True
+        self.line_tab = False
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.utf8 = True
+
+    def feed(self, chunk: bytes):
+        self.hasher.update(chunk)
+        self.size += len(chunk)
+        if len(self.head) < SNIFF_BYTES:
+            self.head += chunk[:SNIFF_BYTES - len(self.head)]
+        if self.utf8:
+            try:
+                self.decoder.decode(chunk)
+            except UnicodeDecodeError:
+                self.utf8 = False
+
+        # Newlines inside quoted fields do not end a row; splitting on quotes
+        # gives alternating outside/inside segments ("" escapes toggle twice)
+        for i, part in enumerate(chunk.split(b'"')):
+            if i:
+                self.in_quotes = not self.in_quotes
+                self.line_blank = False
+            if self.in_quotes or not part:
+                continue
+            first = part.find(b"\n")
+            if first < 0:
+                if self.line_blank:
+                    self._extend_blank_line(part)
+                continue
+            last = part.rfind(b"\n")
+            self.newlines += part.count(b"\n")
+            # The line carried over from earlier parts ends at the first
+            # newline; lines between the first and last are whole
+            if self.line_blank:
+                self._extend_blank_line(part[:first])
+                if self.line_blank:
+                    self.blank_lines += 1
+                    self.tab_blank_lines += self.line_tab
+            if last > first:
+                inner = part[first:last + 1]
+                self.blank_lines += len(_BLANK_LINE.findall(inner))
+                self.tab_blank_lines += len(_TAB_BLANK_LINE.findall(inner))
+            self.line_blank, self.line_tab = True, False
+            self._extend_blank_line(part[last + 1:])
+
+    def _extend_blank_line(self, text: bytes):
+        """Add text to a line that is whitespace-only so far."""
+        if text.strip(_WHITESPACE):
+            self.line_blank = False
+        elif b"\t" in text:
+            self.line_tab = True
+
+    def finish(self, path: str) -> StoredUpload:
+        if self.utf8:
+            try:
+                self.decoder.decode(b"", final=True)
+            except UnicodeDecodeError:
+                self.utf8 = False
+        if not self.utf8:
+            encoding = "latin-1"
+        elif self.head.startswith(codecs.BOM_UTF8):
+            encoding = "utf-8-sig"
+        else:
+            encoding = "utf-8"
+
+        delimiter = self._sniff_delimiter(encoding)
+        tab_rows = delimiter == "\t"
+        records = self.newlines - self.blank_lines + (self.tab_blank_lines if tab_rows else 0)
+        # A last line without a trailing newline
+        if not self.line_blank or (tab_rows and self.line_tab):
+            records += 1
+        return StoredUpload(
+            path=path,
+            size=self.size,
+            sha256=self.hasher.hexdigest(),
+            row_count=max(records - 1, 0),
+            delimiter=delimiter,
+            encoding=encoding
+        )
+
+    def _sniff_delimiter(self, encoding: str) -> str:
+        sample = self.head.decode(encoding, errors="ignore")
+        # Only whole lines: a cut-off last line confuses the sniffer
+        if len(self.head) >= SNIFF_BYTES and "\n" in sample:
+            sample = sample[:sample.rindex("\n")]
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=SNIFF_DELIMITERS).delimiter
+        except csv.Error:
+            return ","
+
+
+async def stream_upload(upload: UploadFile, path: str, max_bytes: int = None) -> StoredUpload:
+    """
+    Write an uploaded file under `path` in chunks, compressed by the artifact
+    store (the returned StoredUpload.path carries the suffix), collecting its
+    metadata from the raw bytes on the way so the file never has to be
+    parsed just to describe it.
+    Uploads over `max_bytes` (MAX_UPLOAD_MB) are removed and rejected with 413.
+    """
+    max_bytes = max_bytes or MAX_UPLOAD_BYTES
+    path = stored_path(path)
+    stats = _CsvStreamStats()
+    try:
+        with open_artifact(path, "wb") as buffer:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                if stats.size + len(chunk) > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit"
+                    )
+                stats.feed(chunk)
+                await run_in_threadpool(buffer.write, chunk)
+    except BaseException:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+    return stats.finish(path)
@@ -1,43 +1,246 @@
 import openai
 import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.llm_cache import LLMCache, content_hash
 
 # Set via environment variable or default to simple logic if missing
-openai.api_key = os.getenv("OPENAI_API_KEY", "")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+# Any OpenAI-compatible server works (local model, proxy or a mock in tests)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+# JSON mode (response_format json_object) needs gpt-4-turbo or newer; plain gpt-4 rejects it
+LLM_MODEL = os.getenv("LLM_CORRECTOR_MODEL", "gpt-4-turbo")
 
-def llm_suggest_fix(record):
+# Records per request, requests in flight, attempts per request
+BATCH_SIZE = int(os.getenv("LLM_CORRECTOR_BATCH_SIZE", "20"))
+MAX_WORKERS = int(os.getenv("LLM_CORRECTOR_WORKERS", "4"))
+MAX_RETRIES = int(os.getenv("LLM_CORRECTOR_RETRIES", "3"))
+REQUEST_TIMEOUT = 60
+
+# Only these fields influence the suggestion, so they alone form the cache key
+RELEVANT_KEYWORDS = ("domain", "company", "industry", "job", "title", "role")
+SUGGESTION_KEYS = ("domain", "industry", "role_function")
+
+_client = None
+_cache = None
+
+
+class LLMBudget:
     """
-    Mock LLM behavior if no API key is present to avoid crashing.
-    Real implementation uses OpenAI if key exists.
+    Per-run cap on LLM requests and tokens, shared by all batch workers.
+    Tokens are reserved from a prompt-size estimate before each request and
+    corrected with the reported usage afterwards.
     """
-    if not openai.api_key or openai.api_key == "":
-        # Mock Response for demo purposes if no key
+
+    def __init__(self, max_calls=None, max_tokens=None):
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+        self.calls = 0
+        self.tokens = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, estimated_tokens):
+        with self._lock:
+            if self.max_calls is not None and self.calls >= self.max_calls:
+                self.denied += 1
+                return False
+            if self.max_tokens is not None and self.tokens + estimated_tokens > self.max_tokens:
+                self.denied += 1
+                return False
+            self.calls += 1
+            self.tokens += estimated_tokens
+            return True
+
+    def settle(self, estimated_tokens, actual_tokens):
+        if actual_tokens is None:
+            return
+        with self._lock:
+            self.tokens += actual_tokens - estimated_tokens
+
+    def to_dict(self):
         return {
-            "domain": {"suggested": record.get("domain", ""), "confidence": 0.5},
-            "industry": {"suggested": "Unknown", "confidence": 0.5},
-            "role_function": {"suggested": "Other", "confidence": 0.5}
+            "calls": self.calls,
+            "tokens": self.tokens,
+            "max_calls": self.max_calls,
+            "max_tokens": self.max_tokens,
+            "requests_denied": self.denied
         }
 
-    try:
-        prompt = f"""
-        You are a data quality assistant.
-        Given this B2B record, suggest corrections and normalization.
-        Return JSON only with keys: domain (object with suggested, confidence), industry (object with suggested, confidence), role_function (object with suggested, confidence).
-        
-        Record:
-        {record}
-        """
-
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2
+
+def is_llm_configured():
+    """True when a real completion endpoint is configured (not the mock fallback)."""
+    return bool(OPENAI_API_KEY)
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        _client = openai.OpenAI(
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
+            timeout=REQUEST_TIMEOUT,
+            max_retries=0,  # retries are handled per batch below
         )
-        return json.loads(response.choices[0].message.content)
-    except Exception as e:
-        print(f"LLM Error: {e}")
-        return {
-            "domain": {"suggested": record.get("domain", ""), "confidence": 0.0},
-            "industry": {"suggested": "Unknown", "confidence": 0.0},
-            "role_function": {"suggested": "Other", "confidence": 0.0}
-        }
+    return _client
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = LLMCache("llm_corrector")
+    return _cache
+
+
+def _mock_suggestion(record, confidence):
+    return {
+        "domain": {"suggested": record.get("domain", ""), "confidence": confidence},
+        "industry": {"suggested": "Unknown", "confidence": confidence},
+        "role_function": {"suggested": "Other", "confidence": confidence}
+    }
+
+
+def _relevant_fields(record, fields=None):
+    """The part of a record the LLM actually looks at, with stringified values."""
+    if fields:
+        keys = [k for k in fields if k in record]
+    else:
+        keys = [k for k in record if any(word in str(k).lower() for word in RELEVANT_KEYWORDS)]
+    return {str(k): ("" if record.get(k) is None else str(record.get(k))) for k in sorted(keys, key=str)}
+
+
+def _build_prompt(items):
+    return f"""
+You are a data quality assistant.
+For each B2B record below, suggest corrections and normalization.
+Return JSON only, in this exact format:
+{{
+  "results": [
+    {{
+      "id": <record id>,
+      "domain": {{"suggested": "...", "confidence": 0.0}},
+      "industry": {{"suggested": "...", "confidence": 0.0}},
+      "role_function": {{"suggested": "...", "confidence": 0.0}}
+    }}
+  ]
+}}
+
+Records:
+{json.dumps(items, ensure_ascii=False)}
+"""
+
+
+def _request_batch(client, views, max_retries, budget=None):
+    """
+    Send one batch of record views and return {position: suggestion}.
+    Retries with exponential backoff on transport errors and malformed JSON.
+    Positions missing from the model's answer, or answered without any
+    usable suggestion, are absent from the result, as is the whole batch
+    once the budget refuses another request.
+    """
+    items = [{"id": i, "record": view} for i, view in enumerate(views)]
+    prompt = _build_prompt(items)
+    # Rough prompt + answer size, ~4 characters per token
+    estimated_tokens = len(prompt) // 4 * 2
+
+    for attempt in range(max_retries):
+        if budget is not None and not budget.reserve(estimated_tokens):
+            return {}
+        try:
+            response = client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.2,
+                response_format={"type": "json_object"},
+            )
+            if budget is not None:
+                usage = getattr(response, "usage", None)
+                budget.settle(estimated_tokens, getattr(usage, "total_tokens", None))
+            parsed = json.loads(response.choices[0].message.content)
+            results = {}
+            for item in parsed.get("results", []):
+                try:
+                    position = int(item.get("id"))
+                except (TypeError, ValueError):
+                    continue
+                suggestion = {
+                    key: item[key] for key in SUGGESTION_KEYS
+                    if isinstance(item.get(key), dict) and "suggested" in item[key]
+                }
+                # An answer with nothing usable is treated as missing, so it is never cached
+                if 0 <= position < len(views) and suggestion:
+                    results[position] = suggestion
+            return results
+        except Exception as e:
+            print(f"LLM Error (attempt {attempt + 1}/{max_retries}): {e}")
+            if attempt + 1 < max_retries:
+                time.sleep(min(2 ** attempt, 10))
+    return {}
+
+
+def llm_suggest_fixes_batch(records, fields=None, batch_size=None, max_workers=None, max_retries=None, client=None, budget=None):
+    """
+    Suggest fixes for many records with as few LLM requests as possible.
+
+    Records are reduced to their relevant fields and de-duplicated, answers are
+    looked up in the on-disk cache by content hash, and only the remaining
+    unique records are sent, batch_size per request with max_workers requests
+    in flight. An optional LLMBudget caps the requests and tokens spent.
+
+    Returns a list of suggestion dicts aligned with `records`.
+    """
+    records = list(records)
+    if not records:
+        return []
+    if not OPENAI_API_KEY and client is None:
+        # Mock Response for demo purposes if no key
+        return [_mock_suggestion(r, 0.5) for r in records]
+
+    batch_size = batch_size or BATCH_SIZE
+    max_workers = max_workers or MAX_WORKERS
+    if max_retries is None:
+        max_retries = MAX_RETRIES
+
+    views = [_relevant_fields(r, fields) for r in records]
+    keys = [content_hash([LLM_MODEL, v]) for v in views]
+
+    cache = _get_cache()
+    suggestions = cache.get_many(keys)
+
+    # One request slot per unique uncached record
+    unique = {}
+    for key, view in zip(keys, views):
+        if key not in suggestions and key not in unique:
+            unique[key] = view
+
+    if unique:
+        pending = list(unique.items())
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        client = client or _get_client()
+
+        def run(batch):
+            answered = _request_batch(client, [view for _, view in batch], max_retries, budget)
+            return {batch[pos][0]: suggestion for pos, suggestion in answered.items()}
+
+        fresh = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for answered in executor.map(run, batches):
+                fresh.update(answered)
+
+        # Only real answers are cached; failed records are asked again next run
+        fresh = {key: suggestion for key, suggestion in fresh.items() if suggestion}
+        cache.set_many(fresh)
+        suggestions.update(fresh)
+
+    return [suggestions.get(key) or _mock_suggestion(record, 0.0) for key, record in zip(keys, records)]
+
+
+def llm_suggest_fix(record):
+    """
+    Mock LLM behavior if no API key is present to avoid crashing.
+    Real implementation uses OpenAI if key exists.
+    """
+    return llm_suggest_fixes_batch([record])[0]
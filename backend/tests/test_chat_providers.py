@@ -0,0 +1,13 @@
+from services.chat_providers import ProviderRouter
+
+
+def test_providers_without_api_key_are_never_routed_to():
+    router = ProviderRouter([
+        {"name": "local", "kind": "openai", "url": "http://local", "model": "m", "timeout": 1},
+        {"name": "groq", "kind": "openai", "url": "http://groq", "model": "m", "timeout": 1, "api_key": ""},
+        {"name": "keyed", "kind": "openai", "url": "http://keyed", "model": "m", "timeout": 1, "api_key": "k"},
+    ])
+
+    assert [p["name"] for p in router.ordered()] == ["local", "keyed"]
+    assert [p["name"] for p, _, _ in router._attempts()] == ["local", "keyed"]
+    assert "groq" not in router.health
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+from services.chat_sessions import InMemorySessionStore, new_session
+
+
+def test_read_does_not_hide_live_sessions():
+    store = InMemorySessionStore(ttl=timedelta(minutes=10))
+    store.save(new_session("old"))
+    store.save(new_session("new"))
+
+    # Reading a session (e.g. GET /chat/context) must not make it look recent
+    assert store.get("old") is not None
+    store.get("old")["last_active"] = datetime.now() - timedelta(minutes=11)
+
+    assert [s["session_id"] for s in store.list_active()] == ["new"]
+    assert store.get("old") is None
+
+
+def test_expired_sessions_are_evicted_after_reads():
+    store = InMemorySessionStore(ttl=timedelta(minutes=10))
+    for session_id in ("a", "b", "c"):
+        store.save(new_session(session_id))
+    store.get("a")
+    for session_id in ("a", "b"):
+        store._sessions[session_id]["last_active"] = datetime.now() - timedelta(minutes=11)
+
+    store.save(new_session("d"))
+
+    assert list(store._sessions) == ["c", "d"]
@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from services.llm_cache import LLMCache
+from yoge_logics import job_classifier
+
+RULES = {"Senior Accountant": "Finance", "Staff Nurse": "Medical"}
+
+
+@pytest.fixture(autouse=True)
+def classifier(monkeypatch, tmp_path):
+    monkeypatch.setattr(job_classifier, "_cache", LLMCache("job_classifier", path=str(tmp_path / "cache.sqlite3")))
+    monkeypatch.setattr(job_classifier, "BATCH_SIZE", 2)
+    monkeypatch.setattr(job_classifier, "MAX_CONCURRENCY", 2)
+    # Titles the rules cannot map come back unchanged, as unify_job_title does
+    monkeypatch.setattr(job_classifier, "unify_job_title", lambda title: RULES.get(title, title))
+
+
+class FakeOllama:
+    """Ollama chat endpoint answering from a {title: function or raw content} table."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request):
+        titles = json.loads(request.content)["messages"][1]["content"].split("Input Titles:")[1]
+        titles = json.loads(titles.split("Return output")[0])
+        self.batches.append(titles)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+        raw = [self.answers[t] for t in titles if isinstance(self.answers.get(t), bytes)]
+        if raw:
+            return httpx.Response(200, json={"message": {"content": raw[0].decode()}})
+        mappings = [{"title": t.upper(), "function": self.answers[t]} for t in titles if t in self.answers]
+        return httpx.Response(200, json={"message": {"content": json.dumps({"mappings": mappings})}})
+
+
+def classify(titles, ollama):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(ollama)) as client:
+            return await job_classifier.classify_job_titles_async(titles, client=client)
+
+    summary = asyncio.run(run())
+    return {row["job_function"]: sorted(row["job_titles"]) for row in summary}
+
+
+def test_batches_with_capped_concurrency():
+    titles = [f"Title {i}" for i in range(9)]
+    ollama = FakeOllama({t: "Engineering" for t in titles})
+
+    assert classify(titles, ollama) == {"Engineering": sorted(titles)}
+    assert sorted(len(batch) for batch in ollama.batches) == [1, 2, 2, 2, 2]
+    assert sorted(t for batch in ollama.batches for t in batch) == sorted(titles)
+    assert ollama.max_in_flight == 2
+
+
+def test_rule_based_titles_use_model_categories():
+    ollama = FakeOllama({"Quant": "Accounting/Finance"})
+
+    assert classify(["Senior Accountant", "Staff Nurse", "Quant"], ollama) == {
+        "Accounting/Finance": ["Quant", "Senior Accountant"],
+        "Medical/Health": ["Staff Nurse"],
+    }
+    assert ollama.batches == [["Quant"]]
+
+
+def test_second_call_is_served_from_cache():
+    titles = ["Title A", "Title B", "Title C"]
+    classify(titles, FakeOllama({t: "Sales" for t in titles}))
+
+    ollama = FakeOllama({})
+    assert classify(titles + ["Title D"], ollama) == {"Sales": titles, "Unclassified": ["Title D"]}
+    assert ollama.batches == [["Title D"]]
+
+
+def test_malformed_model_output():
+    ollama = FakeOllama({
+        "Broken 1": b"not json",
+        "Broken 2": b"not json",
+        "Odd Label": "Astronaut",
+        "Lowercase": "sales",
+    })
+
+    assert classify(["Broken 1", "Broken 2", "Odd Label", "Lowercase", "Skipped"], ollama) == {
+        "Unclassified": ["Broken 1", "Broken 2", "Skipped"],
+        "Other": ["Odd Label"],
+        "Sales": ["Lowercase"],
+    }
+
+    # Only validated answers were cached; failed titles are asked again
+    retry = FakeOllama({"Broken 1": "IT", "Broken 2": "IT", "Skipped": "HR"})
+    assert classify(["Broken 1", "Broken 2", "Odd Label", "Lowercase", "Skipped"], retry) == {
+        "IT": ["Broken 1", "Broken 2"],
+        "Other": ["Odd Label"],
+        "Sales": ["Lowercase"],
+        "HR": ["Skipped"],
+    }
+    assert sorted(t for batch in retry.batches for t in batch) == ["Broken 1", "Broken 2", "Skipped"]
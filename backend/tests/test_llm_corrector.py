@@ -0,0 +1,126 @@
+import json
+import threading
+
+import httpx
+import openai
+import pytest
+
+from services.llm_cache import LLMCache
+from src import llm_corrector
+
+
+@pytest.fixture(autouse=True)
+def corrector(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_corrector, "_cache", LLMCache("llm_corrector", path=str(tmp_path / "cache.sqlite3")))
+    monkeypatch.setattr(llm_corrector.time, "sleep", lambda seconds: None)
+
+
+def _completion(content):
+    return httpx.Response(200, json={
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": llm_corrector.LLM_MODEL,
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+    })
+
+
+class FakeOpenAI:
+    """Chat completions endpoint answering each record from its domain, or with scripted responses first."""
+
+    def __init__(self, scripted=()):
+        self.scripted = list(scripted)
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        body = json.loads(request.content)
+        items = json.loads(body["messages"][0]["content"].split("Records:")[1])
+        with self._lock:
+            self.requests.append({"body": body, "items": items})
+            if self.scripted:
+                return self.scripted.pop(0)
+        results = [
+            {"id": item["id"], "domain": {"suggested": item["record"]["domain"].lower(), "confidence": 0.9}}
+            for item in items
+        ]
+        return _completion(json.dumps({"results": results}))
+
+
+def suggest(records, fake, **kwargs):
+    client = openai.OpenAI(api_key="test", max_retries=0, http_client=httpx.Client(transport=httpx.MockTransport(fake)))
+    return llm_corrector.llm_suggest_fixes_batch(records, client=client, **kwargs)
+
+
+def test_unique_records_are_batched_in_json_mode():
+    records = [{"domain": f"Site{i}.com", "name": f"Person {i}"} for i in range(5)]
+    records.append({"domain": "Site0.com", "name": "Someone else"})
+    fake = FakeOpenAI()
+
+    suggestions = suggest(records, fake, batch_size=2, max_workers=2)
+
+    assert [s["domain"]["suggested"] for s in suggestions] == [f"site{i}.com" for i in range(5)] + ["site0.com"]
+    assert sorted(len(r["items"]) for r in fake.requests) == [1, 2, 2]
+    assert sorted(item["record"]["domain"] for r in fake.requests for item in r["items"]) == [f"Site{i}.com" for i in range(5)]
+    assert all(r["body"]["response_format"] == {"type": "json_object"} for r in fake.requests)
+    # Only the relevant fields are sent
+    assert all(set(item["record"]) == {"domain"} for r in fake.requests for item in r["items"])
+
+    # A second run is answered from the cache
+    repeat = FakeOpenAI()
+    assert suggest(records, repeat, batch_size=2) == suggestions
+    assert repeat.requests == []
+
+
+def test_transport_errors_and_malformed_json_are_retried():
+    fake = FakeOpenAI([httpx.Response(500, json={"error": {"message": "boom"}}), _completion("not json")])
+
+    suggestions = suggest([{"domain": "Acme.com"}], fake, max_retries=3)
+
+    assert suggestions[0]["domain"]["suggested"] == "acme.com"
+    assert len(fake.requests) == 3
+
+
+def test_retries_stop_at_max_retries():
+    fake = FakeOpenAI([httpx.Response(500, json={"error": {"message": "boom"}})] * 2)
+
+    suggestions = suggest([{"domain": "Acme.com"}], fake, max_retries=2)
+
+    assert len(fake.requests) == 2
+    assert suggestions[0]["domain"] == {"suggested": "Acme.com", "confidence": 0.0}
+
+
+def test_answers_are_matched_by_id_and_validated():
+    content = json.dumps({"results": [
+        {"id": "1", "domain": {"suggested": "b.com", "confidence": 0.8}, "industry": "not a dict"},
+        {"id": 7, "domain": {"suggested": "out-of-range.com", "confidence": 0.8}},
+        {"id": None, "domain": {"suggested": "no-id.com", "confidence": 0.8}},
+    ]})
+    fake = FakeOpenAI([_completion(content)])
+
+    suggestions = suggest([{"domain": "A.com"}, {"domain": "B.com"}], fake)
+
+    assert suggestions[1] == {"domain": {"suggested": "b.com", "confidence": 0.8}}
+    # Records the model skipped fall back to a zero-confidence suggestion
+    assert suggestions[0]["domain"] == {"suggested": "A.com", "confidence": 0.0}
+    assert len(fake.requests) == 1
+
+
+def test_empty_and_unusable_answers_are_not_cached():
+    content = json.dumps({"results": [
+        {"id": 0},
+        {"id": 1, "domain": "b.com", "industry": {"confidence": 0.9}},
+    ]})
+    first = FakeOpenAI([_completion(content), _completion("{}")])
+    records = [{"domain": "A.com"}, {"domain": "B.com"}, {"domain": "C.com"}]
+
+    suggestions = suggest(records, first, batch_size=2, max_workers=1)
+
+    assert [s["domain"]["confidence"] for s in suggestions] == [0.0, 0.0, 0.0]
+
+    retry = FakeOpenAI()
+    suggestions = suggest(records, retry, batch_size=2, max_workers=1)
+
+    assert [s["domain"]["suggested"] for s in suggestions] == ["a.com", "b.com", "c.com"]
+    assert sorted(item["record"]["domain"] for r in retry.requests for item in r["items"]) == ["A.com", "B.com", "C.com"]
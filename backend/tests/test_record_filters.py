@@ -0,0 +1,29 @@
+import models
+from services.record_filters import record_filter_condition
+
+
+def test_search_matches_values_not_column_names(pg_session):
+    db = pg_session
+    user = models.User(name="Searcher", email="search-test@example.com", password="x")
+    db.add(user)
+    db.flush()
+    upload = models.UploadedFile(user_id=user.id, filename="people.csv", file_path="people.csv")
+    db.add(upload)
+    db.flush()
+    db.add_all([
+        models.RawRecord(file_id=upload.id, row_index=0, data={"email": "ann@example.com", "name": "Ann"}),
+        models.RawRecord(file_id=upload.id, row_index=1, data={"email": "bob@test.org", "name": "Bob 50%"}),
+    ])
+    db.flush()
+
+    def search(term):
+        condition = record_filter_condition(db, models.RawRecord, upload.id, {"search": term})
+        return sorted(
+            r.row_index
+            for r in db.query(models.RawRecord).filter(models.RawRecord.file_id == upload.id, condition)
+        )
+
+    assert search("email") == []
+    assert search("EXAMPLE") == [0]
+    assert search("50%") == [1]
+    assert search("%") == [1]
@@ -0,0 +1,43 @@
+import models
+from services.review_actions import build_cleaned_records
+
+
+def _suggestion(file_id, row_index, column, original, suggested, issue_type, status="accepted"):
+    return models.ReviewSuggestion(
+        file_id=file_id, row_index=row_index, column_name=column, original_value=original,
+        suggested_value=suggested, confidence_score=0.9, issue_type=issue_type, status=status
+    )
+
+
+def test_finalize_drops_accepted_duplicates_and_keeps_value_types(pg_session):
+    db = pg_session
+    user = models.User(name="Reviewer", email="finalize-test@example.com", password="x")
+    db.add(user)
+    db.flush()
+    upload = models.UploadedFile(user_id=user.id, filename="people.csv", file_path="people.csv")
+    db.add(upload)
+    db.flush()
+
+    db.add_all([
+        models.RawRecord(file_id=upload.id, row_index=0, data={"email": "a@gmial.com", "age": 30, "active": True}),
+        models.RawRecord(file_id=upload.id, row_index=1, data={"email": "a@gmial.com", "age": 30, "active": True}),
+        models.RawRecord(file_id=upload.id, row_index=2, data={"email": "b@x.com", "age": 4, "active": False}),
+        _suggestion(upload.id, 0, "email", "a@gmial.com", "a@gmail.com", "email"),
+        _suggestion(upload.id, 1, "ROW", "Duplicate Row", "Marked for Remove", "duplicate"),
+        _suggestion(upload.id, 2, "age", "4", "40", "missing_value"),
+        _suggestion(upload.id, 2, "active", "False", "True", "missing_value"),
+        _suggestion(upload.id, 2, "email", "b@x.com", "rejected@x.com", "email", status="rejected"),
+    ])
+    db.flush()
+
+    stats = build_cleaned_records(db, upload.id)
+
+    rows = {
+        r.row_index: r.data
+        for r in db.query(models.CleanedRecord).filter(models.CleanedRecord.file_id == upload.id)
+    }
+    assert stats["rows"] == 2
+    assert rows == {
+        0: {"email": "a@gmail.com", "age": 30, "active": True},
+        2: {"email": "b@x.com", "age": 40, "active": True},
+    }
@@ -1,25 +1,80 @@
-import requests
+import asyncio
 import json
+import os
 
-OLLAMA_URL = "http://localhost:11434/api/chat"
-OLLAMA_MODEL = "llama3"   # or llama3:8b / mistral / qwen2.5
+import httpx
 
-def classify_job_titles(job_titles):
-    """
-    Classifies a list of job titles into standard job functions using a local Ollama model.
-    Returns a list of dicts:
-    { "job_function": "Engineering", "job_titles": [...], "count": n }
-    """
+from services.llm_cache import LLMCache, content_hash
+from yoge_logics.semantic_llm import JOB_FUNCTIONS, unify_job_title
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/chat")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")   # or llama3:8b / mistral / qwen2.5
+
+# Titles per prompt and prompts in flight. Small batches keep each prompt well
+# inside the model's context window and fast enough to finish within the timeout.
+BATCH_SIZE = int(os.getenv("JOB_CLASSIFIER_BATCH_SIZE", "40"))
+MAX_CONCURRENCY = int(os.getenv("JOB_CLASSIFIER_CONCURRENCY", "4"))
+REQUEST_TIMEOUT = 60
+
+CATEGORIES = [
+    "Engineering", "Management", "Sales", "R&D", "Marketing", "Accounting/Finance",
+    "Business Development", "Legal", "Education", "Medical/Health",
+    "Production/Manufacturing", "Admin", "Operations", "HR", "Customer Service",
+    "IT", "Design", "Other",
+]
+
+# Rule-based (semantic_llm.JOB_FUNCTIONS) labels that differ from CATEGORIES
+RULE_FUNCTION_CATEGORIES = {
+    "Finance": "Accounting/Finance",
+    "Medical": "Medical/Health",
+    "RND": "R&D",
+    "Production": "Production/Manufacturing",
+    "Consulting": "Business Development",
+    "Hospitality": "Customer Service",
+    "Driver": "Operations",
+    "Real Estate": "Sales",
+}
+
+_CATEGORY_BY_LOWER = {c.lower(): c for c in CATEGORIES}
+
+_client = None
+_cache = None
+
+
+def _get_client():
+    """Shared pooled client, so batches reuse keep-alive connections to Ollama."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=MAX_CONCURRENCY, max_keepalive_connections=MAX_CONCURRENCY),
+        )
+    return _client
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = LLMCache("job_classifier")
+    return _cache
 
-    unique_titles = list(set([t for t in job_titles if t and str(t).strip()]))
 
-    prompt = f"""
+def _category(function):
+    """A model answer as one of CATEGORIES; anything unrecognised is "Other"."""
+    return _CATEGORY_BY_LOWER.get(str(function or "").strip().lower(), "Other")
+
+
+def _cache_key(title):
+    # Model name is part of the key so switching models re-classifies
+    return content_hash([OLLAMA_MODEL, title.strip().lower()])
+
+
+def _build_prompt(titles):
+    return f"""
 You are an AI Job Classifier.
 
 Classify the following job titles into these standard categories:
-[Engineering, Management, Sales, R&D, Marketing, Accounting/Finance, Business Development,
-Legal, Education, Medical/Health, Production/Manufacturing, Admin, Operations, HR,
-Customer Service, IT, Design, Other]
+[{", ".join(CATEGORIES)}]
 
 Rules:
 - "SDE", "Software Developer" → Engineering
@@ -29,7 +84,7 @@ Rules:
 - Output ONLY valid JSON.
 
 Input Titles:
-{json.dumps(unique_titles)}
+{json.dumps(titles)}
 
 Return output in this exact format:
 {{
@@ -39,49 +94,110 @@ Return output in this exact format:
 }}
 """
 
+
+async def _classify_batch(client, semaphore, titles):
+    """
+    Send one batch of titles to Ollama.
+    Returns {title: function} for the titles the model answered; titles it
+    skipped (or a failed request) are simply absent.
+    """
     payload = {
         "model": OLLAMA_MODEL,
         "messages": [
             {"role": "system", "content": "You are a precise job classification assistant. Output ONLY JSON."},
-            {"role": "user", "content": prompt}
+            {"role": "user", "content": _build_prompt(titles)}
         ],
         "stream": False,
+        "format": "json",
         "options": {
             "temperature": 0
         }
     }
 
-    try:
-        response = requests.post(OLLAMA_URL, json=payload, timeout=60)
-        response.raise_for_status()
-
-        result = response.json()
-        content = result["message"]["content"]
-
-        parsed = json.loads(content)
-        mappings = parsed.get("mappings", [])
-
-        # Group by job function
-        grouped = {}
-        for m in mappings:
-            func = m.get("function", "Other")
-            title = m.get("title")
-            grouped.setdefault(func, []).append(title)
-
-        output_summary = []
-        for func, titles in grouped.items():
-            output_summary.append({
-                "job_function": func,
-                "job_titles": titles,
-                "count": len(titles)
-            })
-
-        return output_summary
-
-    except Exception as e:
-        print(f"Ollama Error: {e}")
-        return [{
-            "job_function": "Unclassified",
-            "job_titles": unique_titles,
-            "count": len(unique_titles)
-        }]
+    async with semaphore:
+        try:
+            response = await client.post(OLLAMA_URL, json=payload)
+            response.raise_for_status()
+            content = response.json()["message"]["content"]
+            mappings = json.loads(content).get("mappings", [])
+        except Exception as e:
+            print(f"Ollama Error: {e}")
+            return {}
+
+    # Match answers back to the titles we sent; models sometimes change case
+    by_lower = {t.lower(): t for t in titles}
+    result = {}
+    for m in mappings:
+        if not isinstance(m, dict):
+            continue
+        title = by_lower.get(str(m.get("title", "")).strip().lower())
+        if title:
+            result[title] = _category(m.get("function"))
+    return result
+
+
+async def classify_job_titles_async(job_titles, client=None):
+    """
+    Classifies a list of job titles into standard job functions (CATEGORIES).
+
+    Titles are first run through the rule-based classifier; only the ones it
+    cannot map are sent to the local Ollama model, in batches of BATCH_SIZE with
+    at most MAX_CONCURRENCY requests in flight. Every model answer is cached on
+    disk, so a title is never sent to the model twice.
+
+    Returns a list of dicts:
+    { "job_function": "Engineering", "job_titles": [...], "count": n }
+    """
+    unique_titles = list(dict.fromkeys(str(t) for t in job_titles if t and str(t).strip()))
+
+    mapping = {}
+    pending = []
+    for title in unique_titles:
+        function = unify_job_title(title)
+        if function in JOB_FUNCTIONS:
+            mapping[title] = RULE_FUNCTION_CATEGORIES.get(function, function)
+        else:
+            pending.append(title)
+
+    if pending:
+        # The cache is SQLite on disk; keep its I/O off the event loop
+        cache = await asyncio.to_thread(_get_cache)
+        keys = {title: _cache_key(title) for title in pending}
+        cached = await asyncio.to_thread(cache.get_many, list(keys.values()))
+
+        uncached = []
+        for title in pending:
+            if keys[title] in cached:
+                mapping[title] = _category(cached[keys[title]])
+            else:
+                uncached.append(title)
+
+        if uncached:
+            batches = [uncached[i:i + BATCH_SIZE] for i in range(0, len(uncached), BATCH_SIZE)]
+            semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+            results = await asyncio.gather(
+                *(_classify_batch(client or _get_client(), semaphore, batch) for batch in batches)
+            )
+
+            classified = {}
+            for result in results:
+                classified.update(result)
+            await asyncio.to_thread(cache.set_many, {keys[title]: function for title, function in classified.items()})
+
+            for title in uncached:
+                mapping[title] = classified.get(title, "Unclassified")
+
+    # Group by job function
+    grouped = {}
+    for title in unique_titles:
+        grouped.setdefault(mapping[title], []).append(title)
+
+    output_summary = []
+    for func, titles in grouped.items():
+        output_summary.append({
+            "job_function": func,
+            "job_titles": titles,
+            "count": len(titles)
+        })
+
+    return output_summary